@@ -1,5 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        # Модули подключают обёртки SQL к новым соединениям
+        # (connection_created), mail объявляет задачу отправки писем.
+        from . import jobs, mail, profiling, routers  # noqa: F401
+
+        if settings.PROFILING_ENABLED:
+            # Обёртки шаблонов и кешей для ProfilingMiddleware.
+            profiling.install()
+        # Обработчики фоновых задач из модулей jobs.py приложений.
+        jobs.autodiscover()
@@ -0,0 +1,206 @@
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+
+# Пулы процесса по (алиас, имя БД): тестовая БД под тем же алиасом
+# получает свой пул и не берёт соединения с рабочей.
+pools = {}
+
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """Общие для потоков процесса соединения DB-API одной БД.
+
+    Соединение, которое Django закрывает в конце запроса, возвращается
+    в пул и достаётся следующему запросу из любого потока: из потока
+    WSGI-сервера или из потока sync_to_async асинхронной view. Перед
+    выдачей соединение проверяется, а старше max_lifetime секунд -
+    закрывается. Открытых соединений не больше max_size; остальные
+    ждут освобождения до timeout секунд.
+    """
+
+    def __init__(self, check, max_size=8, timeout=10, max_lifetime=3600):
+        self.check = check
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.condition = threading.Condition()
+        self.idle = deque()
+        # id(соединения) -> [время открытия, число выдач]
+        self.opened = {}
+        # Соединения, которые открываются прямо сейчас.
+        self.pending = 0
+        self.reset_metrics()
+
+    def reset_metrics(self):
+        with self.condition:
+            self.created = 0
+            self.reused = 0
+            self.discarded = 0
+            self.waits = 0
+            self.wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self.lifetime_s = 0.0
+            self.uses_closed = 0
+
+    def checkout(self, connect):
+        started = time.perf_counter()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            with self.condition:
+                while not self.idle and self.size >= self.max_size:
+                    waited = True
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0 or not self.condition.wait(remaining):
+                        raise OperationalError(
+                            f'Нет свободных соединений в пуле за '
+                            f'{self.timeout} с (max_size={self.max_size})'
+                        )
+                conn = self.idle.pop() if self.idle else None
+                if conn is None:
+                    self.pending += 1
+            if conn is None:
+                conn = self._open(connect)
+                break
+            if self._usable(conn):
+                with self.condition:
+                    self.reused += 1
+                    self.opened[id(conn)][1] += 1
+                break
+            self.discard(conn)
+        self._waited(waited, started)
+        return conn
+
+    def _open(self, connect):
+        try:
+            conn = connect()
+        except Exception:
+            with self.condition:
+                self.pending -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.pending -= 1
+            self.opened[id(conn)] = [time.monotonic(), 1]
+            self.created += 1
+        return conn
+
+    @property
+    def size(self):
+        return len(self.opened) + self.pending
+
+    def _usable(self, conn):
+        born = self.opened[id(conn)][0]
+        if time.monotonic() - born > self.max_lifetime:
+            return False
+        try:
+            self.check(conn)
+        except Exception:
+            return False
+        return True
+
+    def _waited(self, waited, started):
+        if not waited:
+            return
+        wait_ms = (time.perf_counter() - started) * 1000
+        with self.condition:
+            self.waits += 1
+            self.wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def checkin(self, conn):
+        """Возвращает соединение в пул; незавершённая транзакция
+        откатывается, сломанное соединение закрывается."""
+
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            self.discard(conn)
+            return
+        with self.condition:
+            self.idle.append(conn)
+            self.condition.notify()
+
+    def discard(self, conn):
+        with self.condition:
+            born, uses = self.opened.pop(id(conn))
+            self.discarded += 1
+            self.lifetime_s += time.monotonic() - born
+            self.uses_closed += uses
+            self.condition.notify()
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Закрывает свободные соединения."""
+
+        while True:
+            with self.condition:
+                if not self.idle:
+                    return
+                conn = self.idle.pop()
+            self.discard(conn)
+
+    def metrics(self):
+        """Цифры для подбора числа воркеров и max_size: выдачи из пула,
+        ожидание свободного соединения, время жизни и число выдач
+        закрытых соединений."""
+
+        now = time.monotonic()
+        with self.condition:
+            opened = list(self.opened.values())
+            checkouts = self.created + self.reused
+            return {
+                'max_size': self.max_size,
+                'open': len(opened),
+                'idle': len(self.idle),
+                'in_use': len(opened) - len(self.idle),
+                'created': self.created,
+                'reused': self.reused,
+                'reuse_ratio': self.reused / checkouts if checkouts else 0,
+                'discarded': self.discarded,
+                'waits': self.waits,
+                'avg_wait_ms': self.wait_ms / self.waits if self.waits else 0,
+                'max_wait_ms': self.max_wait_ms,
+                'avg_lifetime_s': (
+                    self.lifetime_s / self.discarded if self.discarded else 0
+                ),
+                'oldest_s': max(
+                    (now - born for born, _ in opened), default=0
+                ),
+                'avg_uses': (
+                    self.uses_closed / self.discarded if self.discarded else 0
+                ),
+            }
+
+
+def get_pool(key, factory):
+    with _pools_lock:
+        if key not in pools:
+            pools[key] = factory()
+        return pools[key]
+
+
+def metrics():
+    """Метрики всех пулов процесса."""
+
+    with _pools_lock:
+        items = list(pools.items())
+    return [
+        {'alias': alias, 'name': name, **pool.metrics()}
+        for (alias, name), pool in items
+    ]
+
+
+def close_pool(key):
+    with _pools_lock:
+        pool = pools.pop(key, None)
+    if pool is not None:
+        pool.close()
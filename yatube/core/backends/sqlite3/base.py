@@ -0,0 +1,86 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+from ..pool import ConnectionPool, get_pool
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+def check(conn):
+    conn.execute('SELECT 1').fetchone()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Стандартный бэкенд sqlite3 с настройкой соединения при создании.
+
+    В OPTIONS понимает три ключа, которые не передаются в
+    sqlite3.connect:
+
+    - pragmas - словарь PRAGMA, выполняемых для каждого нового
+      соединения в порядке объявления (journal_mode, synchronous,
+      busy_timeout и т. п.);
+    - transaction_mode - режим BEGIN для transaction.atomic. При
+      IMMEDIATE блокировка на запись берётся в начале транзакции, и
+      конкурирующий писатель ждёт её в пределах busy_timeout вместо
+      мгновенного "database is locked" при повышении блокировки
+      с чтения до записи. В Django 5.1 это штатный параметр;
+    - pool - параметры core.backends.pool.ConnectionPool (max_size,
+      timeout, max_lifetime): закрытое Django соединение возвращается
+      в общий пул процесса, а не закрывается. Как и пул PostgreSQL
+      в Django 5.1, несовместим с CONN_MAX_AGE.
+    """
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for option in ('pragmas', 'transaction_mode', 'pool'):
+            params.pop(option, None)
+        return params
+
+    @property
+    def pool(self):
+        options = self.settings_dict['OPTIONS'].get('pool')
+        if not options or self.is_in_memory_db():
+            return None
+        if self.settings_dict['CONN_MAX_AGE']:
+            raise ImproperlyConfigured(
+                'Пул соединений несовместим с CONN_MAX_AGE, '
+                'задайте CONN_MAX_AGE = 0'
+            )
+        return get_pool(
+            (self.alias, self.settings_dict['NAME']),
+            lambda: ConnectionPool(check, **options),
+        )
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is not None:
+            return pool.checkout(lambda: self.connect_raw(conn_params))
+        return self.connect_raw(conn_params)
+
+    def connect_raw(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = self.settings_dict['OPTIONS'].get('pragmas', {})
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.checkin(self.connection)
+
+    @property
+    def transaction_mode(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        mode = (mode or 'DEFERRED').upper()
+        if mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f'transaction_mode должен быть одним из '
+                f'{", ".join(TRANSACTION_MODES)}'
+            )
+        return mode
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,262 @@
+import json
+import time
+import tracemalloc
+from io import StringIO
+
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.paginator import Paginator
+from django.db import connection, reset_queries
+from django.test import Client
+from django.template.loader import render_to_string
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from posts.models import Group, Post, User
+
+NAMESPACES = ('posts', 'users', 'about')
+
+# Адреса, которым для осмысленной работы нужна строка запроса.
+QUERY_STRINGS = {
+    'posts:search': 'q=кот',
+}
+
+# Адреса, которые открываются без входа: после logout
+# пользователь больше не авторизован.
+ANONYMOUS = {'users:logout'}
+
+# Порог шума: меньшие изменения не считаются регрессией.
+NOISE = {
+    'time_ms': 3.0,
+    'peak_kb': 16.0,
+}
+
+
+def url_names(namespaces=NAMESPACES):
+    """Имена всех маршрутов из urls.py приложений namespaces."""
+
+    names = []
+    for resolver in get_resolver().url_patterns:
+        if not isinstance(resolver, URLResolver):
+            continue
+        if resolver.namespace not in namespaces:
+            continue
+        for pattern in resolver.url_patterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                names.append(f'{resolver.namespace}:{pattern.name}')
+    return names
+
+
+def _route_params(name):
+    namespace, route = name.split(':')
+    for resolver in get_resolver().url_patterns:
+        if getattr(resolver, 'namespace', None) != namespace:
+            continue
+        for pattern in resolver.url_patterns:
+            if getattr(pattern, 'name', None) == route:
+                return list(pattern.pattern.converters)
+    return []
+
+
+def url_arguments():
+    """Значения параметров маршрутов на текущих данных: самая
+    большая группа, самый активный автор, самый свежий пост."""
+
+    group = Group.objects.order_by('-posts_count').first()
+    author = User.objects.order_by('-profile__posts_count').first()
+    post = Post.objects.filter(author=author).first() if author else None
+    arguments = {}
+    if group is not None:
+        arguments['slug'] = group.slug
+    if author is not None:
+        arguments['username'] = author.username
+        arguments['uidb64'] = urlsafe_base64_encode(force_bytes(author.pk))
+        arguments['token'] = default_token_generator.make_token(author)
+    if post is not None:
+        arguments['post_id'] = post.pk
+    return author, arguments
+
+
+def resolve_urls(names, arguments):
+    """Адреса для замера; маршруты без нужных данных пропускаются."""
+
+    urls = {}
+    for name in names:
+        params = _route_params(name)
+        if any(param not in arguments for param in params):
+            continue
+        url = reverse(
+            name, kwargs={param: arguments[param] for param in params}
+        )
+        if name in QUERY_STRINGS:
+            url = f'{url}?{QUERY_STRINGS[name]}'
+        urls[name] = url
+    return urls
+
+
+def _request(client, url):
+    response = client.get(url)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def measure(client, url, repeats):
+    """Запросы к БД, лучшее из repeats время и пик выделенной памяти
+    для одного адреса. Каждый замер идёт с пустым кешем; минимум
+    устойчивее к фоновому шуму, чем среднее и медиана."""
+
+    timings = []
+    for _ in range(repeats):
+        cache.clear()
+        # Журнал запросов ограничен по длине: после миграций и
+        # заполнения БД он может быть полон, и счёт по нему неверен.
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = _request(client, url)
+            timings.append(time.perf_counter() - started)
+        query_count = len(queries)
+    cache.clear()
+    tracemalloc.start()
+    try:
+        _request(client, url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'url': url,
+        'status': response.status_code,
+        'queries': query_count,
+        'time_ms': round(min(timings) * 1000, 3),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def seed(posts):
+    """Пустая БД с posts постами и соразмерными числами авторов
+    и групп."""
+
+    call_command('flush', interactive=False, verbosity=0)
+    call_command(
+        'seed',
+        '--posts', str(posts),
+        '--users', str(max(10, posts // 50)),
+        '--groups', str(max(3, posts // 500)),
+        '--seed', '1',
+        stdout=StringIO(),
+    )
+
+
+def run(sizes, repeats=5, names=None, progress=None):
+    """Замеры всех адресов на наборах данных из sizes постов."""
+
+    names = names or url_names()
+    results = {}
+    for size in sizes:
+        seed(size)
+        author, arguments = url_arguments()
+        user_client, guest_client = Client(), Client()
+        user_client.force_login(author)
+        urls = resolve_urls(names, arguments)
+        results[str(size)] = {}
+        for name, url in urls.items():
+            client = guest_client if name in ANONYMOUS else user_client
+            results[str(size)][name] = measure(client, url, repeats)
+            if progress is not None:
+                progress(size, name, results[str(size)][name])
+    return results
+
+
+# Во сколько раз рендер пагинатора на самом большом числе постов
+# может быть медленнее, чем на самом маленьком.
+PAGINATOR_SPREAD = 3
+
+PAGINATOR_POSTS = (1_000, 200_000, 10_000_000)
+
+
+def paginator_render(posts_counts=PAGINATOR_POSTS, renders=50):
+    """Число ссылок и среднее время рендера шаблона пагинатора на
+    средней странице ленты из posts_count постов. Шаблон выводит окно
+    страниц, поэтому оба значения не должны зависеть от числа постов."""
+
+    results = {}
+    for posts_count in posts_counts:
+        paginator = Paginator(range(posts_count), 10)
+        page_obj = paginator.page(paginator.num_pages // 2)
+        started = time.perf_counter()
+        for _ in range(renders):
+            html = render_to_string(
+                'posts/includes/paginator.html', {'page_obj': page_obj}
+            )
+        results[posts_count] = {
+            'links': html.count('<li'),
+            'time_ms': round(
+                (time.perf_counter() - started) / renders * 1000, 3
+            ),
+        }
+    return results
+
+
+def paginator_regressions(results):
+    """Признаки того, что рендер пагинатора растёт с числом постов."""
+
+    regressions = []
+    if len({result['links'] for result in results.values()}) > 1:
+        regressions.append('Число ссылок пагинатора зависит от числа постов')
+    timings = [result['time_ms'] for result in results.values()]
+    if max(timings) > min(timings) * PAGINATOR_SPREAD + NOISE['time_ms']:
+        regressions.append(
+            'Время рендера пагинатора растёт с числом постов: '
+            + ', '.join(
+                f'{count}: {result["time_ms"]} мс'
+                for count, result in results.items()
+            )
+        )
+    return regressions
+
+
+def compare(baseline, results, thresholds):
+    """Регрессии results относительно baseline.
+
+    thresholds задаёт допустимый относительный рост метрики
+    (0.25 - на 25 %); для числа запросов - абсолютный.
+    """
+
+    regressions = []
+    for size, urls in results.items():
+        for name, current in urls.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+            limit = previous['queries'] + thresholds['queries']
+            if current['queries'] > limit:
+                regressions.append(
+                    f'{name} [{size}]: запросов {previous["queries"]} '
+                    f'-> {current["queries"]}'
+                )
+            for metric in ('time_ms', 'peak_kb'):
+                before, after = previous[metric], current[metric]
+                if (
+                    after > before * (1 + thresholds[metric])
+                    and after - before > NOISE[metric]
+                ):
+                    regressions.append(
+                        f'{name} [{size}]: {metric} {before} -> {after}'
+                    )
+    return regressions
+
+
+def load(path):
+    with open(path, encoding='utf-8') as stream:
+        return json.load(stream)
+
+
+def save(path, results):
+    with open(path, 'w', encoding='utf-8') as stream:
+        json.dump(results, stream, ensure_ascii=False, indent=2,
+                  sort_keys=True)
+        stream.write('\n')
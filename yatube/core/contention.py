@@ -0,0 +1,162 @@
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from django.db import OperationalError, connections, transaction
+
+from .backends.pool import close_pool
+
+# Профили соединения: stock - стандартный бэкенд Django, tuned -
+# core.backends.sqlite3 с PRAGMA из settings.SQLITE_PRAGMAS.
+STOCK = {'ENGINE': 'django.db.backends.sqlite3', 'OPTIONS': {}}
+
+SCHEMA = (
+    'CREATE TABLE author (id INTEGER PRIMARY KEY, posts_count INTEGER)',
+    'CREATE TABLE post (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+    'author_id INTEGER, text TEXT, pub_date REAL)',
+    'CREATE INDEX post_pub_date ON post (pub_date)',
+)
+
+AUTHORS = 50
+
+# Пауза между операциями потока, секунды: без неё потоки Python
+# мешают друг другу на GIL сильнее, чем на блокировках SQLite.
+PAUSE = 0.001
+
+
+def tuned(settings_dict):
+    """Профиль tuned из настроек проекта."""
+
+    return {
+        'ENGINE': 'core.backends.sqlite3',
+        'OPTIONS': settings_dict['OPTIONS'],
+    }
+
+
+def _write(cursor, author_id, number):
+    # Как post_create: чтение, затем запись в одной транзакции.
+    cursor.execute(
+        'SELECT posts_count FROM author WHERE id = %s', [author_id]
+    )
+    cursor.fetchone()
+    cursor.execute(
+        'INSERT INTO post (author_id, text, pub_date) VALUES (%s, %s, %s)',
+        [author_id, f'Пост {number}', time.time()],
+    )
+    cursor.execute(
+        'UPDATE author SET posts_count = posts_count + 1 WHERE id = %s',
+        [author_id],
+    )
+
+
+def _read(cursor):
+    # Как главная страница: свежие посты с авторами и общее число.
+    cursor.execute(
+        'SELECT post.id, post.text, author.posts_count FROM post '
+        'JOIN author ON author.id = post.author_id '
+        'ORDER BY post.pub_date DESC LIMIT 10'
+    )
+    cursor.fetchall()
+    cursor.execute('SELECT COUNT(*) FROM post')
+    cursor.fetchone()
+
+
+class Run:
+    """Один прогон: читатели и писатели на отдельном файле БД."""
+
+    def __init__(self, alias, writers, readers, duration):
+        self.alias = alias
+        self.writers = writers
+        self.readers = readers
+        self.duration = duration
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.locked = defaultdict(int)
+
+    def setup(self):
+        connection = connections[self.alias]
+        with connection.cursor() as cursor:
+            for statement in SCHEMA:
+                cursor.execute(statement)
+            cursor.executemany(
+                'INSERT INTO author (id, posts_count) VALUES (%s, 0)',
+                [[number] for number in range(1, AUTHORS + 1)],
+            )
+        connection.close()
+
+    def worker(self, kind, number, deadline):
+        connection = connections[self.alias]
+        timings, locked = [], 0
+        operation = 0
+        try:
+            while time.perf_counter() < deadline:
+                operation += 1
+                started = time.perf_counter()
+                try:
+                    if kind == 'write':
+                        with transaction.atomic(using=self.alias):
+                            with connection.cursor() as cursor:
+                                _write(
+                                    cursor,
+                                    operation % AUTHORS + 1,
+                                    f'{number}-{operation}',
+                                )
+                    else:
+                        with connection.cursor() as cursor:
+                            _read(cursor)
+                except OperationalError as error:
+                    if 'locked' not in str(error):
+                        raise
+                    locked += 1
+                else:
+                    timings.append(time.perf_counter() - started)
+                time.sleep(PAUSE)
+        finally:
+            connection.close()
+        with self.lock:
+            self.timings[kind].extend(timings)
+            self.locked[kind] += locked
+
+    def __call__(self):
+        self.setup()
+        deadline = time.perf_counter() + self.duration
+        threads = [
+            threading.Thread(
+                target=self.worker, args=(kind, number, deadline)
+            )
+            for kind, count in (('write', self.writers),
+                                ('read', self.readers))
+            for number in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {
+            kind: {
+                'operations': len(self.timings[kind]),
+                'per_second': len(self.timings[kind]) / self.duration,
+                'locked': self.locked[kind],
+                'timings': sorted(self.timings[kind]),
+            }
+            for kind in ('write', 'read')
+        }
+
+
+def run(profile, base, writers=4, readers=8, duration=3.0):
+    """Прогоняет смешанную нагрузку с профилем соединения profile
+    (ENGINE и OPTIONS поверх настроек base) на временном файле БД."""
+
+    alias = f'contention_{threading.get_ident()}'
+    with tempfile.TemporaryDirectory() as directory:
+        name = os.path.join(directory, 'contention.sqlite3')
+        connections.settings[alias] = {**base, **profile, 'NAME': name}
+        try:
+            return Run(alias, writers, readers, duration)()
+        finally:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+            close_pool((alias, name))
@@ -0,0 +1,20 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers import asgi
+from django.db import close_old_connections
+
+
+class ASGIHandler(asgi.ASGIHandler):
+    """ASGIHandler, который отдаёт соединения с БД до отправки ответа.
+
+    Django закрывает соединения по request_finished, то есть после
+    того, как клиент дочитал ответ: медленный клиент держит
+    соединение из пула (DATABASE_POOL) всё время отправки. Готовый
+    ответ в БД больше не ходит, поэтому соединения потока запроса
+    возвращаются в пул сразу. Потоковые ответы читают БД во время
+    отправки, для них всё по-прежнему.
+    """
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            await sync_to_async(close_old_connections)()
+        await super().send_response(response, send)
@@ -0,0 +1,266 @@
+import logging
+import os
+import socket
+import threading
+import traceback
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+# Очередь фоновых задач в основной БД. Обработчики объявляются
+# декоратором job в модулях jobs.py приложений, задачи ставятся
+# enqueue() в транзакции запроса и выполняются воркером
+# (manage.py run_worker) в пуле потоков.
+
+logger = logging.getLogger('core.jobs')
+
+Handler = namedtuple('Handler', 'func batch max_attempts')
+
+registry = {}
+
+
+class PartialFailure(Exception):
+    """Пакетный обработчик выполнил не все задачи пачки. failed -
+    номера упавших payload в пачке и тексты ошибок; повторяются
+    только они."""
+
+    def __init__(self, failed):
+        super().__init__(f'Не выполнено задач: {len(failed)}')
+        self.failed = failed
+
+
+def job(name, batch=False, max_attempts=None):
+    """Регистрирует обработчик задач name.
+
+    Обычный обработчик получает payload одной задачи; обработчик
+    с batch=True - список payload всех однотипных задач, взятых
+    воркером за раз (не больше JOBS_BATCH_SIZE), и при ошибке
+    повторяется вся пачка, если обработчик не сообщил об упавших
+    задачах через PartialFailure. Обработчики должны быть идемпотентны:
+    задача, упавшая после частичного выполнения, повторится.
+    """
+
+    def decorator(func):
+        registry[name] = Handler(func, batch, max_attempts)
+        return func
+
+    return decorator
+
+
+def autodiscover():
+    autodiscover_modules('jobs')
+
+
+def enqueue(name, payload=None, delay=0):
+    """Ставит задачу в очередь. Внутри transaction.atomic задача
+    фиксируется вместе с данными запроса и не появится, если
+    транзакция откатится."""
+
+    if name not in registry:
+        raise LookupError(f'Обработчик задач {name!r} не объявлен')
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def release_stale():
+    """Возвращает в очередь задачи воркеров, не отчитавшихся за
+    JOBS_LOCK_TIMEOUT секунд (процесс упал или был убит)."""
+
+    deadline = timezone.now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    return Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=deadline
+    ).update(status=Job.QUEUED, locked_by='', locked_at=None)
+
+
+def claim(worker, limit):
+    """Забирает до limit задач, чей срок подошёл. BEGIN IMMEDIATE
+    (core.backends.sqlite3) сериализует воркеры на SQLite, на других
+    БД задачи пропускаются через SKIP LOCKED."""
+
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.QUEUED, run_at__lte=now)
+            .order_by('run_at', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        Job.objects.filter(id__in=ids, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+    return list(
+        Job.objects.filter(id__in=ids, locked_by=worker).order_by('id')
+    )
+
+
+def units(jobs, batch_size):
+    """Разбивает задачи на вызовы обработчиков: однотипные задачи
+    обработчика с batch=True идут одним вызовом на пачку."""
+
+    batches = {}
+    for item in jobs:
+        handler = registry.get(item.name)
+        if handler is not None and handler.batch:
+            batch = batches.setdefault(item.name, [])
+            if len(batch) == batch_size:
+                yield batch
+                batch = batches[item.name] = []
+            batch.append(item)
+        else:
+            yield [item]
+    yield from batches.values()
+
+
+def backoff(attempts):
+    """Пауза перед повтором, секунды: JOBS_RETRY_DELAY, удваиваясь
+    с каждой неудачной попыткой."""
+
+    return settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def perform(unit):
+    """Вызывает обработчик для пачки однотипных задач. Возвращает
+    для каждой задачи текст ошибки или None, если она выполнена."""
+
+    name = unit[0].name
+    try:
+        handler = registry[name]
+        if handler.batch:
+            handler.func([item.payload for item in unit])
+        else:
+            handler.func(unit[0].payload)
+    except PartialFailure as error:
+        logger.error(
+            'Задачи %s %s не выполнены', name,
+            [unit[number].id for number in error.failed],
+        )
+        return [error.failed.get(number) for number in range(len(unit))]
+    except Exception:
+        logger.exception(
+            'Задача %s %s не выполнена', name, [item.id for item in unit]
+        )
+        return [traceback.format_exc()] * len(unit)
+    return [None] * len(unit)
+
+
+def finish(batches, errors):
+    """Отмечает результаты пачек одной транзакцией: выполненные
+    задачи удаляются, упавшие возвращаются в очередь с паузой
+    backoff() или, исчерпав попытки, остаются со статусом failed.
+    Возвращает число выполненных задач."""
+
+    done = []
+    with transaction.atomic():
+        for unit, unit_errors in zip(batches, errors):
+            handler = registry.get(unit[0].name)
+            max_attempts = (
+                handler and handler.max_attempts
+                or settings.JOBS_MAX_ATTEMPTS
+            )
+            for item, error in zip(unit, unit_errors):
+                if error is None:
+                    done.append(item.id)
+                    continue
+                if item.attempts >= max_attempts:
+                    changes = {'status': Job.FAILED}
+                else:
+                    changes = {
+                        'status': Job.QUEUED,
+                        'run_at': timezone.now() + timedelta(
+                            seconds=backoff(item.attempts)
+                        ),
+                    }
+                Job.objects.filter(id=item.id).update(
+                    locked_by='', locked_at=None, last_error=error,
+                    **changes,
+                )
+        Job.objects.filter(id__in=done).delete()
+    return len(done)
+
+
+class Worker:
+    """Берёт задачи пачками и выполняет их в пуле из threads потоков.
+    С threads=1 задачи выполняются в текущем потоке - так воркер
+    работает внутри TestCase."""
+
+    def __init__(self, threads=None, batch_size=None, poll_interval=None):
+        self.threads = threads or settings.JOBS_THREADS
+        self.batch_size = batch_size or settings.JOBS_BATCH_SIZE
+        self.poll_interval = (
+            settings.JOBS_POLL_INTERVAL
+            if poll_interval is None else poll_interval
+        )
+        self.name = (
+            f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        )
+        self.stopped = threading.Event()
+
+    def perform(self, unit):
+        try:
+            return perform(unit)
+        finally:
+            # Соединение потока пула возвращается в пул соединений.
+            connections.close_all()
+
+    def run_once(self, executor=None):
+        """Один проход: забирает задачи, выполняет их и отмечает
+        результаты. Возвращает (взято, выполнено)."""
+
+        release_stale()
+        jobs = claim(self.name, self.threads * self.batch_size)
+        batches = list(units(jobs, self.batch_size))
+        if executor is None:
+            errors = list(map(perform, batches))
+        else:
+            errors = list(executor.map(self.perform, batches))
+        return len(jobs), finish(batches, errors)
+
+    def run(self, once=False):
+        """Выполняет задачи, пока не вызван stop(); с once=True -
+        пока в очереди есть задачи, срок которых подошёл."""
+
+        executor = (
+            ThreadPoolExecutor(
+                max_workers=self.threads, thread_name_prefix='job'
+            )
+            if self.threads > 1 else None
+        )
+        claimed = done = 0
+        try:
+            while not self.stopped.is_set():
+                taken, finished = self.run_once(executor)
+                claimed += taken
+                done += finished
+                if taken:
+                    continue
+                if once:
+                    break
+                self.stopped.wait(self.poll_interval)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return claimed, done
+
+    def stop(self):
+        self.stopped.set()
+
+
+def run_pending():
+    """Выполняет все задачи, срок которых подошёл, в текущем потоке."""
+
+    return Worker(threads=1).run(once=True)
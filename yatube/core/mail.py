@@ -0,0 +1,198 @@
+import base64
+import hashlib
+import logging
+import time
+import traceback
+from email.mime.base import MIMEBase
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from . import jobs
+
+# Почта вне запроса: QueuedEmailBackend ставит письма в очередь
+# core.jobs, воркер отправляет их пачками через EMAIL_DELIVERY_BACKEND
+# по одному соединению на пачку.
+
+logger = logging.getLogger('core.mail')
+
+SEND = 'core.send_mail'
+
+
+def serialize(message):
+    """Письмо в payload задачи. Вложения - только кортежи
+    (имя, содержимое, тип), как у EmailMessage.attach()."""
+
+    attachments = []
+    for attachment in message.attachments:
+        if isinstance(attachment, MIMEBase):
+            raise TypeError('Вложения MIMEBase в очередь не ставятся')
+        filename, content, mimetype = attachment
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append(
+            [filename, base64.b64encode(content).decode(), mimetype]
+        )
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': [
+            list(alternative)
+            for alternative in getattr(message, 'alternatives', [])
+        ],
+        'attachments': attachments,
+        'content_subtype': message.content_subtype,
+        'encoding': message.encoding,
+    }
+
+
+def deserialize(payload):
+    message = EmailMultiAlternatives(
+        subject=payload['subject'],
+        body=payload['body'],
+        from_email=payload['from_email'],
+        to=payload['to'],
+        cc=payload['cc'],
+        bcc=payload['bcc'],
+        reply_to=payload['reply_to'],
+        headers=payload['headers'],
+        alternatives=[tuple(item) for item in payload['alternatives']],
+    )
+    for filename, content, mimetype in payload['attachments']:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    message.content_subtype = payload['content_subtype']
+    message.encoding = payload['encoding']
+    return message
+
+
+def _rate_key(recipient):
+    period = settings.EMAIL_RATE_PERIOD
+    digest = hashlib.sha256(recipient.lower().encode()).hexdigest()[:32]
+    return f'mail-rate:{digest}:{int(time.time() // period)}'
+
+
+def reserve(recipient):
+    """Занимает место в лимите recipient: не больше EMAIL_RATE_LIMIT
+    писем за окно в EMAIL_RATE_PERIOD секунд. Возвращает ключ
+    счётчика или None, если лимит исчерпан. Счётчики в кеше,
+    поэтому у нескольких воркеров кеш должен быть общим."""
+
+    key = _rate_key(recipient)
+    cache.add(key, 0, settings.EMAIL_RATE_PERIOD)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Ключ вытеснен из кеша между add и incr.
+        return key
+    if count <= settings.EMAIL_RATE_LIMIT:
+        return key
+    release([key])
+    return None
+
+
+def release(keys):
+    """Возвращает места в лимите: письмо не было отправлено."""
+
+    for key in keys:
+        try:
+            cache.decr(key)
+        except ValueError:
+            pass
+
+
+def window_left():
+    """Секунд до начала следующего окна лимита."""
+
+    period = settings.EMAIL_RATE_PERIOD
+    return period - time.time() % period
+
+
+def split(payload):
+    """Делит письмо по лимиту: (payload для адресатов, у которых есть
+    место, payload для остальных или None, ключи занятых мест)."""
+
+    keys = []
+    allowed, deferred = dict(payload), dict(payload)
+    for field in ('to', 'cc', 'bcc'):
+        allowed[field], deferred[field] = [], []
+        for recipient in payload[field]:
+            key = reserve(recipient)
+            if key is None:
+                deferred[field].append(recipient)
+            else:
+                keys.append(key)
+                allowed[field].append(recipient)
+    if not any(deferred[field] for field in ('to', 'cc', 'bcc')):
+        deferred = None
+    return allowed, deferred, keys
+
+
+@jobs.job(SEND, batch=True)
+def send(payloads):
+    """Отправляет пачку писем через одно соединение
+    EMAIL_DELIVERY_BACKEND. Упавшие письма повторяются отдельно,
+    отправленные - нет; после ошибки соединение открывается заново.
+    Адресатам сверх лимита письмо ставится в очередь заново на начало
+    следующего окна лимита; лимит расходуют только отправленные
+    письма."""
+
+    failed = {}
+    connection = get_connection(settings.EMAIL_DELIVERY_BACKEND)
+    try:
+        for number, payload in enumerate(payloads):
+            allowed, deferred, keys = split(payload)
+            message = deserialize(allowed)
+            try:
+                if message.recipients():
+                    # Открытое соединение open() не трогает, иначе
+                    # send_messages закрыл бы его после каждого письма.
+                    connection.open()
+                    connection.send_messages([message])
+            except Exception:
+                release(keys)
+                failed[number] = traceback.format_exc()
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+                continue
+            if deferred is not None:
+                # Упавшее письмо повторится целиком, поэтому
+                # откладывается только часть уже отправленного.
+                logger.warning(
+                    'Письмо %r отложено для %s: превышен лимит',
+                    payload['subject'],
+                    ', '.join(deserialize(deferred).recipients()),
+                )
+                jobs.enqueue(SEND, deferred, delay=window_left())
+    finally:
+        connection.close()
+    if failed:
+        raise jobs.PartialFailure(failed)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Бэкенд для EMAIL_BACKEND: письма не отправляются в запросе,
+    а ставятся в очередь core.jobs и уходят из manage.py run_worker."""
+
+    def send_messages(self, email_messages):
+        sent = 0
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            try:
+                jobs.enqueue(SEND, serialize(message))
+            except Exception:
+                if not self.fail_silently:
+                    raise
+            else:
+                sent += 1
+        return sent
@@ -0,0 +1,79 @@
+import random
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core import servers
+from core.handlers import ASGIHandler
+from posts.management.commands.loadtest import Sample, percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность WSGI с синхронными view и ASGI '
+        'с асинхронными (posts.async_views) при множестве одновременных '
+        'медленных клиентов. Запросы к главной, группам, профилям и постам '
+        'идут анонимно напрямую в приложение, без сети; медленный клиент '
+        'читает каждый ответ --client-delay секунд. Данные удобно '
+        'готовить командой seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400)
+        parser.add_argument(
+            '--clients', type=int, default=100,
+            help='Одновременных клиентов',
+        )
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help='Потоков WSGI-сервера',
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=0.2,
+            help='Сколько секунд клиент читает ответ',
+        )
+        parser.add_argument('--seed', type=int)
+
+    def handle(self, *args, **options):
+        if min(options['requests'], options['clients'],
+               options['threads']) < 1:
+            raise CommandError(
+                '--requests, --clients и --threads должны быть больше 0'
+            )
+        rng = random.Random(options['seed'])
+        sample = Sample(rng)
+        pages = [reverse('posts:index')]
+        for name in ('group_posts', 'profile', 'post_detail'):
+            if sample.available(name):
+                pages.append(getattr(sample, name)()[1])
+        paths = rng.choices(pages, k=options['requests'])
+        self.stdout.write(
+            f'{"сервер":<6} {"в секунду":>10} {"p50, мс":>8} '
+            f'{"p99, мс":>8} {"max, мс":>8}  статусы'
+        )
+        with servers.async_views(False):
+            self.write_row('wsgi', servers.run_wsgi(
+                WSGIHandler(), paths, options['clients'],
+                options['threads'], options['client_delay'],
+            ))
+        with servers.async_views(True):
+            self.write_row('asgi', servers.run_asgi(
+                ASGIHandler(), paths, options['clients'],
+                options['client_delay'],
+            ))
+
+    def write_row(self, name, result):
+        timings = result['timings'] or [0]
+        columns = [
+            percentile(timings, share) * 1000 for share in (0.5, 0.99, 1)
+        ]
+        codes = ', '.join(
+            f'{code}: {count}'
+            for code, count in sorted(result['statuses'].items())
+        )
+        self.stdout.write(
+            f'{name:<6} {result["per_second"]:>10.1f} '
+            + ' '.join(f'{value:>8.1f}' for value in columns)
+            + f'  {codes}'
+        )
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+
+from core import benchmark
+
+
+def sizes(value):
+    try:
+        return [int(size) for size in value.split(',')]
+    except ValueError:
+        raise CommandError(f'Некорректные размеры {value!r}')
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет число запросов к БД, время ответа и пик выделенной '
+        'памяти для всех адресов приложений posts, users и about на '
+        'наборах данных разного размера. Работает на отдельной тестовой '
+        'БД. С --save записывает результаты как базовые, иначе сравнивает '
+        'с базовыми и завершается ошибкой при регрессии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=sizes,
+            default=settings.BENCHMARK_SIZES,
+            help='Числа постов в наборах данных через запятую',
+        )
+        parser.add_argument('--repeats', type=int, default=5)
+        parser.add_argument(
+            '--baseline', default=settings.BENCHMARK_BASELINE
+        )
+        parser.add_argument(
+            '--save', action='store_true',
+            help='Сохранить результаты как базовые',
+        )
+        parser.add_argument(
+            '--url', action='append', dest='names',
+            help='Замерить только этот маршрут, например posts:index',
+        )
+        parser.add_argument(
+            '--paginator', action='store_true',
+            help='Только проверить, что рендер пагинатора не растёт '
+                 'с числом постов',
+        )
+
+    def handle(self, *args, **options):
+        if options['paginator']:
+            return self.paginator()
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True
+        )
+        try:
+            results = benchmark.run(
+                options['sizes'],
+                repeats=options['repeats'],
+                names=options['names'],
+                progress=self.progress,
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+        if options['save']:
+            benchmark.save(options['baseline'], results)
+            self.stdout.write(self.style.SUCCESS(
+                f'Базовые результаты записаны в {options["baseline"]}'
+            ))
+            return
+        try:
+            baseline = benchmark.load(options['baseline'])
+        except FileNotFoundError:
+            raise CommandError(
+                f'Нет базовых результатов {options["baseline"]}, '
+                'запустите с --save'
+            )
+        regressions = benchmark.compare(
+            baseline, results, settings.BENCHMARK_THRESHOLDS
+        )
+        if regressions:
+            raise CommandError(
+                'Регрессии производительности:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+
+    def progress(self, size, name, result):
+        self.stdout.write(
+            f'{size:>7} {name:<32} {result["status"]:>4} '
+            f'{result["queries"]:>4} запр. {result["time_ms"]:>9.2f} мс '
+            f'{result["peak_kb"]:>9.1f} КБ'
+        )
+
+    def paginator(self):
+        results = benchmark.paginator_render()
+        for posts_count, result in results.items():
+            self.stdout.write(
+                f'{posts_count:>10} постов {result["links"]:>4} ссылок '
+                f'{result["time_ms"]:>9.3f} мс'
+            )
+        regressions = benchmark.paginator_regressions(results)
+        if regressions:
+            raise CommandError('\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
@@ -0,0 +1,91 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def read_events(paths):
+    for path in paths:
+        try:
+            stream = open(path, encoding='utf-8')
+        except FileNotFoundError:
+            raise CommandError(f'Журнал {path} не найден')
+        with stream:
+            for line in stream:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def aggregate(events, kind=None):
+    """Сводка событий журнала по (тип, view, SQL, место вызова)."""
+
+    offenders = {}
+    for event in events:
+        if kind is not None and event['type'] != kind:
+            continue
+        key = (
+            event['type'], event['view'], event['sql'],
+            event.get('template'), event.get('code'),
+        )
+        entry = offenders.setdefault(key, {
+            'type': event['type'],
+            'view': event['view'],
+            'sql': event['sql'],
+            'template': event.get('template'),
+            'code': event.get('code'),
+            'events': 0,
+            'queries': 0,
+            'duration_ms': 0.0,
+            'max_ms': 0.0,
+        })
+        entry['events'] += 1
+        entry['queries'] += event.get('count', 1)
+        entry['duration_ms'] += event['duration_ms']
+        entry['max_ms'] = max(entry['max_ms'], event['duration_ms'])
+    return sorted(
+        offenders.values(), key=lambda entry: entry['duration_ms'],
+        reverse=True,
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка журнала SQL (QUERYLOG_FILE): медленные и повторяющиеся '
+        'запросы, сгруппированные по view, тексту SQL и месту вызова, '
+        'самые затратные по суммарному времени первыми.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*', help='Файлы журнала; по умолчанию '
+                                     'QUERYLOG_FILE',
+        )
+        parser.add_argument('--type', choices=('slow', 'repeated'))
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести сводку в JSON'
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or [settings.QUERYLOG_FILE]
+        offenders = aggregate(read_events(paths), options['type'])
+        offenders = offenders[:options['top']]
+        if options['json']:
+            self.stdout.write(
+                json.dumps(offenders, ensure_ascii=False, indent=2)
+            )
+            return
+        for number, entry in enumerate(offenders, start=1):
+            self.stdout.write(
+                f'{number}. [{entry["type"]}] {entry["view"]}: '
+                f'{entry["duration_ms"]:.1f} мс всего, '
+                f'{entry["events"]} запросов страниц, '
+                f'{entry["queries"]} SQL, максимум {entry["max_ms"]:.1f} мс'
+            )
+            for field in ('template', 'code'):
+                if entry[field]:
+                    self.stdout.write(f'   {field}: {entry[field]}')
+            self.stdout.write(f'   {entry["sql"][:300]}')
+        if not offenders:
+            self.stdout.write('Записей нет')
@@ -0,0 +1,54 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из очереди core.jobs: забирает их '
+        'пачками из БД и выполняет в пуле потоков. Однотипные задачи '
+        'пакетных обработчиков идут одним вызовом, упавшие повторяются '
+        'с растущей паузой. Останавливается по SIGINT/SIGTERM после '
+        'текущей пачки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=settings.JOBS_THREADS,
+            help='Потоков пула',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.JOBS_BATCH_SIZE,
+            help='Задач в одном вызове пакетного обработчика',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help='Пауза опроса пустой очереди, секунды',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить задачи, срок которых подошёл, и выйти',
+        )
+
+    def handle(self, *args, **options):
+        if min(options['threads'], options['batch_size']) < 1:
+            raise CommandError('--threads и --batch-size должны быть больше 0')
+        worker = Worker(
+            options['threads'], options['batch_size'],
+            options['poll_interval'],
+        )
+        if not options['once']:
+            for number in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(number, lambda *args: worker.stop())
+            self.stdout.write(
+                f'Воркер {worker.name}: потоков {worker.threads}, '
+                f'пачка до {worker.batch_size} задач'
+            )
+        claimed, done = worker.run(once=options['once'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {done} из {claimed}'
+        ))
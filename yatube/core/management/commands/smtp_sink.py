@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.smtp import SMTPSink
+
+
+class Command(BaseCommand):
+    help = (
+        'Локальный SMTP-сервер, который принимает письма и печатает их '
+        'вместо отправки. Для проверки почты укажите '
+        'EMAIL_DELIVERY_BACKEND = smtp.EmailBackend, EMAIL_HOST и '
+        'EMAIL_PORT этого сервера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=1025)
+
+    def handle(self, *args, **options):
+        with SMTPSink(
+            options['host'], options['port'], on_message=self.show
+        ) as sink:
+            self.stdout.write(f'SMTP на {sink.host}:{sink.port}')
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
+
+    def show(self, envelope):
+        self.stdout.write(
+            f'{envelope.sender} -> {", ".join(envelope.recipients)}: '
+            f'{envelope.message["Subject"]}'
+        )
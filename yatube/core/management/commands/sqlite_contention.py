@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import contention
+from posts.management.commands.loadtest import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Конкурентная нагрузка на SQLite: писатели в транзакциях читают '
+        'и пишут, как post_create, читатели выбирают свежие посты, как '
+        'главная страница. Прогоняется на временном файле БД со '
+        'стандартным бэкендом (stock) и с профилем из настроек (tuned); '
+        'выводит пропускную способность, задержки и число ошибок '
+        '"database is locked".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument(
+            '--duration', type=float, default=3.0,
+            help='Длительность прогона каждого профиля, секунды',
+        )
+        parser.add_argument(
+            '--profile', choices=('stock', 'tuned'), action='append',
+            dest='profiles',
+            help='Прогнать только этот профиль',
+        )
+
+    def handle(self, *args, **options):
+        base = connections.settings['default']
+        if base['ENGINE'] not in (
+            contention.STOCK['ENGINE'], 'core.backends.sqlite3'
+        ):
+            raise CommandError('Команда работает только с SQLite')
+        if min(options['writers'] + options['readers'],
+               options['duration']) <= 0:
+            raise CommandError('Нужен хотя бы один поток и duration > 0')
+        profiles = {
+            'stock': contention.STOCK,
+            'tuned': contention.tuned(base),
+        }
+        self.stdout.write(
+            f'{"профиль":<8} {"операция":<8} {"в секунду":>10} '
+            f'{"p50, мс":>8} {"p99, мс":>8} {"max, мс":>8} {"locked":>7}'
+        )
+        for name in options['profiles'] or profiles:
+            results = contention.run(
+                profiles[name],
+                base,
+                writers=options['writers'],
+                readers=options['readers'],
+                duration=options['duration'],
+            )
+            for kind, result in results.items():
+                self.write_row(name, kind, result)
+
+    def write_row(self, name, kind, result):
+        timings = result['timings'] or [0]
+        columns = [
+            percentile(timings, share) * 1000 for share in (0.5, 0.99, 1)
+        ]
+        row = (
+            f'{name:<8} {kind:<8} {result["per_second"]:>10.1f} '
+            + ' '.join(f'{value:>8.1f}' for value in columns)
+            + f' {result["locked"]:>7}'
+        )
+        style = self.style.ERROR if result['locked'] else self.style.SUCCESS
+        self.stdout.write(style(row))
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную БД SQLite в файлы реплик из DATABASE_REPLICAS '
+        'через online backup API. Чтения с реплики до следующего запуска '
+        'отстают от основной БД - так проверяется работа роутера и '
+        'cookie, закрепляющей автора за основной БД.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'replicas', nargs='*',
+            help='Алиасы реплик; по умолчанию - все',
+        )
+
+    def handle(self, *args, **options):
+        replicas = options['replicas'] or settings.DATABASE_REPLICAS
+        if not replicas:
+            raise CommandError(
+                'Реплик нет: задайте путь к файлу в YATUBE_REPLICA_DB'
+            )
+        primary = connections[DEFAULT_DB_ALIAS]
+        for alias in replicas:
+            if alias not in settings.DATABASE_REPLICAS:
+                raise CommandError(f'{alias!r} - не реплика')
+            replica = connections[alias]
+            if {primary.vendor, replica.vendor} != {'sqlite'}:
+                raise CommandError('Команда работает только с SQLite')
+            primary.ensure_connection()
+            replica.ensure_connection()
+            started = time.perf_counter()
+            primary.connection.backup(replica.connection)
+            self.stdout.write(self.style.SUCCESS(
+                f'{alias}: скопировано за '
+                f'{time.perf_counter() - started:.2f} с'
+            ))
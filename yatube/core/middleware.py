@@ -0,0 +1,225 @@
+import cProfile
+import os
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import profiling, routers
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def view_name(view_func):
+    view = getattr(view_func, 'view_class', view_func)
+    return f'{view.__module__}.{view.__qualname__}'
+
+
+class ProfilingMiddleware:
+    """Замеры запроса: SQL, шаблоны, кеш, время view и всего запроса.
+
+    Цифры уходят в заголовок Server-Timing (PROFILING_SERVER_TIMING,
+    по умолчанию только при DEBUG)
+    и в сводку по view-функциям (core.profiling.stats). Доля
+    PROFILING_SAMPLE_RATE запросов выполняется под cProfile; дамп
+    сохраняется в PROFILING_DIR, если запрос шёл дольше
+    PROFILING_SLOW_MS. Медленные и повторяющиеся SQL-запросы пишутся
+    в журнал core.querylog. Ставится первым в MIDDLEWARE, чтобы
+    учитывать работу остальных middleware. С PROFILING_ENABLED=False
+    отключается вместе с обёртками шаблонов и кешей.
+
+    Потоковые ответы замеряются и пока клиент читает их содержимое:
+    в сводку и журнал SQL запрос попадает после отправки ответа.
+    В Server-Timing - только то, что было до начала отправки.
+
+    Работает и под ASGI; асинхронные запросы под cProfile не
+    выполняются: профилировщик видел бы все задачи цикла событий.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profiler = None
+        if random.random() < settings.PROFILING_SAMPLE_RATE:
+            profiler = cProfile.Profile()
+        with self.measure() as profile:
+            if profiler is not None:
+                profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+        return self.finish(request, response, profile, profiler)
+
+    async def __acall__(self, request):
+        with self.measure() as profile:
+            response = await self.get_response(request)
+        return self.finish(request, response, profile, None)
+
+    @contextmanager
+    def measure(self, profile=None):
+        if profile is None:
+            profile = profiling.RequestProfile()
+        token = profiling.current.set(profile)
+        try:
+            yield profile
+        finally:
+            profiling.current.reset(token)
+
+    def finish(self, request, response, profile, profiler):
+        profile.finish()
+        if settings.PROFILING_SERVER_TIMING:
+            response['Server-Timing'] = profile.server_timing()
+        if not response.streaming:
+            self.record(request, profile, profiler)
+        elif response.is_async:
+            response.streaming_content = self.astream(
+                request, response.streaming_content, profile, profiler
+            )
+        else:
+            response.streaming_content = self.stream(
+                request, response.streaming_content, profile, profiler
+            )
+        return response
+
+    def stream(self, request, content, profile, profiler):
+        """Содержимое потокового ответа под профилем запроса. Профиль
+        ставится на каждую часть отдельно: под ASGI части могут
+        читаться в другом потоке."""
+
+        try:
+            while True:
+                with self.measure(profile):
+                    chunk = next(content, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            self.record(request, profile, profiler)
+
+    async def astream(self, request, content, profile, profiler):
+        try:
+            while True:
+                with self.measure(profile):
+                    chunk = await anext(content, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            self.record(request, profile, profiler)
+
+    def record(self, request, profile, profiler):
+        profile.finish()
+        if profile.view is not None:
+            profile.view_ms = profile.total_ms - (
+                request._profile_view_started - profile.started
+            ) * 1000
+            profiling.stats.add(profile)
+        if profile.querylog is not None:
+            profile.querylog.write(request, profile.view)
+        slow = profile.total_ms >= settings.PROFILING_SLOW_MS
+        if profiler is not None and slow:
+            self.dump(profiler, profile)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = profiling.current.get()
+        if profile is not None:
+            profile.view = view_name(view_func)
+            request._profile_view_started = time.perf_counter()
+
+    def dump(self, profiler, profile):
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        filename = (
+            f'{time.strftime("%Y%m%d-%H%M%S")}-{profile.view}-'
+            f'{profile.total_ms:.0f}ms.prof'
+        )
+        profiler.dump_stats(os.path.join(settings.PROFILING_DIR, filename))
+
+
+class ReplicaMiddleware:
+    """Выбор БД для чтения: view из DATABASE_REPLICA_VIEWS читают
+    с реплик, остальные - с основной БД.
+
+    Запрос, который что-то записал в основную БД, ставит cookie
+    DATABASE_STICKY_COOKIE на DATABASE_STICKY_SECONDS секунд: пока она
+    жива, браузер читает только с основной БД и видит свои изменения,
+    даже если реплики отстают. Ставится после AuthenticationMiddleware:
+    сессия и пользователь читаются с основной БД, а запись сессии
+    не считается изменением данных.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        with self.route() as wrote:
+            response = self.get_response(request)
+        return self.stick(response, wrote)
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+        with self.route() as wrote:
+            response = await self.get_response(request)
+        return self.stick(response, wrote)
+
+    @contextmanager
+    def route(self):
+        wrote = []
+        tokens = routers.use_replica.set(False), routers.writes.set(wrote)
+        try:
+            yield wrote
+        finally:
+            routers.use_replica.reset(tokens[0])
+            routers.writes.reset(tokens[1])
+
+    def stick(self, response, wrote):
+        if wrote:
+            response.set_cookie(
+                settings.DATABASE_STICKY_COOKIE,
+                '1',
+                max_age=settings.DATABASE_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.DATABASE_REPLICAS:
+            return
+        if hasattr(request, 'user'):
+            # Сессия и пользователь загружаются лениво; до переключения
+            # на реплику они читаются с основной БД.
+            request.user.is_authenticated
+        routers.use_replica.set(self.reads_from_replica(request))
+
+    def reads_from_replica(self, request):
+        return (
+            request.method in SAFE_METHODS
+            and settings.DATABASE_STICKY_COOKIE not in request.COOKIES
+            and request.resolver_match.view_name
+            in settings.DATABASE_REPLICA_VIEWS
+        )
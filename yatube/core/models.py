@@ -0,0 +1,53 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """Фоновая задача в очереди (см. core.jobs).
+
+    Строка пишется в той же транзакции, что и данные, к которым
+    относится задача, и выполняется процессом manage.py run_worker.
+    Выполненные задачи удаляются, в очереди остаются ожидающие,
+    выполняемые и исчерпавшие попытки.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, 'в очереди'),
+        (RUNNING, 'выполняется'),
+        (FAILED, 'не выполнена'),
+    ]
+
+    name = models.CharField(verbose_name='задача', max_length=100)
+    payload = models.JSONField(verbose_name='данные', default=dict)
+    status = models.CharField(
+        verbose_name='состояние',
+        max_length=16,
+        choices=STATUSES,
+        default=QUEUED,
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='попыток',
+        default=0,
+    )
+    run_at = models.DateTimeField(
+        verbose_name='не раньше',
+        default=timezone.now,
+    )
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at', 'id'],
+                name='job_status_run_at_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.name} #{self.pk} ({self.status})'
@@ -0,0 +1,193 @@
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.base import Template
+
+from .querylog import QueryLog
+
+# Профиль текущего запроса; None вне ProfilingMiddleware.
+current = ContextVar('request_profile', default=None)
+
+_missing = object()
+
+
+class RequestProfile:
+    """Счётчики одного запроса. Время - в миллисекундах."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = None
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.view_ms = 0.0
+        self.total_ms = 0.0
+        self.querylog = QueryLog() if settings.QUERYLOG_ENABLED else None
+
+    def finish(self):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing; заголовки HTTP - latin-1,
+        поэтому описания на английском."""
+
+        return ', '.join([
+            f'db;dur={self.sql_ms:.1f};desc="{self.sql_count} queries"',
+            f'tpl;dur={self.template_ms:.1f};desc="Templates"',
+            f'cache;desc="{self.cache_hits} hits, '
+            f'{self.cache_misses} misses"',
+            f'view;dur={self.view_ms:.1f};desc="View"',
+            f'total;dur={self.total_ms:.1f};desc="Total"',
+        ])
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """execute_wrapper соединений: время и число SQL-запросов,
+    журнал медленных и повторяющихся запросов (core.querylog)."""
+
+    profile = current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        profile.sql_count += 1
+        profile.sql_ms += duration_ms
+        if profile.querylog is not None:
+            profile.querylog.record(sql, params, duration_ms)
+
+
+@receiver(connection_created)
+def watch_connection(sender, connection, **kwargs):
+    """sql_wrapper ставится на соединение навсегда: под ASGI запросы
+    асинхронного ORM идут из потоков со своими объектами соединений,
+    а профиль запроса доходит до них через ContextVar."""
+
+    if sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_wrapper)
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, context):
+        profile = current.get()
+        if profile is None or profile.template_depth:
+            return render(self, context)
+        profile.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            profile.template_depth -= 1
+            profile.template_ms += (time.perf_counter() - started) * 1000
+
+    return wrapper
+
+
+def _counted_get(get):
+    @wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        value = get(self, key, _missing, version=version)
+        profile = current.get()
+        if profile is not None:
+            if value is _missing:
+                profile.cache_misses += 1
+            else:
+                profile.cache_hits += 1
+        return default if value is _missing else value
+
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    @wraps(get_many)
+    def wrapper(self, keys, version=None):
+        keys = list(keys)
+        found = get_many(self, keys, version=version)
+        profile = current.get()
+        if profile is not None:
+            profile.cache_hits += len(found)
+            profile.cache_misses += len(keys) - len(found)
+        return found
+
+    return wrapper
+
+
+def _patch(cls, name, wrap):
+    method = getattr(cls, name)
+    if getattr(method, 'profiled', False):
+        # Уже обёрнут или унаследован от обёрнутого класса.
+        return
+    wrapper = wrap(method)
+    wrapper.profiled = True
+    setattr(cls, name, wrapper)
+
+
+def install():
+    """Подключает замеры шаблонов и кешей; вызывается один раз при
+    старте, если PROFILING_ENABLED. Вне запроса с профилем обёртки
+    только проверяют ContextVar current."""
+
+    _patch(Template, 'render', _timed_render)
+    for backend in {type(caches[alias]) for alias in caches.settings}:
+        _patch(backend, 'get', _counted_get)
+        _patch(backend, 'get_many', _counted_get_many)
+
+
+class ViewStats:
+    """Сводка по view-функциям в памяти процесса."""
+
+    FIELDS = (
+        'total_ms', 'view_ms', 'sql_count', 'sql_ms', 'template_ms',
+        'cache_hits', 'cache_misses',
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def add(self, profile):
+        with self.lock:
+            stats = self.views.setdefault(
+                profile.view,
+                {'requests': 0, 'max_ms': 0.0,
+                 **{field: 0 for field in self.FIELDS}},
+            )
+            stats['requests'] += 1
+            stats['max_ms'] = max(stats['max_ms'], profile.total_ms)
+            for field in self.FIELDS:
+                stats[field] += getattr(profile, field)
+
+    def rows(self):
+        """Средние значения по view, самые затратные первыми."""
+
+        with self.lock:
+            views = {name: dict(stats) for name, stats in self.views.items()}
+        rows = []
+        for name, stats in views.items():
+            requests = stats['requests']
+            row = {'view': name, 'requests': requests,
+                   'max_ms': stats['max_ms']}
+            for field in self.FIELDS:
+                row[field] = stats[field] / requests
+            row['spent_ms'] = stats['total_ms']
+            rows.append(row)
+        return sorted(rows, key=lambda row: row['spent_ms'], reverse=True)
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+stats = ViewStats()
@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.template.base import Node
+
+logger = logging.getLogger(__name__)
+
+# Файлы, кадры которых не считаются местом вызова запроса.
+_INSTRUMENTATION = tuple(
+    os.path.join(os.path.dirname(__file__), name)
+    for name in ('querylog.py', 'profiling.py', 'middleware.py')
+)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Одна запись лога - один JSON-объект в строке."""
+
+    def format(self, record):
+        event = getattr(record, 'event', None) or {'message': record.msg}
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class JsonLinesHandler(logging.FileHandler):
+    """FileHandler, который сам создаёт каталог для лога."""
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+def origin():
+    """Строка шаблона и место в коде проекта, откуда пришёл запрос.
+
+    Обходит стек: ближайший Node.render_annotated даёт шаблон и номер
+    строки тега, ближайший кадр из файлов проекта - место в коде.
+    """
+
+    template = code = None
+    frame = sys._getframe(1)
+    while frame is not None and (template is None or code is None):
+        filename = frame.f_code.co_filename
+        if template is None and frame.f_code is Node.render_annotated.__code__:
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            if origin is not None:
+                template = f'{origin.template_name}:{node.token.lineno}'
+        elif (
+            code is None
+            and filename.startswith(settings.BASE_DIR)
+            and not filename.startswith(_INSTRUMENTATION)
+        ):
+            path = os.path.relpath(filename, settings.BASE_DIR)
+            code = f'{path}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return {'template': template, 'code': code}
+
+
+def describe(params):
+    """Параметры запроса для журнала. Значения могут содержать ключи
+    сессий, хеши паролей и адреса почты, поэтому без
+    QUERYLOG_PARAMS пишутся только их число и типы."""
+
+    if settings.QUERYLOG_PARAMS or params is None:
+        return params
+    if isinstance(params, dict):
+        values = params.values()
+    else:
+        values = params
+    return [type(value).__name__ for value in values]
+
+
+class QueryLog:
+    """Запросы одного HTTP-запроса: медленные и повторяющиеся."""
+
+    def __init__(self):
+        self.events = []
+        self.signatures = {}
+
+    def record(self, sql, params, duration_ms):
+        if duration_ms >= settings.QUERYLOG_SLOW_MS:
+            self.events.append({
+                'type': 'slow',
+                'sql': sql,
+                'params': describe(params),
+                'duration_ms': round(duration_ms, 3),
+                **origin(),
+            })
+        entry = self.signatures.setdefault(
+            sql, {'count': 0, 'duration_ms': 0.0, 'params': {}}
+        )
+        entry['count'] += 1
+        entry['duration_ms'] += duration_ms
+        key = repr(params)
+        entry['params'][key] = entry['params'].get(key, 0) + 1
+        if entry['count'] == settings.QUERYLOG_REPEATED:
+            # Место вызова ищется один раз, на пороговом повторе.
+            entry.update(origin())
+
+    def repeated(self):
+        """SQL, выполненный в запросе не меньше QUERYLOG_REPEATED раз:
+        одинаковый текст с разными параметрами - признак N+1,
+        с одинаковыми - лишний повтор."""
+
+        for sql, entry in self.signatures.items():
+            if entry['count'] < settings.QUERYLOG_REPEATED:
+                continue
+            yield {
+                'type': 'repeated',
+                'sql': sql,
+                'count': entry['count'],
+                'identical': max(entry['params'].values()),
+                'duration_ms': round(entry['duration_ms'], 3),
+                'template': entry.get('template'),
+                'code': entry.get('code'),
+            }
+
+    def write(self, request, view):
+        now = datetime.now(timezone.utc).isoformat()
+        for event in [*self.events, *self.repeated()]:
+            logger.info(
+                '%s query in %s',
+                event['type'],
+                view,
+                extra={'event': {
+                    'time': now,
+                    'view': view,
+                    'method': request.method,
+                    'path': request.path,
+                    **event,
+                }},
+            )
@@ -0,0 +1,60 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Читает ли текущий запрос с реплики; выставляет ReplicaMiddleware.
+use_replica = ContextVar('use_replica', default=False)
+
+# Непустой список, если запрос писал в основную БД; None вне
+# ReplicaMiddleware.
+writes = ContextVar('writes', default=None)
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def is_write(sql):
+    return sql.lstrip()[:7].upper().startswith(WRITES)
+
+
+def detect_writes(execute, sql, params, many, context):
+    flags = writes.get()
+    if (
+        flags is not None
+        and not flags
+        and context['connection'].alias == DEFAULT_DB_ALIAS
+        and is_write(sql)
+    ):
+        flags.append(True)
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def watch_connection(sender, connection, **kwargs):
+    if detect_writes not in connection.execute_wrappers:
+        connection.execute_wrappers.append(detect_writes)
+
+
+class PrimaryReplicaRouter:
+    """Чтение с реплик из DATABASE_REPLICAS в запросах, которые
+    ReplicaMiddleware пометил как читающие, всё остальное - с
+    основной БД. Запись всегда идёт в основную БД, миграции тоже:
+    реплики - копии основной (manage.py sync_replica)."""
+
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and use_replica.get():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Данные на репликах и в основной БД одни и те же.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
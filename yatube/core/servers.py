@@ -0,0 +1,149 @@
+import asyncio
+import importlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from django.db import connections
+from django.test.utils import override_settings
+from django.urls import clear_url_caches
+
+
+@contextmanager
+def async_views(enabled):
+    """Маршруты posts с асинхронными view или без них: urls читают
+    POSTS_ASYNC_VIEWS при импорте, поэтому модули перезагружаются."""
+
+    def reload():
+        importlib.reload(importlib.import_module('posts.urls'))
+        importlib.reload(importlib.import_module('yatube.urls'))
+        clear_url_caches()
+
+    try:
+        with override_settings(POSTS_ASYNC_VIEWS=enabled):
+            reload()
+            yield
+    finally:
+        reload()
+
+
+def _result(timings, elapsed, statuses):
+    return {
+        'requests': len(timings),
+        'per_second': len(timings) / elapsed if elapsed else 0,
+        'timings': sorted(timings),
+        'statuses': statuses,
+    }
+
+
+def run_wsgi(application, paths, clients, threads, delay):
+    """Каждый из clients клиентов по очереди запрашивает свои paths у
+    WSGI-приложения с пулом из threads потоков, как у gunicorn с
+    gthread. Медленный клиент читает ответ delay секунд, и всё это
+    время поток сервера занят отправкой."""
+
+    lock = threading.Lock()
+    timings, statuses = [], {}
+
+    def serve(path):
+        url = urlsplit(path)
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+        }
+        setup_testing_defaults(environ)
+        status = []
+
+        def start_response(status_line, headers, exc_info=None):
+            status.append(int(status_line.split()[0]))
+
+        try:
+            response = application(environ, start_response)
+            try:
+                for _ in response:
+                    time.sleep(delay)
+            finally:
+                if hasattr(response, 'close'):
+                    response.close()
+        finally:
+            connections.close_all()
+        return status[0]
+
+    def client(executor, paths):
+        for path in paths:
+            started = time.perf_counter()
+            status = executor.submit(serve, path).result()
+            with lock:
+                timings.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        workers = [
+            threading.Thread(
+                target=client, args=(executor, paths[number::clients])
+            )
+            for number in range(clients)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    return _result(timings, time.perf_counter() - started, statuses)
+
+
+def run_asgi(application, paths, clients, delay):
+    """То же для ASGI-приложения в одном цикле событий: медленный
+    клиент задерживает только свою задачу."""
+
+    timings, statuses = [], {}
+
+    async def request(path):
+        url = urlsplit(path)
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': url.path,
+            'raw_path': url.path.encode(),
+            'query_string': url.query.encode(),
+            'root_path': '',
+            'headers': [(b'host', b'testserver')],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+        status = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            elif message['type'] == 'http.response.body':
+                await asyncio.sleep(delay)
+
+        await application(scope, receive, send)
+        return status[0]
+
+    async def client(paths):
+        for path in paths:
+            started = time.perf_counter()
+            status = await request(path)
+            timings.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    async def main():
+        await asyncio.gather(*(
+            client(paths[number::clients]) for number in range(clients)
+        ))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    return _result(timings, time.perf_counter() - started, statuses)
@@ -0,0 +1,136 @@
+import email
+import socketserver
+import threading
+from collections import namedtuple
+from email import policy
+
+# Минимальный SMTP-сервер, который принимает письма и складывает их
+# в память: замена почтового сервера в тестах и при локальной
+# разработке (manage.py smtp_sink). Поддерживает только команды,
+# нужные smtplib без TLS и авторизации.
+
+Envelope = namedtuple('Envelope', 'sender recipients message')
+
+
+def _address(argument):
+    """Адрес из 'FROM:<a@b>' или 'TO:<a@b>'."""
+
+    value = argument.partition(':')[2].strip()
+    return value.partition(' ')[0].strip('<>')
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.sink.opened()
+        self.sender, self.recipients = None, []
+        self.reply('220 smtp-sink ESMTP')
+        for raw in self.rfile:
+            command, _, argument = raw.decode(
+                'ascii', 'replace'
+            ).strip().partition(' ')
+            method = getattr(self, f'smtp_{command.upper()}', None)
+            if method is None:
+                self.reply('502 Command not implemented')
+            elif method(argument) is False:
+                break
+
+    def smtp_EHLO(self, argument):
+        self.reply('250-smtp-sink')
+        self.reply('250 8BITMIME')
+
+    def smtp_HELO(self, argument):
+        self.reply('250 OK')
+
+    smtp_NOOP = smtp_HELO
+
+    def smtp_MAIL(self, argument):
+        self.sender, self.recipients = _address(argument), []
+        self.reply('250 OK')
+
+    def smtp_RCPT(self, argument):
+        recipient = _address(argument)
+        if recipient in self.server.sink.refuse:
+            self.reply('550 Mailbox unavailable')
+        else:
+            self.recipients.append(recipient)
+            self.reply('250 OK')
+
+    def smtp_DATA(self, argument):
+        self.reply('354 End data with <CR><LF>.<CR><LF>')
+        lines = []
+        for line in self.rfile:
+            if line == b'.\r\n':
+                break
+            lines.append(line[1:] if line.startswith(b'.') else line)
+        self.server.sink.received(Envelope(
+            self.sender,
+            self.recipients,
+            email.message_from_bytes(b''.join(lines), policy=policy.default),
+        ))
+        self.smtp_RSET(argument)
+
+    def smtp_RSET(self, argument):
+        self.sender, self.recipients = None, []
+        self.reply('250 OK')
+
+    def smtp_QUIT(self, argument):
+        self.reply('221 Bye')
+        return False
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SMTPSink:
+    """SMTP-сервер в отдельном потоке. Принятые письма - в messages
+    (Envelope с разобранным email.message.EmailMessage), число
+    SMTP-соединений - в connections; адресатам из refuse сервер
+    отвечает 550. on_message вызывается для каждого принятого письма.
+
+        with SMTPSink() as sink:
+            ... EMAIL_HOST=sink.host, EMAIL_PORT=sink.port ...
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, on_message=None):
+        self.on_message = on_message
+        self.lock = threading.Lock()
+        self.messages = []
+        self.connections = 0
+        self.refuse = set()
+        self.server = _Server((host, port), _Handler)
+        self.server.sink = self
+        self.host, self.port = self.server.server_address[:2]
+        self.thread = None
+
+    def opened(self):
+        with self.lock:
+            self.connections += 1
+
+    def received(self, envelope):
+        with self.lock:
+            self.messages.append(envelope)
+        if self.on_message is not None:
+            self.on_message(envelope)
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
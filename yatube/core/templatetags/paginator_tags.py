@@ -0,0 +1,20 @@
+from django import template
+
+
+register = template.Library()
+
+PAGES_ON_EACH_SIDE = 2
+
+PAGES_ON_ENDS = 1
+
+
+@register.filter
+def page_window(page_obj):
+    """Номера страниц рядом с текущей, первая и последняя;
+    пропуски обозначены многоточием (Paginator.ELLIPSIS)."""
+
+    return page_obj.paginator.get_elided_page_range(
+        page_obj.number,
+        on_each_side=PAGES_ON_EACH_SIDE,
+        on_ends=PAGES_ON_ENDS,
+    )
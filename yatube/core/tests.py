@@ -0,0 +1,785 @@
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from io import StringIO
+
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.template import Context, Engine, Template
+from django.db import (
+    OperationalError, connection, connections, router, transaction
+)
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase,
+    override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, resolve, reverse
+from django.utils import timezone
+
+from posts.models import Post, User
+
+from . import benchmark, contention, jobs, profiling
+from .backends.pool import ConnectionPool, close_pool
+from .middleware import ReplicaMiddleware
+from .models import Job
+from .querylog import QueryLog
+from .smtp import SMTPSink
+
+THRESHOLDS = {'queries': 0, 'time_ms': 0.5, 'peak_kb': 0.25}
+
+N_PLUS_ONE = Engine(loaders=[(
+    'django.template.loaders.locmem.Loader',
+    {
+        'n_plus_one.html': (
+            '{% for post in posts %}\n'
+            '{{ post.author.username }}\n'
+            '{% endfor %}'
+        ),
+    },
+)]).get_template('n_plus_one.html')
+
+
+def n_plus_one(request):
+    posts = Post.objects.all()
+    return HttpResponse(N_PLUS_ONE.render(Context({'posts': posts})))
+
+
+urlpatterns = [
+    path('n-plus-one/', n_plus_one),
+]
+
+
+class CompareTest(SimpleTestCase):
+    baseline = {
+        '100': {
+            'posts:index': {'queries': 2, 'time_ms': 10.0, 'peak_kb': 100.0},
+        },
+    }
+
+    def results(self, **changes):
+        current = dict(self.baseline['100']['posts:index'], **changes)
+        return {'100': {'posts:index': current}}
+
+    def test_no_regression(self):
+        results = self.results(time_ms=14.0, peak_kb=120.0)
+        self.assertEqual(
+            benchmark.compare(self.baseline, results, THRESHOLDS), []
+        )
+
+    def test_regressions(self):
+        cases = {
+            'queries': self.results(queries=3),
+            'time_ms': self.results(time_ms=16.0),
+            'peak_kb': self.results(peak_kb=140.0),
+        }
+        for metric, results in cases.items():
+            with self.subTest(metric=metric):
+                regressions = benchmark.compare(
+                    self.baseline, results, THRESHOLDS
+                )
+                self.assertEqual(len(regressions), 1)
+                self.assertIn('posts:index [100]', regressions[0])
+
+    def test_noise_is_ignored(self):
+        baseline = {
+            '100': {
+                'about:tech': {'queries': 0, 'time_ms': 1.0, 'peak_kb': 1.0},
+            },
+        }
+        results = {
+            '100': {
+                'about:tech': {'queries': 0, 'time_ms': 2.5, 'peak_kb': 9.0},
+            },
+        }
+        self.assertEqual(benchmark.compare(baseline, results, THRESHOLDS), [])
+
+
+class RunTest(TransactionTestCase):
+    def test_every_url_is_measured(self):
+        names = benchmark.url_names()
+        for name in ('posts:index', 'users:login', 'about:tech'):
+            self.assertIn(name, names)
+        results = benchmark.run([30], repeats=1)
+        self.assertEqual(set(results['30']), set(names))
+        for name, result in results['30'].items():
+            with self.subTest(name=name):
+                self.assertIn(result['status'], (200, 302))
+                self.assertGreater(result['peak_kb'], 0)
+        # Страницы открываются авторизованным: сессия и пользователь.
+        self.assertEqual(results['30']['about:tech']['queries'], 2)
+        self.assertGreater(results['30']['posts:index']['queries'], 2)
+
+
+class SQLiteProfileTest(TransactionTestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self):
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        # 1 - NORMAL, 2 - MEMORY
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('temp_store'), 2)
+        self.assertEqual(self.pragma('cache_size'), -20000)
+
+    def test_atomic_begins_immediate(self):
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                Post.objects.count()
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+    def test_tuned_profile_avoids_locked_errors(self):
+        base = connections.settings['default']
+        results = contention.run(
+            contention.tuned(base), base,
+            writers=2, readers=2, duration=0.5,
+        )
+        for kind in ('write', 'read'):
+            with self.subTest(kind=kind):
+                self.assertGreater(results[kind]['operations'], 0)
+                self.assertEqual(results[kind]['locked'], 0)
+        self.assertEqual(list(connections.settings), ['default'])
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def make_pool(self, **options):
+        pool = ConnectionPool(
+            lambda conn: conn.execute('SELECT 1'), **options
+        )
+        self.addCleanup(pool.close)
+        return pool
+
+    def connect(self):
+        return sqlite3.connect(':memory:', check_same_thread=False)
+
+    def test_closed_connection_is_reused(self):
+        pool = self.make_pool()
+        conn = pool.checkout(self.connect)
+        pool.checkin(conn)
+        self.assertIs(pool.checkout(self.connect), conn)
+        metrics = pool.metrics()
+        self.assertEqual((metrics['created'], metrics['reused']), (1, 1))
+        self.assertEqual(metrics['in_use'], 1)
+
+    def test_broken_and_old_connections_are_replaced(self):
+        pool = self.make_pool(max_lifetime=3600)
+        broken = pool.checkout(self.connect)
+        pool.checkin(broken)
+        broken.close()
+        fresh = pool.checkout(self.connect)
+        self.assertIsNot(fresh, broken)
+        pool.max_lifetime = 0
+        pool.checkin(fresh)
+        self.assertIsNot(pool.checkout(self.connect), fresh)
+        metrics = pool.metrics()
+        self.assertEqual((metrics['created'], metrics['discarded']), (3, 2))
+        self.assertEqual(metrics['avg_uses'], 1)
+
+    def test_checkout_waits_for_free_connection(self):
+        pool = self.make_pool(max_size=1, timeout=5)
+        conn = pool.checkout(self.connect)
+        threading.Timer(0.05, pool.checkin, [conn]).start()
+        self.assertIs(pool.checkout(self.connect), conn)
+        metrics = pool.metrics()
+        self.assertEqual(metrics['waits'], 1)
+        self.assertGreaterEqual(metrics['max_wait_ms'], 40)
+
+    def test_checkout_timeout(self):
+        pool = self.make_pool(max_size=1, timeout=0.01)
+        pool.checkout(self.connect)
+        with self.assertRaises(OperationalError):
+            pool.checkout(self.connect)
+
+
+class PooledBackendTest(SimpleTestCase):
+    def test_django_connections_share_pool(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        name = os.path.join(directory.name, 'pool.sqlite3')
+        connections.settings['pooled'] = {
+            **connections.settings['default'], 'NAME': name,
+        }
+        self.addCleanup(connections.settings.pop, 'pooled')
+        self.addCleanup(close_pool, ('pooled', name))
+        wrapper = connections['pooled']
+        self.addCleanup(connections.__delitem__, 'pooled')
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        wrapper.close()
+        wrapper.ensure_connection()
+        self.assertIs(wrapper.connection, raw)
+        with wrapper.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+        wrapper.close()
+        metrics = wrapper.pool.metrics()
+        self.assertEqual((metrics['created'], metrics['reused']), (1, 1))
+        self.assertEqual(metrics['idle'], 1)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestUser')
+
+    def request(self, method, url, write=False, cookies=None):
+        """Проводит запрос через ReplicaMiddleware; возвращает
+        БД для чтения внутри view и ответ."""
+
+        request = getattr(RequestFactory(), method)(url)
+        request.COOKIES.update(cookies or {})
+        request.user = self.author
+        request.resolver_match = resolve(request.path)
+        used = []
+
+        def view(request):
+            middleware.process_view(request, None, (), {})
+            used.append(router.db_for_read(Post))
+            if write:
+                Post.objects.create(text='Пост', author=self.author)
+            return HttpResponse()
+
+        middleware = ReplicaMiddleware(view)
+        response = middleware(request)
+        return used[0], response
+
+    def test_read_views_use_replica(self):
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('about:tech'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                db, _ = self.request('get', url)
+                self.assertEqual(db, 'replica')
+        self.assertEqual(router.db_for_read(Post), 'default')
+
+    def test_writes_and_auth_use_primary(self):
+        urls = [
+            ('post', reverse('posts:post_create')),
+            ('get', reverse('posts:post_create')),
+            ('get', reverse('users:login')),
+            ('get', reverse('posts:feed')),
+        ]
+        for method, url in urls:
+            with self.subTest(method=method, url=url):
+                db, _ = self.request(method, url)
+                self.assertEqual(db, 'default')
+
+    def test_write_makes_browser_sticky(self):
+        cookie = settings.DATABASE_STICKY_COOKIE
+        _, response = self.request('get', reverse('posts:index'))
+        self.assertNotIn(cookie, response.cookies)
+        _, response = self.request(
+            'post', reverse('posts:post_create'), write=True
+        )
+        self.assertEqual(
+            response.cookies[cookie]['max-age'],
+            settings.DATABASE_STICKY_SECONDS,
+        )
+        db, _ = self.request(
+            'get', reverse('posts:index'), cookies={cookie: '1'}
+        )
+        self.assertEqual(db, 'default')
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+        self.assertTrue(router.allow_migrate('default', 'posts'))
+
+
+class ReplicaRoutingTest(TransactionTestCase):
+    """Запросы к реплике - второму файлу SQLite, заполненному
+    manage.py sync_replica: ленты читают с неё, после записи
+    браузер читает с основной БД."""
+
+    alias = 'replica_test'
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        directory = tempfile.mkdtemp()
+        cls.replica_name = os.path.join(directory, 'replica.sqlite3')
+        connections.settings[cls.alias] = {
+            **connections['default'].settings_dict,
+            'NAME': cls.replica_name,
+        }
+        cls.enterClassContext(
+            override_settings(DATABASE_REPLICAS=[cls.alias])
+        )
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[cls.alias].close()
+        del connections[cls.alias]
+        del connections.settings[cls.alias]
+        close_pool((cls.alias, cls.replica_name))
+        os.remove(cls.replica_name)
+        os.rmdir(os.path.dirname(cls.replica_name))
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='TestUser')
+        Post.objects.create(text='Старый пост', author=self.author)
+        call_command('sync_replica', self.alias, stdout=StringIO())
+
+    def get(self, client, url):
+        """Ответ и таблицы posts_post, прочитанные с основной БД
+        и с реплики."""
+
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(connections[self.alias]) as replica:
+                response = client.get(url)
+
+        def reads(queries):
+            return [
+                query['sql'] for query in queries
+                if 'FROM "posts_post"' in query['sql']
+            ]
+
+        return response, reads(primary), reads(replica)
+
+    def test_feed_reads_replica_until_write(self):
+        client = Client()
+        client.force_login(self.author)
+        url = reverse('posts:index')
+        response, primary, replica = self.get(client, url)
+        self.assertContains(response, 'Старый пост')
+        self.assertEqual(primary, [])
+        self.assertTrue(replica)
+
+        response = client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(settings.DATABASE_STICKY_COOKIE, response.cookies)
+
+        # Реплика ещё не получила новый пост, автор всё равно его видит.
+        response, primary, replica = self.get(client, url)
+        self.assertContains(response, 'Новый пост')
+        self.assertTrue(primary)
+        self.assertEqual(replica, [])
+
+    def test_write_views_use_primary(self):
+        client = Client()
+        client.force_login(self.author)
+        url = reverse('posts:post_edit', args=[Post.objects.get().id])
+        response, primary, replica = self.get(client, url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(primary)
+        self.assertEqual(replica, [])
+
+
+class AsgiBenchmarkTest(TransactionTestCase):
+    def test_both_servers_answer(self):
+        author = User.objects.create_user(username='TestUser')
+        Post.objects.create(text='Тестовый пост', author=author)
+        out = StringIO()
+        call_command(
+            'asgi_benchmark',
+            '--requests', '8', '--clients', '4', '--threads', '2',
+            '--client-delay', '0', '--seed', '1',
+            stdout=out,
+        )
+        rows = out.getvalue().splitlines()[1:]
+        self.assertEqual([row.split()[0] for row in rows], ['wsgi', 'asgi'])
+        for row in rows:
+            with self.subTest(row=row):
+                self.assertTrue(row.endswith('200: 8'))
+        self.assertEqual(
+            resolve('/').func.__module__, 'posts.views'
+        )
+
+
+class JobHandlersMixin:
+    """Обработчики задач tests.*, записывающие свои вызовы."""
+
+    def setUp(self):
+        self.calls = []
+        self.failures = 0
+
+        def batch(payloads):
+            self.calls.append(sorted(item['n'] for item in payloads))
+
+        def single(payload):
+            self.calls.append(payload['n'])
+
+        def flaky(payload):
+            if self.failures:
+                self.failures -= 1
+                raise ValueError('сбой')
+            self.calls.append(payload['n'])
+
+        names = {'tests.batch', 'tests.single', 'tests.flaky'}
+        jobs.job('tests.batch', batch=True)(batch)
+        jobs.job('tests.single')(single)
+        jobs.job('tests.flaky', max_attempts=2)(flaky)
+        self.addCleanup(
+            lambda: [jobs.registry.pop(name) for name in names]
+        )
+
+
+@override_settings(JOBS_RETRY_DELAY=0)
+class JobQueueTest(JobHandlersMixin, TestCase):
+    def test_unknown_job_is_rejected(self):
+        with self.assertRaises(LookupError):
+            jobs.enqueue('tests.missing')
+
+    def test_similar_jobs_run_in_batches(self):
+        for number in range(5):
+            jobs.enqueue('tests.batch', {'n': number})
+        jobs.enqueue('tests.single', {'n': 5})
+        worker = jobs.Worker(threads=1, batch_size=2)
+        self.assertEqual(worker.run(once=True), (6, 6))
+        self.assertCountEqual(self.calls, [[0, 1], [2, 3], [4], 5])
+        self.assertFalse(Job.objects.exists())
+
+    def test_rolled_back_job_is_not_queued(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                jobs.enqueue('tests.single', {'n': 1})
+                raise ValueError
+        self.assertFalse(Job.objects.exists())
+
+    def test_failed_job_is_retried(self):
+        self.failures = 1
+        jobs.enqueue('tests.flaky', {'n': 1})
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertEqual(jobs.run_pending(), (2, 1))
+        self.assertEqual(self.calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_job_fails_after_max_attempts(self):
+        self.failures = 2
+        item = jobs.enqueue('tests.flaky', {'n': 1})
+        with self.assertLogs('core.jobs', 'ERROR'):
+            jobs.run_pending()
+        item.refresh_from_db()
+        self.assertEqual(item.status, Job.FAILED)
+        self.assertEqual(item.attempts, 2)
+        self.assertIn('ValueError: сбой', item.last_error)
+
+    @override_settings(JOBS_RETRY_DELAY=60)
+    def test_retry_waits_for_backoff(self):
+        self.failures = 1
+        item = jobs.enqueue('tests.flaky', {'n': 1})
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertEqual(jobs.run_pending(), (1, 0))
+        item.refresh_from_db()
+        self.assertEqual(item.status, Job.QUEUED)
+        self.assertEqual(jobs.backoff(2), 120)
+
+    @override_settings(JOBS_LOCK_TIMEOUT=0)
+    def test_jobs_of_dead_worker_are_released(self):
+        jobs.enqueue('tests.single', {'n': 1})
+        self.assertEqual(len(jobs.claim('dead', 10)), 1)
+        self.assertEqual(jobs.claim('other', 10), [])
+        self.assertEqual(jobs.run_pending(), (1, 1))
+        self.assertEqual(self.calls, [1])
+
+
+class RunWorkerTest(JobHandlersMixin, TransactionTestCase):
+    def test_worker_runs_jobs_in_thread_pool(self):
+        for number in range(20):
+            jobs.enqueue('tests.single', {'n': number})
+        out = StringIO()
+        call_command(
+            'run_worker', '--once', '--threads', '4', '--batch-size', '3',
+            stdout=out,
+        )
+        self.assertIn('Выполнено задач: 20 из 20', out.getvalue())
+        self.assertEqual(sorted(self.calls), list(range(20)))
+        self.assertFalse(Job.objects.exists())
+
+
+class QueuedEmailTest(TestCase):
+    """core.mail.QueuedEmailBackend: письма из запроса уходят
+    в очередь и отправляются воркером на SMTPSink."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.sink = cls.enterClassContext(SMTPSink())
+
+    def setUp(self):
+        cache.clear()
+        self.sink.messages.clear()
+        self.sink.connections = 0
+        self.sink.refuse.clear()
+        self.enterContext(self.settings(
+            EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+            EMAIL_DELIVERY_BACKEND=(
+                'django.core.mail.backends.smtp.EmailBackend'
+            ),
+            EMAIL_HOST=self.sink.host,
+            EMAIL_PORT=self.sink.port,
+            JOBS_RETRY_DELAY=0,
+        ))
+
+    def delivered(self):
+        return sorted(
+            recipient
+            for envelope in self.sink.messages
+            for recipient in envelope.recipients
+        )
+
+    def test_password_reset_mail_is_sent_by_worker(self):
+        User.objects.create_user(
+            username='TestUser', email='user@example.com', password='pass'
+        )
+        response = self.client.post(
+            reverse('users:password_reset'), {'email': 'user@example.com'}
+        )
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(self.sink.messages, [])
+        self.assertEqual(Job.objects.count(), 1)
+        self.assertEqual(jobs.run_pending(), (1, 1))
+        self.assertEqual(self.delivered(), ['user@example.com'])
+
+    def test_batch_is_sent_over_one_connection(self):
+        message = mail.EmailMultiAlternatives(
+            'Тема', 'Текст', 'from@example.com', ['html@example.com']
+        )
+        message.attach_alternative('<p>Текст</p>', 'text/html')
+        message.attach('note.txt', 'Вложение', 'text/plain')
+        message.send()
+        for number in range(3):
+            mail.send_mail(
+                'Тема', 'Текст', 'from@example.com',
+                [f'user{number}@example.com'],
+            )
+        self.assertEqual(jobs.run_pending(), (4, 4))
+        self.assertEqual(self.sink.connections, 1)
+        self.assertEqual(self.delivered(), [
+            'html@example.com', 'user0@example.com', 'user1@example.com',
+            'user2@example.com',
+        ])
+        html = self.sink.messages[0].message
+        self.assertEqual(html['Subject'], 'Тема')
+        self.assertEqual(
+            html.get_body(('html',)).get_content().strip(), '<p>Текст</p>'
+        )
+        attachment = next(html.iter_attachments())
+        self.assertEqual(attachment.get_filename(), 'note.txt')
+        self.assertEqual(attachment.get_content(), 'Вложение')
+
+    @override_settings(EMAIL_RATE_LIMIT=2)
+    def test_rate_limit_defers_extra_mail(self):
+        mail.send_mail(
+            'Тема', 'Текст', 'from@example.com',
+            ['a@example.com', 'b@example.com'],
+        )
+        for _ in range(2):
+            mail.send_mail(
+                'Тема', 'Текст', 'from@example.com', ['a@example.com']
+            )
+        with self.assertLogs('core.mail', 'WARNING'):
+            self.assertEqual(jobs.run_pending(), (3, 3))
+        self.assertEqual(self.delivered(), [
+            'a@example.com', 'a@example.com', 'b@example.com',
+        ])
+        deferred = Job.objects.get()
+        self.assertEqual(deferred.payload['to'], ['a@example.com'])
+        self.assertGreater(deferred.run_at, timezone.now())
+        Job.objects.update(run_at=timezone.now())
+        cache.clear()
+        self.assertEqual(jobs.run_pending(), (1, 1))
+        self.assertEqual(len(self.sink.messages), 3)
+
+    @override_settings(EMAIL_RATE_LIMIT=1)
+    def test_failed_delivery_does_not_use_rate_limit(self):
+        self.sink.refuse.add('user@example.com')
+        mail.send_mail(
+            'Тема', 'Текст', 'from@example.com', ['user@example.com']
+        )
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertEqual(jobs.Worker(threads=1).run_once(), (1, 0))
+        self.sink.refuse.clear()
+        with self.assertNoLogs('core.mail', 'WARNING'):
+            self.assertEqual(jobs.run_pending(), (1, 1))
+        self.assertEqual(self.delivered(), ['user@example.com'])
+
+    @override_settings(JOBS_MAX_ATTEMPTS=2)
+    def test_refused_message_is_retried_alone(self):
+        self.sink.refuse.add('bad@example.com')
+        for recipient in ('one@example.com', 'bad@example.com',
+                          'two@example.com'):
+            mail.send_mail('Тема', 'Текст', 'from@example.com', [recipient])
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertEqual(jobs.run_pending(), (4, 2))
+        self.assertEqual(
+            self.delivered(), ['one@example.com', 'two@example.com']
+        )
+        failed = Job.objects.get()
+        self.assertEqual(failed.status, Job.FAILED)
+        self.assertEqual(failed.attempts, 2)
+        self.assertIn('SMTPRecipientsRefused', failed.last_error)
+
+
+class ProfilingMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestUser')
+        cls.staff = User.objects.create_user(username='Staff', is_staff=True)
+        Post.objects.create(text='Тестовый пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        profiling.stats.reset()
+
+    def timing(self, response):
+        header = response['Server-Timing']
+        return {
+            match['name']: match
+            for match in re.finditer(
+                r'(?P<name>\w+)(;dur=(?P<dur>[\d.]+))?;desc="(?P<desc>[^"]*)"',
+                header,
+            )
+        }
+
+    def test_server_timing(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('posts:index'))
+        timing = self.timing(response)
+        self.assertEqual(timing['db']['desc'], '3 queries')
+        self.assertGreater(float(timing['tpl']['dur']), 0)
+        self.assertGreaterEqual(
+            float(timing['total']['dur']), float(timing['view']['dur'])
+        )
+        self.assertRegex(timing['cache']['desc'], r'^\d+ hits, \d+ misses$')
+
+    def test_cache_hits_are_counted(self):
+        url = reverse('posts:index')
+        first = self.timing(self.client.get(url))['cache']['desc']
+        second = self.timing(self.client.get(url))['cache']['desc']
+        hits = [int(re.search(r'(\d+) hits', desc)[1])
+                for desc in (first, second)]
+        self.assertGreater(hits[1], hits[0])
+
+    @override_settings(PROFILING_SERVER_TIMING=False)
+    def test_header_can_be_disabled(self):
+        response = self.client.get(reverse('about:tech'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_wrappers_are_installed_once(self):
+        render = Template.render
+        self.assertTrue(render.profiled)
+        profiling.install()
+        self.assertIs(Template.render, render)
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_profiling_can_be_disabled(self):
+        response = self.client.get(reverse('about:tech'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(profiling.stats.rows(), [])
+
+    def test_streamed_queries_are_counted(self):
+        response = self.client.get(reverse('posts:index_rss'))
+        self.assertEqual(profiling.stats.rows(), [])
+        with CaptureQueriesContext(connection) as queries:
+            b''.join(response.streaming_content)
+        (row,) = profiling.stats.rows()
+        self.assertEqual(row['view'], 'posts.views.index_feed')
+        self.assertGreaterEqual(row['sql_count'], len(queries))
+        self.assertTrue(queries)
+
+    def test_stats_page_is_staff_only(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        url = reverse('core:profiling')
+        self.client.force_login(self.author)
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.staff)
+        response = self.client.get(url)
+        rows = {row['view']: row for row in response.context['rows']}
+        self.assertEqual(rows['posts.views.index']['requests'], 2)
+        self.assertEqual(rows['posts.views.index']['sql_count'], 3)
+        self.client.post(url)
+        self.assertEqual(
+            [row['view'] for row in profiling.stats.rows()],
+            ['core.views.profiling_stats'],
+        )
+
+    def test_slow_requests_are_dumped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(
+                PROFILING_SAMPLE_RATE=1,
+                PROFILING_SLOW_MS=0,
+                PROFILING_DIR=directory,
+            ):
+                self.client.get(reverse('about:tech'))
+            dumps = os.listdir(directory)
+        self.assertEqual(len(dumps), 1)
+        self.assertIn('AboutTechView', dumps[0])
+
+
+@override_settings(ROOT_URLCONF='core.tests', QUERYLOG_REPEATED=3)
+class QueryLogTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(4):
+            author = User.objects.create_user(username=f'user{number}')
+            Post.objects.create(text='Тестовый пост', author=author)
+
+    def events(self):
+        with self.assertLogs('core.querylog') as logs:
+            self.client.get('/n-plus-one/')
+        return [record.event for record in logs.records]
+
+    def test_n_plus_one_is_reported_with_template_line(self):
+        (event,) = self.events()
+        self.assertEqual(event['type'], 'repeated')
+        self.assertEqual(event['count'], 4)
+        self.assertEqual(event['identical'], 1)
+        self.assertEqual(event['view'], 'core.tests.n_plus_one')
+        self.assertEqual(event['template'], 'n_plus_one.html:2')
+        self.assertIn('auth_user', event['sql'])
+
+    @override_settings(QUERYLOG_SLOW_MS=0, QUERYLOG_REPEATED=100)
+    def test_slow_queries(self):
+        events = self.events()
+        self.assertEqual({event['type'] for event in events}, {'slow'})
+        self.assertEqual(len(events), 5)
+        self.assertRegex(
+            events[0]['code'], r'^core/tests.py:\d+ in n_plus_one$'
+        )
+
+    @override_settings(QUERYLOG_SLOW_MS=0)
+    def test_slow_query_params_are_redacted(self):
+        sql = 'SELECT * FROM django_session WHERE session_key = %s'
+        log = QueryLog()
+        log.record(sql, ('secret-key', 1), 1.0)
+        self.assertEqual(log.events[0]['params'], ['str', 'int'])
+        with override_settings(QUERYLOG_PARAMS=True):
+            log.record(sql, ('secret-key', 1), 1.0)
+        self.assertEqual(log.events[1]['params'], ('secret-key', 1))
+
+    @override_settings(QUERYLOG_ENABLED=False)
+    def test_can_be_disabled(self):
+        with self.assertNoLogs('core.querylog'):
+            self.client.get('/n-plus-one/')
+
+    def test_report(self):
+        events = self.events() * 3
+        handle, path = tempfile.mkstemp(suffix='.jsonl')
+        with os.fdopen(handle, 'w', encoding='utf-8') as stream:
+            for event in events:
+                stream.write(json.dumps(event, default=str) + '\n')
+        self.addCleanup(os.remove, path)
+        stdout = StringIO()
+        call_command('query_report', path, '--json', stdout=stdout)
+        (offender,) = json.loads(stdout.getvalue())
+        self.assertEqual(offender['events'], 3)
+        self.assertEqual(offender['queries'], 12)
+        self.assertEqual(offender['template'], 'n_plus_one.html:2')
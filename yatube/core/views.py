@@ -0,0 +1,22 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import redirect, render
+
+from . import profiling
+from .backends import pool
+
+
+@staff_member_required
+def profiling_stats(request):
+    """Сводка ProfilingMiddleware по view-функциям и метрики пулов
+    соединений с БД этого процесса."""
+
+    if request.method == 'POST':
+        profiling.stats.reset()
+        for connection_pool in pool.pools.values():
+            connection_pool.reset_metrics()
+        return redirect('core:profiling')
+    context = {
+        'rows': profiling.stats.rows(),
+        'pools': pool.metrics(),
+    }
+    return render(request, 'core/profiling.html', context)
@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.http import StreamingHttpResponse
 
+from . import export, search
 from .models import Post, Group
 
 
@@ -12,9 +14,37 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_filter = ('pub_date', 'group')
     list_editable = ('group',)
     empty_value_display = '-пусто-'
+    actions = ('export_jsonl', 'export_csv')
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по тексту идёт через полнотекстовый индекс постов."""
+
+        if not search.uses_fts() or not search.match_expression(search_term):
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return queryset.filter(id__in=search.matching_ids(search_term)), False
+
+    def _export(self, queryset, fmt):
+        response = StreamingHttpResponse(
+            export.export_stream(queryset, fmt, compress=True),
+            content_type='application/gzip',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{export.filename(fmt, compress=True)}"'
+        )
+        return response
+
+    @admin.action(description='Выгрузить в JSONL (gzip)')
+    def export_jsonl(self, request, queryset):
+        return self._export(queryset, 'jsonl')
+
+    @admin.action(description='Выгрузить в CSV (gzip)')
+    def export_csv(self, request, queryset):
+        return self._export(queryset, 'csv')
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -0,0 +1,194 @@
+from functools import wraps
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+
+from .models import Group, Post, User
+from .utils import CursorPaginator
+
+# Поле ответа -> поле .values(). Связанные объекты отдаются
+# ключом (username, slug), JOIN делается, только если поле запрошено.
+POST_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated_at': 'updated_at',
+    'author': 'author__username',
+    'group': 'group__slug',
+}
+
+GROUP_FIELDS = {
+    'id': 'id',
+    'slug': 'slug',
+    'title': 'title',
+    'description': 'description',
+    'posts_count': 'posts_count',
+}
+
+AUTHOR_FIELDS = {
+    'id': 'id',
+    'username': 'username',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'posts_count': 'profile__posts_count',
+}
+
+
+class ApiError(Exception):
+    pass
+
+
+def _error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def parse_fields(request, fields):
+    """Поля из ?fields=a,b; без параметра - все поля."""
+
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(fields)
+    names = list(dict.fromkeys(
+        name.strip() for name in raw.split(',') if name.strip()
+    ))
+    unknown = [name for name in names if name not in fields]
+    if unknown:
+        raise ApiError(f'Неизвестные поля: {", ".join(unknown)}')
+    return names
+
+
+def parse_ids(request):
+    """Список id из ?ids=1,2,3 или None, если параметра нет."""
+
+    raw = request.GET.get('ids')
+    if raw is None:
+        return None
+    try:
+        ids = list(dict.fromkeys(
+            int(value) for value in raw.split(',') if value.strip()
+        ))
+    except ValueError:
+        raise ApiError('ids должны быть целыми числами')
+    if len(ids) > settings.POSTS_API_MAX_IDS:
+        raise ApiError(
+            f'Не больше {settings.POSTS_API_MAX_IDS} id за один запрос'
+        )
+    return ids
+
+
+def _select(fields, names, required=('id',)):
+    """Поля для .values(): запрошенные и нужные для курсора."""
+
+    columns = [fields[name] for name in names]
+    return list(dict.fromkeys([*required, *columns]))
+
+
+def _serialize(rows, fields, names):
+    return [{name: row[fields[name]] for name in names} for row in rows]
+
+
+def _by_ids(queryset, ids, fields, names):
+    """Записи по списку id одним запросом в порядке запроса;
+    несуществующие id пропускаются."""
+
+    rows = {
+        row['id']: row
+        for row in queryset.filter(id__in=ids).values(*_select(fields, names))
+    }
+    return JsonResponse({
+        'results': _serialize(
+            [rows[pk] for pk in ids if pk in rows], fields, names
+        ),
+    })
+
+
+class ValuesCursorPaginator(CursorPaginator):
+    """Курсорная пагинация по словарям из .values()."""
+
+    def position(self, row):
+        return row['pub_date'], row['id']
+
+
+def api_view(view):
+    """GET-only view, отвечающий на ошибки JSON: ApiError - 400,
+    Http404 - 404."""
+
+    @wraps(view)
+    @require_GET
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return _error(str(error))
+        except Http404:
+            return _error('Не найдено', status=404)
+
+    return wrapper
+
+
+@api_view
+def posts(request):
+    """Посты от новых к старым, с ?group=slug и ?author=username -
+    посты группы или автора. Запросов к БД: 1, с фильтром - 2."""
+
+    names = parse_fields(request, POST_FIELDS)
+    queryset = Post.objects.all()
+    if 'group' in request.GET:
+        group = get_object_or_404(Group, slug=request.GET['group'])
+        queryset = queryset.filter(group=group)
+    if 'author' in request.GET:
+        author = get_object_or_404(User, username=request.GET['author'])
+        queryset = queryset.filter(author=author)
+    ids = parse_ids(request)
+    if ids is not None:
+        return _by_ids(queryset, ids, POST_FIELDS, names)
+    paginator = ValuesCursorPaginator(
+        queryset.values(*_select(POST_FIELDS, names, ('id', 'pub_date'))),
+        settings.POSTS_API_PAGE_SIZE,
+    )
+    page = paginator.get_cursor_page(request.GET.get('cursor'))
+    return JsonResponse({
+        'results': _serialize(page, POST_FIELDS, names),
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
+
+
+def _list_by_id(request, queryset, fields):
+    """Записи по возрастанию id; курсор - id последней записи."""
+
+    names = parse_fields(request, fields)
+    ids = parse_ids(request)
+    if ids is not None:
+        return _by_ids(queryset, ids, fields, names)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        if not cursor.isdigit():
+            raise ApiError('Некорректный курсор')
+        queryset = queryset.filter(id__gt=int(cursor))
+    limit = settings.POSTS_API_PAGE_SIZE
+    rows = list(
+        queryset.order_by('id').values(*_select(fields, names))[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return JsonResponse({
+        'results': _serialize(rows, fields, names),
+        'next': str(rows[-1]['id']) if has_more else None,
+    })
+
+
+@api_view
+def groups(request):
+    """Группы по возрастанию id. Запросов к БД: 1."""
+
+    return _list_by_id(request, Group.objects.all(), GROUP_FIELDS)
+
+
+@api_view
+def authors(request):
+    """Авторы по возрастанию id. Запросов к БД: 1."""
+
+    return _list_by_id(request, User.objects.all(), AUTHOR_FIELDS)
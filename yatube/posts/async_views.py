@@ -0,0 +1,151 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404
+from django.shortcuts import render
+from django.utils.cache import patch_vary_headers
+
+from . import counters
+from .cache import (
+    FEED, cache_page_for_anonymous, cache_tags, page_tags, post_tags
+)
+from .conditional import (
+    conditional_page, group_scope, index_scope, post_scope, profile_scope,
+    scope_object
+)
+from .models import Follow, Group, Post, User
+from .utils import apaginate
+
+# Асинхронные версии лент и страницы поста для ASGI
+# (POSTS_ASYNC_VIEWS). Данные читаются асинхронным ORM и полностью
+# выбираются до рендеринга; шаблон и контекст-процессоры работают
+# с ленивыми request.user и сессией, поэтому рендеринг идёт в потоке
+# через sync_to_async. Запросов к БД столько же, сколько в posts.views.
+
+
+def vary_on_cookie(view):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        response = await view(request, *args, **kwargs)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    return wrapper
+
+
+async def aget_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(
+            f'No {queryset.model._meta.object_name} matches the given query.'
+        )
+
+
+async def aviewer(request):
+    """Авторизованный пользователь запроса или None. Сессия и
+    пользователь загружаются в потоке, дальше request.user готов."""
+
+    def load():
+        return request.user if request.user.is_authenticated else None
+
+    return await sync_to_async(load)()
+
+
+arender = sync_to_async(render)
+
+
+@vary_on_cookie
+@cache_page_for_anonymous
+@conditional_page(index_scope)
+async def index(request):
+    """Асинхронная posts.views.index."""
+
+    post_list = Post.objects.select_related(
+        'group',
+        'author'
+    )
+    page_obj = await apaginate(
+        request, post_list, settings.POSTS_VIEWED, counters.POSTS,
+        keyset=True,
+    )
+    cache_tags(request, FEED, *page_tags(page_obj))
+    context = {
+        'page_obj': page_obj,
+    }
+    return await arender(request, 'posts/index.html', context)
+
+
+@vary_on_cookie
+@cache_page_for_anonymous
+@conditional_page(group_scope)
+async def group_posts(request, slug):
+    """Асинхронная posts.views.group_posts."""
+
+    group = scope_object(request) or await aget_object_or_404(
+        Group.objects.all(), slug=slug
+    )
+    post_list = group.posts.select_related('author')
+    page_obj = await apaginate(
+        request,
+        post_list,
+        settings.POSTS_VIEWED,
+        counters.group_key(group.id),
+    )
+    cache_tags(request, f'group:{group.id}', *page_tags(page_obj))
+    viewer = await aviewer(request)
+    context = {
+        'group': group,
+        'page_obj': page_obj,
+        'following': viewer is not None and await Follow.objects.filter(
+            user=viewer, group=group
+        ).aexists(),
+    }
+    return await arender(request, 'posts/group_list.html', context)
+
+
+@vary_on_cookie
+@cache_page_for_anonymous
+@conditional_page(profile_scope)
+async def profile(request, username):
+    """Асинхронная posts.views.profile."""
+
+    author = scope_object(request) or await aget_object_or_404(
+        User.objects.select_related('profile'),
+        username=username,
+    )
+    posts = author.posts.select_related('group')
+    page_obj = await apaginate(
+        request,
+        posts,
+        settings.POSTS_VIEWED,
+        counters.author_key(author.id),
+    )
+    cache_tags(request, f'author:{author.id}', *page_tags(page_obj))
+    viewer = await aviewer(request)
+    context = {
+        'page_obj': page_obj,
+        'author': author,
+        'following': viewer is not None and await Follow.objects.filter(
+            user=viewer, author=author
+        ).aexists(),
+    }
+    return await arender(request, 'posts/profile.html', context)
+
+
+@vary_on_cookie
+@cache_page_for_anonymous
+@conditional_page(post_scope)
+async def post_detail(request, post_id):
+    """Асинхронная posts.views.post_detail."""
+
+    post = await aget_object_or_404(
+        Post.objects.select_related('author__profile', 'group'),
+        id=post_id,
+    )
+    cache_tags(request, *post_tags(post))
+    context = {
+        'post': post,
+    }
+    return await arender(request, 'posts/post_detail.html', context)
@@ -0,0 +1,199 @@
+import hashlib
+import uuid
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+FEED = 'feed'
+
+TAG_PREFIX = 'posts:tag:'
+
+PAGE_PREFIX = 'posts:page:'
+
+# Тег, который получает новую версию при каждой инвалидации: по нему
+# видно, что за время отрисовки страницы данные успели измениться.
+WRITES = 'writes'
+
+
+def post_tags(post):
+    """Теги, от которых зависит отрисовка поста."""
+
+    tags = [f'post:{post.pk}', f'author:{post.author_id}']
+    if post.group_id is not None:
+        tags.append(f'group:{post.group_id}')
+    return tags
+
+
+def page_tags(page_obj):
+    """Теги всех постов страницы."""
+
+    return [tag for post in page_obj for tag in post_tags(post)]
+
+
+def post_render_version(post):
+    """Версия данных автора и группы поста для ключей кешей
+    его отрисовки (карточка, запись ленты RSS/Atom)."""
+
+    tags = [f'author:{post.author_id}']
+    if post.group_id is not None:
+        tags.append(f'group:{post.group_id}')
+    return '-'.join(tag_versions(tags).values())
+
+
+def tag_versions(tags):
+    """Текущие версии тегов; у новых тегов версия заводится сразу."""
+
+    keys = {tag: TAG_PREFIX + tag for tag in tags}
+    stored = cache.get_many(keys.values())
+    versions = {}
+    for tag, key in keys.items():
+        if key not in stored:
+            cache.add(key, uuid.uuid4().hex, None)
+            stored[key] = cache.get(key)
+        versions[tag] = stored[key]
+    return versions
+
+
+def invalidate(*tags):
+    """Выдаёт тегам новые версии: закешированные страницы,
+    зависящие от них, перестают считаться свежими.
+
+    Версии выдаются после фиксации текущей транзакции, иначе
+    параллельный запрос успел бы закешировать под новыми версиями
+    страницу с ещё не зафиксированными данными. Версии случайные,
+    поэтому вытеснение тега из кеша не может вернуть к жизни старую
+    страницу.
+    """
+
+    tags = {*tags, WRITES}
+    transaction.on_commit(lambda: cache.set_many(
+        {TAG_PREFIX + tag: uuid.uuid4().hex for tag in tags}, None
+    ))
+
+
+def cache_tags(request, *tags):
+    """Отмечает, от каких данных зависит ответ view-функции."""
+
+    if not hasattr(request, '_cache_tags'):
+        request._cache_tags = set()
+    request._cache_tags.update(tags)
+
+
+def page_key(request):
+    path = request.get_full_path().encode()
+    return PAGE_PREFIX + hashlib.md5(path).hexdigest()
+
+
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+
+def _cached_response(request, entry):
+    response = HttpResponse(
+        entry['content'], content_type=entry['content_type']
+    )
+    for header, value in entry['headers'].items():
+        response[header] = value
+    return get_conditional_response(
+        request,
+        etag=response.get('ETag'),
+        last_modified=parse_http_date_safe(response.get('Last-Modified')),
+        response=response,
+    )
+
+
+def _cached_page(request):
+    """Ключ страницы, ответ из кеша, если он свежий, и версия WRITES
+    до отрисовки страницы; None, если страница не кешируется."""
+
+    if (
+        not settings.POSTS_PAGE_CACHE
+        or request.method != 'GET'
+        or request.user.is_authenticated
+    ):
+        return None
+    key = page_key(request)
+    entry = cache.get(key)
+    if entry is not None:
+        if tag_versions(entry['versions']) == entry['versions']:
+            return key, _cached_response(request, entry), None
+    return key, None, tag_versions([WRITES])
+
+
+def _store_page(request, key, response, snapshot):
+    """Сохраняет страницу, если за время её отрисовки не было
+    инвалидаций: иначе она могла прочитать данные до записи,
+    а версии тегов - уже после."""
+
+    if (
+        response.status_code == 200
+        and not response.streaming
+        and tag_versions([WRITES]) == snapshot
+    ):
+        cache.set(
+            key,
+            {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'headers': {
+                    header: response[header]
+                    for header in VALIDATOR_HEADERS
+                    if response.has_header(header)
+                },
+                'versions': tag_versions(
+                    getattr(request, '_cache_tags', ())
+                ),
+            },
+            settings.POSTS_PAGE_CACHE_TIMEOUT,
+        )
+
+
+def cache_page_for_anonymous(view):
+    """Кеширует готовый HTML страницы для анонимных пользователей.
+
+    Включается настройкой POSTS_PAGE_CACHE. Страница хранится вместе
+    с версиями тегов, отмеченных view-функцией через cache_tags, и
+    отдаётся из кеша, пока ни один из тегов не инвалидирован.
+    POSTS_PAGE_CACHE_TIMEOUT лишь ограничивает время хранения.
+    ETag и Last-Modified сохраняются вместе со страницей, поэтому
+    условные запросы к закешированной странице тоже не идут в БД.
+    Асинхронная view обращается к кешу и сессии через sync_to_async.
+    """
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            cached = None
+            if settings.POSTS_PAGE_CACHE and request.method == 'GET':
+                cached = await sync_to_async(_cached_page)(request)
+            if cached is None:
+                return await view(request, *args, **kwargs)
+            key, response, snapshot = cached
+            if response is not None:
+                return response
+            response = await view(request, *args, **kwargs)
+            await sync_to_async(_store_page)(
+                request, key, response, snapshot
+            )
+            return response
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        cached = _cached_page(request)
+        if cached is None:
+            return view(request, *args, **kwargs)
+        key, response, snapshot = cached
+        if response is not None:
+            return response
+        response = view(request, *args, **kwargs)
+        _store_page(request, key, response, snapshot)
+        return response
+
+    return wrapper
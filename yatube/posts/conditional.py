@@ -0,0 +1,157 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from django.views.decorators.http import condition
+
+from . import counters
+from .models import Counter, Group, Post, User
+
+
+def index_scope(request, **kwargs):
+    return [counters.POSTS], None
+
+
+def group_scope(request, slug, **kwargs):
+    request._scope_object = group = Group.objects.filter(slug=slug).first()
+    if group is None:
+        return [], None
+    return [counters.group_key(group.id)], None
+
+
+def profile_scope(request, username, **kwargs):
+    request._scope_object = author = User.objects.select_related(
+        'profile'
+    ).filter(username=username).first()
+    if author is None:
+        return [], None
+    return [counters.author_key(author.id)], None
+
+
+def post_scope(request, post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        'updated_at', 'author_id', 'group_id'
+    ).first()
+    if post is None:
+        return [], None
+    keys = [key for key in counters.post_keys(post) if key != counters.POSTS]
+    return keys, post.updated_at
+
+
+def _scope_state(request, scope, *args, **kwargs):
+    """Число постов и время последнего изменения в области страницы.
+
+    Считается один раз на запрос: scope(request, *args, **kwargs)
+    возвращает ключи счётчиков posts.counters и, если есть,
+    собственное время изменения страницы.
+    """
+
+    if not hasattr(request, '_validator_state'):
+        keys, updated_at = scope(request, *args, **kwargs)
+        rows = list(
+            Counter.objects.filter(key__in=keys)
+            .order_by('key')
+            .values_list('value', 'updated_at')
+        )
+        updates = [changed for _, changed in rows]
+        if updated_at is not None:
+            updates.append(updated_at)
+        request._validator_state = (
+            [value for value, _ in rows],
+            max(updates) if updates else None,
+        )
+    return request._validator_state
+
+
+def scope_last_modified(request):
+    """Время изменения области страницы, если оно уже посчитано
+    для валидаторов."""
+
+    state = getattr(request, '_validator_state', None)
+    return state[1] if state else None
+
+
+def scope_object(request):
+    """Группа или автор, загруженные group_scope/profile_scope для
+    валидаторов: view не ищет их в БД второй раз. None, если объект
+    не найден или scope не вызывался."""
+
+    return getattr(request, '_scope_object', None)
+
+
+def viewer_class(request):
+    """Разметка страницы зависит от того, кто её смотрит."""
+
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return 'anonymous'
+
+
+def conditional_page(scope):
+    """ETag и Last-Modified страницы без рендеринга шаблона.
+
+    ETag учитывает время последнего изменения в области страницы,
+    число постов в ней, адрес с номером страницы и зрителя. Если
+    для области нет данных, валидаторы не выставляются.
+    """
+
+    def etag(request, *args, **kwargs):
+        values, updated_at = _scope_state(
+            request, scope, *args, **kwargs
+        )
+        if updated_at is None:
+            return None
+        raw = '|'.join([
+            updated_at.isoformat(),
+            ','.join(map(str, values)),
+            request.get_full_path(),
+            viewer_class(request),
+        ])
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        return _scope_state(request, scope, *args, **kwargs)[1]
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            return _async_condition(view, etag, last_modified)
+        return condition(etag_func=etag, last_modified_func=last_modified)(
+            view
+        )
+
+    return decorator
+
+
+def _async_condition(view, etag_func, last_modified_func):
+    """django.views.decorators.http.condition для асинхронной view:
+    в Django 4.2 он только синхронный. Валидаторы считаются одним
+    вызовом sync_to_async."""
+
+    def validators(request, *args, **kwargs):
+        updated_at = last_modified_func(request, *args, **kwargs)
+        etag = etag_func(request, *args, **kwargs)
+        return (
+            quote_etag(etag) if etag is not None else None,
+            int(updated_at.timestamp()) if updated_at else None,
+        )
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        etag, last_modified = await sync_to_async(validators)(
+            request, *args, **kwargs
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = await view(request, *args, **kwargs)
+        if request.method in ('GET', 'HEAD'):
+            if last_modified and not response.has_header('Last-Modified'):
+                response.headers['Last-Modified'] = http_date(last_modified)
+            if etag:
+                response.headers.setdefault('ETag', etag)
+        return response
+
+    return wrapper
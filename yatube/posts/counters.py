@@ -0,0 +1,177 @@
+from django.db.models import F, Func, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Counter, Group, Post, Profile, User
+
+POSTS = 'posts'
+
+
+def group_key(group_id):
+    return f'posts:group:{group_id}'
+
+
+def author_key(author_id):
+    return f'posts:author:{author_id}'
+
+
+def post_keys(post):
+    """Счётчики, в которые входит пост."""
+
+    keys = [POSTS, author_key(post.author_id)]
+    if post.group_id is not None:
+        keys.append(group_key(post.group_id))
+    return keys
+
+
+def group_author_keys(group_id):
+    """Счётчики авторов с постами в группе: название и адрес группы
+    есть и на их страницах."""
+
+    return [
+        author_key(author_id)
+        for author_id in Post.objects.filter(group_id=group_id)
+        .order_by().values_list('author_id', flat=True).distinct()
+    ]
+
+
+def author_group_keys(author_id):
+    """Счётчики групп с постами автора: его имя есть и на их
+    страницах."""
+
+    return [
+        group_key(group_id)
+        for group_id in Post.objects.filter(
+            author_id=author_id, group_id__isnull=False
+        ).order_by().values_list('group_id', flat=True).distinct()
+    ]
+
+
+def queryset_for(key):
+    """Посты, которые учитывает счётчик key."""
+
+    if key == POSTS:
+        return Post.objects.all()
+    _, kind, pk = key.split(':')
+    return Post.objects.filter(**{f'{kind}_id': pk})
+
+
+def get_count(key):
+    """Значение счётчика или None, если счётчик ещё не заведён."""
+
+    return (
+        Counter.objects.filter(key=key)
+        .values_list('value', flat=True)
+        .first()
+    )
+
+
+async def aget_count(key):
+    """get_count для асинхронных view."""
+
+    return await (
+        Counter.objects.filter(key=key)
+        .values_list('value', flat=True)
+        .afirst()
+    )
+
+
+def change(keys, delta):
+    """Сдвигает счётчики на delta после записи поста.
+
+    Недостающие счётчики заводятся по COUNT(*): изменение
+    уже в базе, поэтому подсчёт сразу даёт верное значение.
+    """
+
+    if keys and delta:
+        _update(keys, value=F('value') + delta)
+
+
+def touch(keys):
+    """Отмечает, что данные в области счётчиков изменились."""
+
+    if keys:
+        _update(keys)
+
+
+def _update(keys, **fields):
+    existing = set(
+        Counter.objects.filter(key__in=keys).values_list('key', flat=True)
+    )
+    Counter.objects.filter(key__in=existing).update(
+        updated_at=timezone.now(), **fields
+    )
+    Counter.objects.bulk_create(
+        [
+            Counter(key=key, value=queryset_for(key).count())
+            for key in keys
+            if key not in existing
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def change_author_total(author_id, delta):
+    """Сдвигает Profile.posts_count автора.
+
+    Недостающий профиль создаётся с посчитанным числом постов,
+    но только при добавлении: при удалении пользователя его посты
+    удаляются каскадом, и профиль уже может быть удалён.
+    """
+
+    updated = Profile.objects.filter(user_id=author_id).update(
+        posts_count=F('posts_count') + delta
+    )
+    if not updated and delta > 0:
+        Profile.objects.bulk_create(
+            [
+                Profile(
+                    user_id=author_id,
+                    posts_count=Post.objects.filter(
+                        author_id=author_id
+                    ).count(),
+                )
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def change_group_total(group_id, delta):
+    """Сдвигает Group.posts_count группы."""
+
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=F('posts_count') + delta
+        )
+
+
+def rebuild_totals():
+    """Пересчитывает posts_count всех групп и профилей."""
+
+    Profile.objects.bulk_create(
+        [
+            Profile(user_id=user_id)
+            for user_id in User.objects.filter(
+                profile__isnull=True
+            ).values_list('id', flat=True)
+        ],
+        ignore_conflicts=True,
+    )
+    Group.objects.update(
+        posts_count=_count_subquery(Post.objects.filter(group=OuterRef('pk')))
+    )
+    Profile.objects.update(
+        posts_count=_count_subquery(
+            Post.objects.filter(author=OuterRef('user_id'))
+        )
+    )
+
+
+def _count_subquery(queryset):
+    return Coalesce(
+        Subquery(
+            queryset.order_by()
+            .values(total=Func(F('id'), function='COUNT'))[:1]
+        ),
+        0,
+    )
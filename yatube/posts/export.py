@@ -0,0 +1,108 @@
+import csv
+import json
+import zlib
+
+from django.conf import settings
+
+# Поле выгрузки -> поле .values_list(). Формат совпадает с тем,
+# что принимает import_posts.
+FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'pub_date': 'pub_date',
+    'updated_at': 'updated_at',
+}
+
+FORMATS = ('jsonl', 'csv')
+
+
+def filter_posts(queryset, since=None, until=None, group=None, author=None):
+    """Посты за период [since, until), группы по slug, автора по
+    username; пустые фильтры не применяются."""
+
+    if since is not None:
+        queryset = queryset.filter(pub_date__gte=since)
+    if until is not None:
+        queryset = queryset.filter(pub_date__lt=until)
+    if group:
+        queryset = queryset.filter(group__slug=group)
+    if author:
+        queryset = queryset.filter(author__username=author)
+    return queryset
+
+
+def rows(queryset):
+    """Записи выгрузки одним запросом, читаемым с сервера пачками
+    по POSTS_EXPORT_CHUNK_SIZE: в памяти держится одна пачка."""
+
+    names = list(FIELDS)
+    values = queryset.order_by('id').values_list(*FIELDS.values())
+    for row in values.iterator(chunk_size=settings.POSTS_EXPORT_CHUNK_SIZE):
+        record = dict(zip(names, row))
+        record['pub_date'] = record['pub_date'].isoformat()
+        record['updated_at'] = record['updated_at'].isoformat()
+        yield record
+
+
+class _Line:
+    """Файлоподобный объект для csv.writer: возвращает строку
+    вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def render_jsonl(records):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def render_csv(records):
+    writer = csv.DictWriter(_Line(), fieldnames=list(FIELDS))
+    yield writer.writeheader()
+    for record in records:
+        yield writer.writerow(record)
+
+
+RENDERERS = {
+    'jsonl': render_jsonl,
+    'csv': render_csv,
+}
+
+
+def _blocks(lines, size):
+    block = []
+    for line in lines:
+        block.append(line)
+        if len(block) == size:
+            yield ''.join(block).encode()
+            block = []
+    if block:
+        yield ''.join(block).encode()
+
+
+def gzip_stream(blocks):
+    """Сжимает поток байтов в gzip по мере чтения."""
+
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(queryset, fmt, compress=False):
+    """Выгрузка постов в JSONL или CSV блоками байтов."""
+
+    lines = RENDERERS[fmt](rows(queryset))
+    blocks = _blocks(lines, settings.POSTS_EXPORT_CHUNK_SIZE)
+    if compress:
+        return gzip_stream(blocks)
+    return blocks
+
+
+def filename(fmt, compress=False):
+    return f'posts.{fmt}.gz' if compress else f'posts.{fmt}'
@@ -0,0 +1,160 @@
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+from .cache import post_render_version
+from .conditional import scope_last_modified
+
+CONTENT_TYPES = {
+    'rss': 'application/rss+xml; charset=utf-8',
+    'atom': 'application/atom+xml; charset=utf-8',
+}
+
+ENTRY_PREFIX = 'posts:feed-entry:'
+
+
+def _text(value):
+    return escape(str(value), {'"': '&quot;'})
+
+
+def _entry_fields(request, post):
+    return {
+        'title': _text(Truncator(post.text).chars(50)),
+        'link': _text(request.build_absolute_uri(
+            reverse('posts:post_detail', args=[post.id])
+        )),
+        'author': _text(post.author.get_full_name() or post.author.username),
+        'content': _text(linebreaks(post.text, autoescape=True)),
+    }
+
+
+def render_rss_entry(request, post):
+    fields = _entry_fields(request, post)
+    return (
+        '<item>'
+        f'<title>{fields["title"]}</title>'
+        f'<link>{fields["link"]}</link>'
+        f'<guid isPermaLink="true">{fields["link"]}</guid>'
+        f'<pubDate>{rfc2822_date(post.pub_date)}</pubDate>'
+        f'<dc:creator>{fields["author"]}</dc:creator>'
+        f'<description>{fields["content"]}</description>'
+        '</item>'
+    )
+
+
+def render_atom_entry(request, post):
+    fields = _entry_fields(request, post)
+    return (
+        '<entry>'
+        f'<title>{fields["title"]}</title>'
+        f'<link href="{fields["link"]}" rel="alternate"/>'
+        f'<id>{fields["link"]}</id>'
+        f'<published>{rfc3339_date(post.pub_date)}</published>'
+        f'<updated>{rfc3339_date(post.updated_at)}</updated>'
+        f'<author><name>{fields["author"]}</name></author>'
+        f'<content type="html">{fields["content"]}</content>'
+        '</entry>'
+    )
+
+
+RENDER_ENTRY = {
+    'rss': render_rss_entry,
+    'atom': render_atom_entry,
+}
+
+
+def _header(fmt, title, link, self_link, updated):
+    if fmt == 'rss':
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<rss version="2.0" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/"><channel>'
+            f'<title>{_text(title)}</title>'
+            f'<link>{_text(link)}</link>'
+            f'<description>{_text(title)}</description>'
+            f'<lastBuildDate>{rfc2822_date(updated)}</lastBuildDate>'
+        )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">'
+        f'<title>{_text(title)}</title>'
+        f'<link href="{_text(link)}" rel="alternate"/>'
+        f'<link href="{_text(self_link)}" rel="self"/>'
+        f'<id>{_text(link)}</id>'
+        f'<updated>{rfc3339_date(updated)}</updated>'
+    )
+
+
+FOOTERS = {
+    'rss': '</channel></rss>\n',
+    'atom': '</feed>\n',
+}
+
+
+def _entry_key(request, fmt, post):
+    return (
+        f'{ENTRY_PREFIX}{fmt}:{request.get_host()}:{post.id}:'
+        f'{post.updated_at.timestamp()}:{post_render_version(post)}'
+    )
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_entries(request, fmt, posts):
+    """Записи ленты пачками: готовые берутся из кеша одним get_many,
+    недостающие рендерятся и кладутся обратно одним set_many."""
+
+    chunk_size = settings.POSTS_FEED_CHUNK_SIZE
+    for chunk in _chunks(posts.iterator(chunk_size=chunk_size), chunk_size):
+        keys = [_entry_key(request, fmt, post) for post in chunk]
+        cached = cache.get_many(keys)
+        missing = {}
+        for key, post in zip(keys, chunk):
+            if key not in cached:
+                missing[key] = RENDER_ENTRY[fmt](request, post)
+        if missing:
+            cache.set_many(missing, settings.POSTS_FEED_ENTRY_TIMEOUT)
+            cached.update(missing)
+        yield ''.join(cached[key] for key in keys)
+
+
+def feed_response(request, fmt, posts, title, link):
+    """Потоковая лента RSS 2.0 или Atom по последним постам posts.
+
+    Посты читаются одним запросом через .iterator(), а XML отдаётся
+    по частям, не собираясь в памяти целиком.
+    """
+
+    posts = posts.select_related('author', 'group').order_by(
+        '-pub_date', '-id'
+    )[:settings.POSTS_FEED_ENTRIES]
+    updated = scope_last_modified(request) or timezone.now()
+
+    def content():
+        yield _header(
+            fmt,
+            title,
+            request.build_absolute_uri(link),
+            request.build_absolute_uri(),
+            updated,
+        )
+        yield from stream_entries(request, fmt, posts)
+        yield FOOTERS[fmt]
+
+    return StreamingHttpResponse(content(), content_type=CONTENT_TYPES[fmt])
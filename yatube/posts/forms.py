@@ -1,6 +1,6 @@
 from django import forms
 
-from .models import Post
+from .models import Group, Post, User
 
 
 class PostForm(forms.ModelForm):
@@ -11,3 +11,20 @@ class PostForm(forms.ModelForm):
             'text': 'Текст поста',
             'group': 'Группа',
         }
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(label='Поиск', max_length=200)
+    group = forms.ModelChoiceField(
+        label='Группа',
+        queryset=Group.objects.all(),
+        to_field_name='slug',
+        required=False,
+    )
+    author = forms.ModelChoiceField(
+        label='Автор',
+        queryset=User.objects.all(),
+        to_field_name='username',
+        required=False,
+        widget=forms.TextInput,
+    )
@@ -0,0 +1,14 @@
+from core.jobs import job
+
+from . import timeline
+from .models import Post
+
+
+@job('posts.fan_out', batch=True)
+def fan_out(payloads):
+    """Раскладывает новые посты по лентам подписчиков. Посты,
+    удалённые до запуска задачи, пропускаются."""
+
+    posts = Post.objects.in_bulk([payload['post'] for payload in payloads])
+    for post in posts.values():
+        timeline.fan_out(post)
@@ -0,0 +1,83 @@
+import sys
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from posts import export
+from posts.models import Post
+
+
+def parse_moment(value):
+    """Дата или дата со временем из аргумента командной строки."""
+
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'Некорректная дата {value!r}')
+        moment = datetime.combine(day, datetime.min.time())
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты с автором и группой в JSONL или CSV. Записи '
+        'читаются из БД пачками и сразу пишутся в файл, поэтому память '
+        'не растёт с числом постов. Результат подходит для import_posts.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Файл для выгрузки; по умолчанию - стандартный вывод',
+        )
+        parser.add_argument(
+            '--format', choices=export.FORMATS, default='jsonl'
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Сжать выгрузку gzip'
+        )
+        parser.add_argument(
+            '--since', type=parse_moment, help='Посты начиная с даты'
+        )
+        parser.add_argument(
+            '--until', type=parse_moment, help='Посты до даты (не включая)'
+        )
+        parser.add_argument('--group', help='slug группы')
+        parser.add_argument('--author', help='username автора')
+
+    def handle(self, *args, **options):
+        posts = export.filter_posts(
+            Post.objects.all(),
+            since=options['since'],
+            until=options['until'],
+            group=options['group'],
+            author=options['author'],
+        )
+        blocks = export.export_stream(
+            posts, options['format'], compress=options['gzip']
+        )
+        started = time.monotonic()
+        size = 0
+        if options['output'] == '-':
+            output = sys.stdout.buffer
+        else:
+            output = open(options['output'], 'wb')
+        try:
+            for block in blocks:
+                output.write(block)
+                size += len(block)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+        if options['output'] != '-':
+            self.stdout.write(self.style.SUCCESS(
+                f'Выгружено {size} байт в {options["output"]} за '
+                f'{time.monotonic() - started:.1f} с'
+            ))
@@ -0,0 +1,175 @@
+import csv
+import json
+import time
+from itertools import islice
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import cache
+from posts.models import Group, Post, User
+
+FORMATS = ('jsonl', 'csv')
+
+
+def read_jsonl(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+READERS = {
+    'jsonl': read_jsonl,
+    'csv': read_csv,
+}
+
+
+class RowError(ValueError):
+    pass
+
+
+def parse_date(value):
+    """Дата из записи файла или None, если её нет; дата без
+    часового пояса считается локальной."""
+
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise RowError(f'некорректная дата {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def insert(batch):
+    """Вставляет пачку постов с updated_at из файла. bulk_create
+    ставит полям с auto_now текущее время, а bulk_update pre_save
+    не вызывает, поэтому даты записываются вторым запросом."""
+
+    updated = [post.updated_at for post in batch]
+    Post.objects.bulk_create(batch)
+    for post, updated_at in zip(batch, updated):
+        post.updated_at = updated_at
+    Post.objects.bulk_update(batch, ['updated_at'])
+
+
+class Command(BaseCommand):
+    help = (
+        'Массово загружает посты из файла JSONL или CSV с полями text, '
+        'author (username), group (slug, необязательно), pub_date и '
+        'updated_at (ISO 8601, необязательно; без pub_date пост '
+        'датируется моментом загрузки, без updated_at - считается '
+        'неизменённым с pub_date). Посты вставляются через bulk_create '
+        'пачками, каждая пачка - в своей транзакции; сигналы не '
+        'вызываются, поэтому после загрузки пересчитываются счётчики '
+        'и сбрасываются кеши. В ленты подписок архивные посты '
+        'не раскладываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с постами')
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Формат файла; по умолчанию - по расширению',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Постов в одной пачке bulk_create',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or path.rsplit('.', 1)[-1].lower()
+        if fmt not in FORMATS:
+            raise CommandError(
+                f'Не удалось определить формат {path}, укажите --format'
+            )
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть положительным')
+        self.authors = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.skipped = 0
+        self.author_ids, self.group_ids = set(), set()
+        imported = 0
+        started = time.monotonic()
+        with open(path, encoding='utf-8', newline='') as stream:
+            posts = self.build_posts(READERS[fmt](stream))
+            while True:
+                batch = list(islice(posts, batch_size))
+                if not batch:
+                    break
+                with transaction.atomic():
+                    insert(batch)
+                imported += len(batch)
+                self.report(imported, started)
+        self.finish(imported, started)
+
+    def build_posts(self, rows):
+        """Посты из записей файла; авторы и группы ищутся в словарях,
+        загруженных один раз, а не запросом на каждую запись."""
+
+        for number, row in enumerate(rows, start=1):
+            try:
+                yield self.build_post(row)
+            except RowError as error:
+                self.skipped += 1
+                self.stderr.write(f'Запись {number} пропущена: {error}')
+
+    def build_post(self, row):
+        author_id = self.authors.get(row.get('author'))
+        if author_id is None:
+            raise RowError(f'автор {row.get("author")!r} не найден')
+        group_id = None
+        if row.get('group'):
+            group_id = self.groups.get(row['group'])
+            if group_id is None:
+                raise RowError(f'группа {row["group"]!r} не найдена')
+        if not row.get('text'):
+            raise RowError('пустой текст')
+        pub_date = parse_date(row.get('pub_date')) or timezone.now()
+        updated_at = parse_date(row.get('updated_at')) or pub_date
+        self.author_ids.add(author_id)
+        if group_id is not None:
+            self.group_ids.add(group_id)
+        return Post(
+            text=row['text'],
+            author_id=author_id,
+            group_id=group_id,
+            pub_date=pub_date,
+            updated_at=updated_at,
+        )
+
+    def report(self, imported, started):
+        elapsed = time.monotonic() - started
+        rate = imported / elapsed if elapsed else 0
+        self.stdout.write(f'Загружено {imported} постов, {rate:.0f} в секунду')
+
+    def finish(self, imported, started):
+        call_command('rebuild_counters', stdout=self.stdout)
+        cache.invalidate(
+            cache.FEED,
+            *(f'author:{author_id}' for author_id in self.author_ids),
+            *(f'group:{group_id}' for group_id in self.group_ids),
+        )
+        elapsed = time.monotonic() - started
+        rate = imported / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено постов: {imported}, пропущено записей: '
+            f'{self.skipped}, {elapsed:.1f} с, {rate:.0f} постов в секунду'
+        ))
@@ -0,0 +1,281 @@
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from io import BytesIO
+from urllib.parse import urlencode, urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+)
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.middleware.csrf import CSRF_ALLOWED_CHARS, CSRF_SECRET_LENGTH
+from django.urls import reverse
+from django.utils.crypto import get_random_string
+
+from posts.models import Group, Post, User
+
+TARGETS = (
+    'index', 'group_posts', 'profile', 'post_detail', 'post_create'
+)
+
+DEFAULT_MIX = 'index=40,group_posts=20,profile=20,post_detail=15,post_create=5'
+
+# Сколько самых популярных групп, авторов и свежих постов берётся
+# в выборку адресов: на них и приходится основной трафик.
+SAMPLE_SIZE = 1000
+
+
+def parse_mix(value):
+    """Доли запросов к страницам из строки вида index=40,profile=20."""
+
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in TARGETS:
+            raise CommandError(f'Неизвестная страница {name!r}')
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise CommandError(f'Некорректная доля {part!r}')
+    return mix
+
+
+def percentile(values, share):
+    """Перцентиль по методу ближайшего ранга; values отсортированы."""
+
+    index = max(0, min(len(values) - 1, round(share * len(values)) - 1))
+    return values[index]
+
+
+class Sample:
+    """Адреса для запросов: популярные группы и авторы, свежие посты."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.groups = list(
+            Group.objects.order_by('-posts_count').values_list(
+                'slug', flat=True
+            )[:SAMPLE_SIZE]
+        )
+        self.authors = list(
+            User.objects.filter(profile__posts_count__gt=0)
+            .order_by('-profile__posts_count')
+            .values_list('username', flat=True)[:SAMPLE_SIZE]
+        )
+        self.posts = list(
+            Post.objects.values_list('id', flat=True)[:SAMPLE_SIZE]
+        )
+
+    def index(self):
+        return 'GET', reverse('posts:index'), None
+
+    def group_posts(self):
+        slug = self.rng.choice(self.groups)
+        return 'GET', reverse('posts:group_list', args=[slug]), None
+
+    def profile(self):
+        username = self.rng.choice(self.authors)
+        return 'GET', reverse('posts:profile', args=[username]), None
+
+    def post_detail(self):
+        post_id = self.rng.choice(self.posts)
+        return 'GET', reverse('posts:post_detail', args=[post_id]), None
+
+    def post_create(self):
+        data = {'text': f'Пост из нагрузочного теста {self.rng.random()}'}
+        return 'POST', reverse('posts:post_create'), data
+
+    def available(self, name):
+        needs = {
+            'group_posts': self.groups,
+            'profile': self.authors,
+            'post_detail': self.posts,
+        }
+        return bool(needs.get(name, True))
+
+
+def login_cookies(user):
+    """Сессия и CSRF-токен пользователя без обращения к странице входа."""
+
+    session = SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    csrf = get_random_string(CSRF_SECRET_LENGTH, CSRF_ALLOWED_CHARS)
+    return {
+        settings.SESSION_COOKIE_NAME: session.session_key,
+        settings.CSRF_COOKIE_NAME: csrf,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест: гоняет запросы к главной, группам, профилям, '
+        'постам и созданию поста напрямую через WSGI-приложение '
+        'yatube.wsgi из нескольких потоков и выводит перцентили '
+        'задержек и пропускную способность. Страницы читаются анонимно, '
+        'посты создаёт один пользователь. Данные удобно готовить '
+        'командой seed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--mix',
+            type=parse_mix,
+            default=DEFAULT_MIX,
+            help=f'Доли страниц, по умолчанию {DEFAULT_MIX}',
+        )
+        parser.add_argument(
+            '--user',
+            help='Пользователь для post_create; по умолчанию - '
+                 'самый активный автор',
+        )
+        parser.add_argument('--seed', type=int)
+
+    def handle(self, *args, **options):
+        from yatube.wsgi import application
+
+        if min(options['requests'], options['concurrency']) < 1:
+            raise CommandError(
+                '--requests и --concurrency должны быть больше 0'
+            )
+        rng = random.Random(options['seed'])
+        sample = Sample(rng)
+        cookies = {}
+        mix = options['mix']
+        if mix.get('post_create'):
+            user = self.get_user(options['user'], sample)
+            if user is None:
+                mix.pop('post_create')
+            else:
+                cookies = login_cookies(user)
+        mix = {name: weight for name, weight in mix.items()
+               if weight > 0 and sample.available(name)}
+        if not mix:
+            raise CommandError('Нет данных ни для одной страницы, '
+                               'заполните БД командой seed')
+        plan = rng.choices(list(mix), weights=list(mix.values()),
+                           k=options['requests'])
+        requests = [(name, *getattr(sample, name)()) for name in plan]
+        self.results = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.lock = threading.Lock()
+        concurrency = options['concurrency']
+        workers = [
+            threading.Thread(
+                target=self.worker,
+                args=(application, requests[number::concurrency], cookies),
+            )
+            for number in range(concurrency)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.summary(time.perf_counter() - started)
+
+    def get_user(self, username, sample):
+        if username:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f'Пользователь {username!r} не найден')
+            return user
+        if sample.authors:
+            return User.objects.get(username=sample.authors[0])
+        return User.objects.first()
+
+    def worker(self, application, requests, cookies):
+        results = defaultdict(list)
+        statuses = defaultdict(Counter)
+        try:
+            for name, method, path, data in requests:
+                started = time.perf_counter()
+                status = self.call(application, method, path, data, cookies)
+                results[name].append(time.perf_counter() - started)
+                statuses[name][status] += 1
+        finally:
+            connections.close_all()
+        with self.lock:
+            for name, timings in results.items():
+                self.results[name].extend(timings)
+                self.statuses[name].update(statuses[name])
+
+    def call(self, application, method, path, data, cookies):
+        url = urlsplit(path)
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+        }
+        if method == 'POST':
+            body = urlencode({
+                **data,
+                'csrfmiddlewaretoken': cookies[settings.CSRF_COOKIE_NAME],
+            }).encode()
+            environ.update({
+                'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+                'CONTENT_LENGTH': str(len(body)),
+                'wsgi.input': BytesIO(body),
+                'HTTP_COOKIE': '; '.join(
+                    f'{key}={value}' for key, value in cookies.items()
+                ),
+            })
+        setup_testing_defaults(environ)
+        status = []
+
+        def start_response(status_line, headers, exc_info=None):
+            status.append(int(status_line.split()[0]))
+
+        response = application(environ, start_response)
+        try:
+            for _ in response:
+                pass
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+        return status[0]
+
+    def summary(self, elapsed):
+        total = sum(len(timings) for timings in self.results.values())
+        self.stdout.write(
+            f'{"страница":<12} {"запросов":>8} {"p50, мс":>8} '
+            f'{"p90, мс":>8} {"p99, мс":>8} {"max, мс":>8}  статусы'
+        )
+        everything = []
+        for name in TARGETS:
+            timings = sorted(self.results.get(name, ()))
+            if not timings:
+                continue
+            everything.extend(timings)
+            self.write_row(name, timings, self.statuses[name])
+        everything.sort()
+        self.write_row(
+            'всего', everything, sum(self.statuses.values(), Counter())
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} запросов за {elapsed:.2f} с, '
+            f'{total / elapsed:.1f} запросов в секунду'
+        ))
+
+    def write_row(self, name, timings, statuses):
+        codes = ', '.join(
+            f'{code}: {count}' for code, count in sorted(statuses.items())
+        )
+        columns = [
+            percentile(timings, share) * 1000
+            for share in (0.5, 0.9, 0.99, 1)
+        ]
+        self.stdout.write(
+            f'{name:<12} {len(timings):>8} '
+            + ' '.join(f'{value:>8.1f}' for value in columns)
+            + f'  {codes}'
+        )
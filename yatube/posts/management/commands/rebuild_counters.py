@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from posts import counters
+from posts.models import Counter, Group, Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчики постов: общий, по группам и по авторам, '
+        'а также Group.posts_count и Profile.posts_count.'
+    )
+
+    def handle(self, *args, **options):
+        values = {counters.POSTS: Post.objects.count()}
+        by_group = Group.objects.annotate(
+            total=Count('posts')
+        ).values_list('id', 'total')
+        for group_id, total in by_group:
+            values[counters.group_key(group_id)] = total
+        by_author = User.objects.annotate(
+            total=Count('posts')
+        ).values_list('id', 'total')
+        for author_id, total in by_author:
+            values[counters.author_key(author_id)] = total
+        with transaction.atomic():
+            Counter.objects.all().delete()
+            Counter.objects.bulk_create(
+                Counter(key=key, value=value) for key, value in values.items()
+            )
+            counters.rebuild_totals()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано счётчиков: {len(values)}')
+        )
@@ -0,0 +1,190 @@
+import random
+import time
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from posts.models import Group, Post, Profile, User
+
+WORDS = (
+    'кот собака погода город утро вечер музыка книга фильм дорога море '
+    'лес работа отпуск поезд кофе чай дождь снег солнце друг семья '
+    'новость проект код тест релиз сервер ошибка идея фото путешествие'
+).split()
+
+
+def zipf_weights(size, exponent):
+    """Накопленные веса распределения Ципфа для рангов 1..size:
+    вес ранга k пропорционален 1 / k ** exponent."""
+
+    ranks = range(1, size + 1)
+    return list(accumulate(1 / rank ** exponent for rank in ranks))
+
+
+def random_text(rng):
+    words = rng.choices(WORDS, k=rng.randint(5, 60))
+    return ' '.join(words).capitalize() + '.'
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет БД синтетическими пользователями, группами и постами '
+        'для нагрузочного тестирования. Авторы и размеры групп '
+        'распределены по закону Ципфа: немногие авторы пишут большую '
+        'часть постов. Данные вставляются через bulk_create пачками, '
+        'после чего пересчитываются счётчики и очищается кеш.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа для авторов и групп',
+        )
+        parser.add_argument(
+            '--no-group-share',
+            type=float,
+            default=0.3,
+            help='Доля постов без группы',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='За сколько последних дней распределяются даты постов',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--prefix', default='seed', help='Префикс имён и slug-ов'
+        )
+        parser.add_argument(
+            '--seed', type=int, help='Зерно генератора для повторяемости'
+        )
+
+    def handle(self, *args, **options):
+        if min(options['users'], options['batch_size']) < 1:
+            raise CommandError('--users и --batch-size должны быть больше 0')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.started = time.monotonic()
+        author_ids = self.create_users(options['users'])
+        group_ids = self.create_groups(options['groups'])
+        self.create_posts(options, author_ids, group_ids)
+        call_command('rebuild_counters', stdout=self.stdout)
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.monotonic() - self.started:.1f} с'
+        ))
+
+    def bulk(self, model, objects, **kwargs):
+        """bulk_create пачками по batch_size, каждая в своей транзакции."""
+
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                with transaction.atomic():
+                    model.objects.bulk_create(batch, **kwargs)
+                batch = []
+        if batch:
+            with transaction.atomic():
+                model.objects.bulk_create(batch, **kwargs)
+
+    def create_users(self, count):
+        start = User.objects.filter(
+            username__startswith=f'{self.prefix}-user-'
+        ).count()
+        last_id = User.objects.aggregate(last=Max('id'))['last'] or 0
+        # Хешировать пароль для каждого пользователя слишком долго:
+        # у всех один и тот же непригодный для входа пароль.
+        password = make_password(None)
+        self.bulk(
+            User,
+            (
+                User(
+                    username=f'{self.prefix}-user-{number}',
+                    password=password,
+                )
+                for number in range(start, start + count)
+            ),
+        )
+        ids = list(
+            User.objects.filter(
+                id__gt=last_id, username__startswith=f'{self.prefix}-user-'
+            ).values_list('id', flat=True)
+        )
+        self.bulk(
+            Profile,
+            (Profile(user_id=user_id) for user_id in ids),
+            ignore_conflicts=True,
+        )
+        self.report(f'Пользователей: {len(ids)}')
+        # Ранг в распределении Ципфа не должен совпадать с порядком id.
+        self.rng.shuffle(ids)
+        return ids
+
+    def create_groups(self, count):
+        start = Group.objects.filter(
+            slug__startswith=f'{self.prefix}-group-'
+        ).count()
+        last_id = Group.objects.aggregate(last=Max('id'))['last'] or 0
+        self.bulk(Group, (
+            Group(
+                title=f'Группа {number}',
+                slug=f'{self.prefix}-group-{number}',
+                description=random_text(self.rng),
+            )
+            for number in range(start, start + count)
+        ))
+        ids = list(
+            Group.objects.filter(
+                id__gt=last_id, slug__startswith=f'{self.prefix}-group-'
+            ).values_list('id', flat=True)
+        )
+        self.report(f'Групп: {len(ids)}')
+        self.rng.shuffle(ids)
+        return ids
+
+    def create_posts(self, options, author_ids, group_ids):
+        exponent = options['zipf']
+        author_weights = zipf_weights(len(author_ids), exponent)
+        group_weights = zipf_weights(len(group_ids), exponent)
+        no_group_share = options['no_group_share'] if group_ids else 1
+        now = timezone.now()
+        span = timedelta(days=options['days']).total_seconds()
+
+        def posts():
+            for _ in range(options['posts']):
+                group_id = None
+                if self.rng.random() >= no_group_share:
+                    group_id = self.rng.choices(
+                        group_ids, cum_weights=group_weights
+                    )[0]
+                yield Post(
+                    text=random_text(self.rng),
+                    author_id=self.rng.choices(
+                        author_ids, cum_weights=author_weights
+                    )[0],
+                    group_id=group_id,
+                    pub_date=now - timedelta(seconds=self.rng.random() * span),
+                )
+
+        self.bulk(Post, posts())
+        self.report(f'Постов: {options["posts"]}')
+
+    def report(self, message):
+        self.stdout.write(
+            f'{message}, прошло {time.monotonic() - self.started:.1f} с'
+        )
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.24 on 2026-10-18 04:10
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_posts_count(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    Profile = apps.get_model('posts', 'Profile')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    by_group = Post.objects.filter(group__isnull=False).values(
+        'group_id'
+    ).annotate(total=Count('id')).order_by()
+    for row in by_group:
+        Group.objects.filter(pk=row['group_id']).update(
+            posts_count=row['total']
+        )
+    by_author = dict(
+        Post.objects.values_list('author_id').annotate(
+            total=Count('id')
+        ).order_by()
+    )
+    Profile.objects.bulk_create(
+        Profile(user_id=user_id, posts_count=by_author.get(user_id, 0))
+        for user_id in User.objects.values_list('id', flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0005_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='число постов'),
+        ),
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='число постов')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to=settings.AUTH_USER_MODEL, verbose_name='пользователь')),
+            ],
+        ),
+        migrations.RunPython(fill_posts_count, migrations.RunPython.noop),
+    ]
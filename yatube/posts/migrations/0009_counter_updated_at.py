@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-18 04:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='counter',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
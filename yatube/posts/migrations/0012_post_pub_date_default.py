@@ -0,0 +1,34 @@
+# Generated by Django 4.2.24 on 2026-10-18 04:22
+
+from importlib import import_module
+
+from django.db import migrations, models
+import django.utils.timezone
+
+post_fts = import_module('posts.migrations.0010_post_fts')
+
+
+def create_fts_triggers(apps, schema_editor):
+    """SQLite пересоздаёт posts_post при AlterField, и триггеры
+    полнотекстового индекса пропадают вместе со старой таблицей."""
+
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in post_fts.TRIGGERS_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_follow_timeline'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, create_fts_triggers),
+        migrations.AlterField(
+            model_name='post',
+            name='pub_date',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='дата публикации'),
+        ),
+        migrations.RunPython(create_fts_triggers, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils import timezone
 from django.conf import settings
 
 
@@ -10,6 +11,11 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        verbose_name='число постов',
+        default=0,
+        editable=False,
+    )
 
     def __str__(self) -> str:
         return self.title
@@ -22,7 +28,12 @@ class Post(models.Model):
     )
     pub_date = models.DateTimeField(
         verbose_name='дата публикации',
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='дата изменения',
+        auto_now=True,
     )
     author = models.ForeignKey(
         User,
@@ -41,7 +52,138 @@ class Post(models.Model):
     )
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.text[:settings.POST_CHARS_VIEWED]
+
+
+class Profile(models.Model):
+    """Денормализованные данные пользователя."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='пользователь',
+        related_name='profile',
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='число постов',
+        default=0,
+        editable=False,
+    )
+
+    def __str__(self) -> str:
+        return self.user.username
+
+
+class Counter(models.Model):
+    """Поддерживаемый сигналами счётчик постов (см. posts.counters).
+
+    updated_at - время последнего изменения данных в области
+    счётчика, по нему строятся ETag и Last-Modified лент.
+    """
+
+    key = models.CharField(max_length=64, unique=True)
+    value = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f'{self.key}: {self.value}'
+
+
+class Follow(models.Model):
+    """Подписка пользователя на автора или на группу."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='подписчик',
+        related_name='follower',
+    )
+    author = models.ForeignKey(
+        User,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        verbose_name='автор',
+        related_name='following',
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        verbose_name='группа',
+        related_name='followers',
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_author_follow',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'group'],
+                name='unique_group_follow',
+            ),
+            models.CheckConstraint(
+                check=(
+                    models.Q(author__isnull=False, group__isnull=True)
+                    | models.Q(author__isnull=True, group__isnull=False)
+                ),
+                name='follow_author_or_group',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.user} -> {self.author or self.group}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в ленте подписок пользователя (fan-out on write).
+
+    pub_date копируется из поста, чтобы лента листалась
+    по индексу (user, pub_date, post) без соединения с постами.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx',
+            ),
+        ]
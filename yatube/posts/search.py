@@ -0,0 +1,92 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+
+WORD = re.compile(r'\w+')
+
+
+def match_expression(query):
+    """Запрос FTS5: все слова запроса как префиксы, через AND.
+
+    Слова берутся в кавычки, поэтому операторы FTS5 из запроса
+    пользователя не интерпретируются.
+    """
+
+    return ' '.join(f'"{word}"*' for word in WORD.findall(query.lower()))
+
+
+def uses_fts():
+    return connection.vendor == 'sqlite'
+
+
+class SearchResults:
+    """Найденные посты в порядке релевантности (bm25).
+
+    Поддерживает count() и срезы, поэтому годится для Paginator:
+    в базу уходит COUNT по индексу и выборка одной страницы id.
+    """
+
+    def __init__(self, expression, group_id=None, author_id=None):
+        self.where = ['posts_post_fts MATCH %s']
+        self.params = [expression]
+        if group_id is not None:
+            self.where.append('posts_post.group_id = %s')
+            self.params.append(group_id)
+        if author_id is not None:
+            self.where.append('posts_post.author_id = %s')
+            self.params.append(author_id)
+
+    def _sql(self, columns):
+        return (
+            f'SELECT {columns} FROM posts_post_fts '
+            'JOIN posts_post ON posts_post.id = posts_post_fts.rowid '
+            f'WHERE {" AND ".join(self.where)}'
+        )
+
+    def count(self):
+        with connection.cursor() as cursor:
+            cursor.execute(self._sql('COUNT(*)'), self.params)
+            return cursor.fetchone()[0]
+
+    def __getitem__(self, item):
+        start = item.start or 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                self._sql('posts_post_fts.rowid')
+                + ' ORDER BY posts_post_fts.rank LIMIT %s OFFSET %s',
+                self.params + [item.stop - start, start],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(query, group_id=None, author_id=None):
+    """Посты по поисковому запросу: через FTS5 на SQLite,
+    на других СУБД - через icontains по свежести."""
+
+    expression = match_expression(query)
+    if not expression:
+        return Post.objects.none()
+    if uses_fts():
+        return SearchResults(expression, group_id, author_id)
+    posts = Post.objects.select_related('author', 'group').filter(
+        text__icontains=query
+    )
+    if group_id is not None:
+        posts = posts.filter(group_id=group_id)
+    if author_id is not None:
+        posts = posts.filter(author_id=author_id)
+    return posts
+
+
+def matching_ids(query):
+    """Подзапрос id постов для фильтрации queryset (поиск в админке)."""
+
+    return RawSQL(
+        'SELECT rowid FROM posts_post_fts WHERE posts_post_fts MATCH %s',
+        [match_expression(query)],
+    )
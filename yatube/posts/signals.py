@@ -0,0 +1,113 @@
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from core import jobs
+
+from . import cache, counters
+from .models import Group, Post, Profile, User
+
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        Profile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_pages(sender, instance, created, raw, update_fields,
+                            **kwargs):
+    if created or raw or update_fields == frozenset(['last_login']):
+        return
+    cache.invalidate(f'author:{instance.pk}')
+    counters.touch([
+        counters.POSTS,
+        counters.author_key(instance.pk),
+        *counters.author_group_keys(instance.pk),
+    ])
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_post(sender, instance, raw, **kwargs):
+    """Запоминает автора и группу поста до редактирования."""
+
+    instance._old_post = None
+    if raw or instance.pk is None:
+        return
+    old = Post.objects.filter(pk=instance.pk).values(
+        'id', 'author_id', 'group_id'
+    ).first()
+    if old is not None:
+        instance._old_post = Post(**old)
+
+
+@receiver(post_save, sender=Post)
+def update_counters_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    keys = counters.post_keys(instance)
+    old = getattr(instance, '_old_post', None)
+    if created or old is None:
+        counters.change(keys, 1)
+        counters.change_author_total(instance.author_id, 1)
+        counters.change_group_total(instance.group_id, 1)
+        return
+    old_keys = counters.post_keys(old)
+    counters.change([key for key in old_keys if key not in keys], -1)
+    counters.change([key for key in keys if key not in old_keys], 1)
+    counters.touch([key for key in keys if key in old_keys])
+    if old.author_id != instance.author_id:
+        counters.change_author_total(old.author_id, -1)
+        counters.change_author_total(instance.author_id, 1)
+    if old.group_id != instance.group_id:
+        counters.change_group_total(old.group_id, -1)
+        counters.change_group_total(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def update_counters_on_delete(sender, instance, **kwargs):
+    counters.change(counters.post_keys(instance), -1)
+    counters.change_author_total(instance.author_id, -1)
+    counters.change_group_total(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    tags = [cache.FEED, *cache.post_tags(instance)]
+    old = getattr(instance, '_old_post', None)
+    if old is not None:
+        tags += cache.post_tags(old)
+    cache.invalidate(*tags)
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_authors(sender, instance, **kwargs):
+    """Авторы постов группы до удаления: после него у постов
+    group_id уже NULL."""
+
+    instance._author_keys = counters.group_author_keys(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, signal, **kwargs):
+    cache.invalidate(f'group:{instance.pk}')
+    if kwargs.get('raw'):
+        return
+    keys = [counters.POSTS]
+    if signal is post_save:
+        keys.append(counters.group_key(instance.pk))
+        keys += counters.group_author_keys(instance.pk)
+    else:
+        keys += getattr(instance, '_author_keys', [])
+    counters.touch(keys)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        # Раскладка по лентам - в воркере (manage.py run_worker): задача
+        # фиксируется вместе с постом, запрос её не ждёт.
+        jobs.enqueue('posts.fan_out', {'post': instance.pk})
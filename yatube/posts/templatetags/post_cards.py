@@ -0,0 +1,12 @@
+from django import template
+
+from posts.cache import post_render_version
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card_version(post):
+    """Версия данных автора и группы для ключа кеша карточки поста."""
+
+    return post_render_version(post)
@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post, User
+
+
+class PostsApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestUser')
+        cls.other = User.objects.create_user(username='Other')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        now = timezone.now()
+        cls.posts = []
+        for number in range(5):
+            post = Post.objects.create(
+                text=f'Пост {number}',
+                author=cls.author if number % 2 else cls.other,
+                group=cls.group if number < 2 else None,
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(minutes=5 - number)
+            )
+            cls.posts.append(post)
+
+    def get(self, name, **params):
+        response = self.client.get(reverse(f'posts:{name}'), params)
+        return response, response.json()
+
+    @override_settings(POSTS_API_PAGE_SIZE=2)
+    def test_cursor_walks_all_posts(self):
+        seen = []
+        params = {'fields': 'id'}
+        while True:
+            with self.assertNumQueries(1):
+                _, data = self.get('api_posts', **params)
+            seen += [row['id'] for row in data['results']]
+            if data['next'] is None:
+                break
+            params['cursor'] = data['next']
+        self.assertEqual(seen, [post.id for post in reversed(self.posts)])
+
+    def test_sparse_fields(self):
+        _, data = self.get('api_posts', fields='id,author')
+        self.assertEqual(
+            data['results'][0],
+            {'id': self.posts[-1].id, 'author': 'Other'},
+        )
+
+    def test_full_post(self):
+        _, data = self.get('api_posts', ids=str(self.posts[0].id))
+        self.assertEqual(
+            set(data['results'][0]),
+            {'id', 'text', 'pub_date', 'updated_at', 'author', 'group'},
+        )
+        self.assertEqual(data['results'][0]['group'], 'group')
+
+    def test_ids_are_resolved_in_one_query(self):
+        ids = [self.posts[3].id, self.posts[0].id, 0]
+        with self.assertNumQueries(1):
+            _, data = self.get(
+                'api_posts',
+                ids=','.join(map(str, ids)),
+                fields='id,text',
+            )
+        self.assertEqual(
+            data['results'],
+            [
+                {'id': self.posts[3].id, 'text': 'Пост 3'},
+                {'id': self.posts[0].id, 'text': 'Пост 0'},
+            ],
+        )
+
+    def test_filters(self):
+        _, data = self.get('api_posts', group='group', fields='id')
+        self.assertEqual(len(data['results']), 2)
+        _, data = self.get('api_posts', author='TestUser', fields='id')
+        self.assertEqual(len(data['results']), 2)
+        response, _ = self.get('api_posts', author='missing')
+        self.assertEqual(response.status_code, 404)
+
+    def test_bad_requests(self):
+        cases = [
+            ('api_posts', {'fields': 'id,password'}),
+            ('api_posts', {'ids': '1,a'}),
+            ('api_authors', {'cursor': 'abc'}),
+        ]
+        for name, params in cases:
+            with self.subTest(params=params):
+                response, data = self.get(name, **params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', data)
+
+    def test_only_get(self):
+        response = self.client.post(reverse('posts:api_posts'))
+        self.assertEqual(response.status_code, 405)
+
+    @override_settings(POSTS_API_PAGE_SIZE=1)
+    def test_groups_and_authors(self):
+        Group.objects.create(title='Вторая', slug='second')
+        _, data = self.get('api_groups')
+        self.assertEqual(data['results'][0]['posts_count'], 2)
+        _, data = self.get('api_groups', cursor=data['next'])
+        self.assertEqual(data['results'][0]['slug'], 'second')
+        self.assertIsNone(data['next'])
+        with self.assertNumQueries(1):
+            _, data = self.get(
+                'api_authors',
+                ids=f'{self.other.id},{self.author.id}',
+                fields='username,posts_count',
+            )
+        self.assertEqual(
+            data['results'],
+            [
+                {'username': 'Other', 'posts_count': 3},
+                {'username': 'TestUser', 'posts_count': 2},
+            ],
+        )
@@ -0,0 +1,113 @@
+import re
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from core import servers
+
+from ..models import Follow, Group, Post, User
+
+
+class AsyncViewsTest(TestCase):
+    """posts.async_views под POSTS_ASYNC_VIEWS: те же страницы
+    и столько же запросов к БД, что у синхронных view."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.enterClassContext(servers.async_views(True))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestUser')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.author, group=cls.group)
+            for i in range(15)
+        )
+        call_command('rebuild_counters', stdout=StringIO())
+        cls.post = Post.objects.first()
+        Follow.objects.create(user=cls.reader, group=cls.group)
+
+    def urls(self):
+        """Адреса и бюджеты запросов анонимного пользователя
+        из posts/tests/test_queries.py."""
+
+        group_url = reverse('posts:group_list', args=['group'])
+        profile_url = reverse('posts:profile', args=['TestUser'])
+        return {
+            reverse('posts:index'): 3,
+            reverse('posts:index') + '?page=2': 3,
+            group_url: 4,
+            group_url + '?page=2': 4,
+            profile_url: 4,
+            reverse('posts:post_detail', args=[self.post.id]): 3,
+        }
+
+    def queries(self, response):
+        timing = re.search(r'(\d+) queries', response['Server-Timing'])
+        return int(timing.group(1))
+
+    def test_urls_resolve_to_async_views(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    response.resolver_match.func.__module__,
+                    'posts.async_views',
+                )
+
+    async def test_pages_and_query_budgets(self):
+        for url, budget in self.urls().items():
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.queries(response), budget)
+                self.assertIn('Cookie', response['Vary'])
+
+    async def test_pagination(self):
+        response = await self.async_client.get(reverse('posts:index'))
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 10)
+        self.assertEqual(page_obj[0], self.post)
+        response = await self.async_client.get(
+            reverse('posts:index') + f'?cursor={page_obj.next_cursor}'
+        )
+        self.assertEqual(len(response.context['page_obj']), 5)
+        response = await self.async_client.get(
+            reverse('posts:index') + '?page=2'
+        )
+        self.assertEqual(response.context['page_obj'].paginator.count, 15)
+
+    async def test_missing_objects_return_404(self):
+        urls = [
+            reverse('posts:group_list', args=['missing']),
+            reverse('posts:profile', args=['missing']),
+            reverse('posts:post_detail', args=[0]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 404)
+
+    async def test_unchanged_page_answers_304(self):
+        url = reverse('posts:group_list', args=['group'])
+        response = await self.async_client.get(url)
+        response = await self.async_client.get(
+            url, headers={'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_following_flag_for_authorized_user(self):
+        self.client.force_login(self.reader)
+        response = self.client.get(
+            reverse('posts:group_list', args=['group'])
+        )
+        self.assertTrue(response.context['following'])
+        response = self.client.get(
+            reverse('posts:profile', args=['TestUser'])
+        )
+        self.assertFalse(response.context['following'])
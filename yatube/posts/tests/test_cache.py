@@ -0,0 +1,276 @@
+import tempfile
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .. import cache as posts_cache
+from ..cache import (
+    cache_page_for_anonymous, cache_tags, post_render_version
+)
+from ..models import Group, Post, User
+
+
+@override_settings(POSTS_PAGE_CACHE=True)
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.other_group = Group.objects.create(title='Другая', slug='other')
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'TestUser'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        ]
+
+    def assertCached(self, url):
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_second_anonymous_hit_is_served_from_cache(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                second = self.assertCached(url)
+                self.assertEqual(first.content, second.content)
+
+    def test_post_write_invalidates_dependent_pages(self):
+        for url in self.urls:
+            self.client.get(url)
+        self.post.text = 'Изменённый пост'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Изменённый пост')
+
+    def test_new_post_invalidates_feed_but_not_other_group(self):
+        other_url = reverse('posts:group_list', kwargs={'slug': 'other'})
+        self.client.get(other_url)
+        self.client.get(self.urls[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(text='Новый пост', author=self.author)
+        self.assertContains(self.client.get(self.urls[0]), 'Новый пост')
+        self.assertCached(other_url)
+
+    def test_group_write_invalidates_group_page(self):
+        self.client.get(self.urls[1])
+        self.group.title = 'Новое название'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.save()
+        self.assertContains(self.client.get(self.urls[1]), 'Новое название')
+
+    def test_write_during_render_is_not_cached(self):
+        """Страница, во время отрисовки которой зафиксировалась
+        запись, не кешируется под новыми версиями тегов."""
+
+        renders = []
+
+        @cache_page_for_anonymous
+        def view(request):
+            renders.append(self.post.text)
+            if len(renders) == 1:
+                # Параллельный запрос фиксирует правку поста, пока
+                # эта страница отрисована со старыми данными.
+                with self.captureOnCommitCallbacks(execute=True):
+                    posts_cache.invalidate(*posts_cache.post_tags(self.post))
+            cache_tags(request, *posts_cache.post_tags(self.post))
+            return HttpResponse(renders[-1])
+
+        factory = RequestFactory()
+        for _ in range(3):
+            request = factory.get('/race/')
+            request.user = AnonymousUser()
+            view(request)
+        self.assertEqual(len(renders), 2)
+
+    def test_pages_are_keyed_by_page_number(self):
+        self.client.get(self.urls[0])
+        response = self.client.get(self.urls[0], {'page': 5})
+        self.assertIsNotNone(response.context)
+
+    def test_authorized_user_is_not_served_from_cache(self):
+        authorized_client = Client()
+        authorized_client.force_login(self.author)
+        self.client.get(self.urls[0])
+        response = authorized_client.get(self.urls[0])
+        self.assertContains(response, 'Новая запись')
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tempfile.mkdtemp(),
+    }
+})
+class FileBasedPageCacheTest(AnonymousPageCacheTest):
+    pass
+
+
+class PostCardFragmentCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='TestUser', first_name='Лев', last_name='Толстой'
+        )
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:index')
+
+    def card_key(self):
+        """Ключ фрагмента карточки поста на главной, как его строит
+        {% cache %} в posts/includes/post_card.html."""
+
+        self.post.refresh_from_db()
+        return make_template_fragment_key('post_card', [
+            self.post.id,
+            self.post.updated_at,
+            post_render_version(self.post),
+            'index',
+            True,
+        ])
+
+    def test_card_is_rendered_once(self):
+        key = self.card_key()
+        self.assertIsNone(cache.get(key))
+        self.client.get(self.url)
+        self.assertIn('Тестовый пост', cache.get(key))
+        cache.set(key, 'Карточка из кеша')
+        self.assertContains(self.client.get(self.url), 'Карточка из кеша')
+
+    def test_post_edit_changes_card(self):
+        self.client.get(self.url)
+        self.post.text = 'Изменённый пост'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        self.assertContains(self.client.get(self.url), 'Изменённый пост')
+
+    def test_author_change_changes_card(self):
+        self.client.get(self.url)
+        self.author.first_name = 'Фёдор'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.save()
+        self.assertContains(self.client.get(self.url), 'Фёдор Толстой')
+
+    def test_group_change_changes_card(self):
+        self.client.get(self.url)
+        self.group.slug = 'renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.save()
+        self.assertContains(self.client.get(self.url), '/group/renamed/')
+
+    def test_edit_button_is_rendered_per_viewer(self):
+        self.client.get(self.url)
+        edit_url = reverse('posts:post_edit', kwargs={'post_id': self.post.id})
+        self.assertNotContains(self.client.get(self.url), edit_url)
+        authorized_client = Client()
+        authorized_client.force_login(self.author)
+        self.assertContains(authorized_client.get(self.url), edit_url)
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        self.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'TestUser'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+        ]
+
+    def revalidate(self, url, client=None):
+        response = (client or self.client).get(url)
+        return (client or self.client).get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+
+    def test_unchanged_page_answers_304_without_rendering(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertTrue(first.has_header('Last-Modified'))
+                with self.assertTemplateNotUsed('base.html'):
+                    response = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=first['ETag']
+                    )
+                self.assertEqual(response.status_code, 304)
+                response = self.client.get(
+                    url,
+                    HTTP_IF_MODIFIED_SINCE=first['Last-Modified'],
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_write_in_scope_changes_validators(self):
+        etags = {url: self.client.get(url)['ETag'] for url in self.urls}
+        self.post.text = 'Изменённый пост'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def assertStale(self, urls, write):
+        """После write страницы urls не отвечают 304 на старый ETag."""
+
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_group_write_changes_author_pages(self):
+        urls = [self.urls[2], self.urls[3]]
+
+        def rename():
+            self.group.slug = 'renamed'
+            self.group.save()
+
+        self.assertStale(urls, rename)
+        self.assertContains(self.client.get(urls[0]), '/group/renamed/')
+        self.assertStale(urls, self.group.delete)
+        self.assertNotContains(self.client.get(urls[0]), '/group/')
+
+    def test_author_write_changes_group_pages(self):
+        def rename():
+            self.author.first_name = 'Лев'
+            self.author.save()
+
+        self.assertStale(self.urls, rename)
+
+    def test_pages_and_viewers_have_own_etags(self):
+        url = self.urls[0]
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(etag, self.client.get(url, {'page': 2})['ETag'])
+        authorized_client = Client()
+        authorized_client.force_login(self.author)
+        response = authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,94 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post, User
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestUser')
+        cls.other = User.objects.create_user(username='Other')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.old = Post.objects.create(
+            text='Старый пост',
+            author=cls.author,
+            pub_date=timezone.now() - timedelta(days=30),
+        )
+        cls.post = Post.objects.create(
+            text='Пост, с "кавычками"', author=cls.other, group=cls.group
+        )
+
+    def export(self, *args):
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+        call_command(
+            'export_posts', '--output', path, *args, stdout=StringIO()
+        )
+        return path
+
+    def test_jsonl_round_trips_through_import(self):
+        path = self.export()
+        with open(path, encoding='utf-8') as stream:
+            records = [json.loads(line) for line in stream]
+        self.assertEqual(
+            [(record['text'], record['author'], record['group'])
+             for record in records],
+            [
+                ('Старый пост', 'TestUser', None),
+                ('Пост, с "кавычками"', 'Other', 'group'),
+            ],
+        )
+        os.rename(path, path + '.jsonl')
+        self.addCleanup(os.rename, path + '.jsonl', path)
+        Post.objects.all().delete()
+        call_command('import_posts', path + '.jsonl', stdout=StringIO())
+        self.assertEqual(
+            Post.objects.get(text='Старый пост').pub_date,
+            self.old.pub_date,
+        )
+
+    def test_gzip_csv_with_filters(self):
+        since = (timezone.now() - timedelta(days=1)).date().isoformat()
+        path = self.export('--format', 'csv', '--gzip', '--since', since)
+        with gzip.open(path, 'rt', encoding='utf-8') as stream:
+            lines = stream.read().splitlines()
+        self.assertEqual(
+            lines[0], 'id,text,author,group,pub_date,updated_at'
+        )
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"Пост, с ""кавычками"""', lines[1])
+
+    def test_group_and_author_filters(self):
+        for args, expected in [
+            (('--group', 'group'), 1),
+            (('--author', 'TestUser'), 1),
+            (('--author', 'missing'), 0),
+        ]:
+            with self.subTest(args=args):
+                with open(self.export(*args), encoding='utf-8') as stream:
+                    self.assertEqual(len(stream.readlines()), expected)
+
+    def test_admin_action_streams_gzip(self):
+        admin = User.objects.create_superuser('admin', 'a@example.com', 'x')
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': 'export_jsonl',
+                '_selected_action': [self.post.pk],
+            },
+        )
+        self.assertTrue(response.streaming)
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(json.loads(content)['id'], self.post.pk)
@@ -0,0 +1,104 @@
+from xml.etree import ElementTree
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+class FeedTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestUser')
+        cls.other = User.objects.create_user(username='Other')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            text='Пост <b>с разметкой</b> & амперсандом',
+            author=cls.author,
+            group=cls.group,
+        )
+        cls.other_post = Post.objects.create(
+            text='Чужой пост', author=cls.other
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def read(self, url, **headers):
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_rss_lists_posts_newest_first(self):
+        response, content = self.read(reverse('posts:index_rss'))
+        self.assertTrue(
+            response['Content-Type'].startswith('application/rss+xml')
+        )
+        items = ElementTree.fromstring(content).findall('channel/item')
+        self.assertEqual(
+            [item.findtext('description') for item in items],
+            [
+                '<p>Чужой пост</p>',
+                '<p>Пост &lt;b&gt;с разметкой&lt;/b&gt; '
+                '&amp; амперсандом</p>',
+            ],
+        )
+
+    def test_atom_scopes(self):
+        urls = {
+            reverse('posts:index_atom'): 2,
+            reverse('posts:group_atom', kwargs={'slug': 'group'}): 1,
+            reverse(
+                'posts:profile_atom', kwargs={'username': 'Other'}
+            ): 1,
+        }
+        for url, expected in urls.items():
+            with self.subTest(url=url):
+                _, content = self.read(url)
+                entries = ElementTree.fromstring(content).findall(
+                    f'{ATOM}entry'
+                )
+                self.assertEqual(len(entries), expected)
+
+    def test_unknown_scope_is_404(self):
+        urls = [
+            reverse('posts:group_rss', kwargs={'slug': 'missing'}),
+            reverse('posts:profile_atom', kwargs={'username': 'missing'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    @override_settings(POSTS_FEED_ENTRIES=1)
+    def test_feed_is_limited(self):
+        _, content = self.read(reverse('posts:index_rss'))
+        items = ElementTree.fromstring(content).findall('channel/item')
+        self.assertEqual(len(items), 1)
+
+    def test_conditional_get_returns_304(self):
+        url = reverse('posts:index_atom')
+        response, _ = self.read(url)
+        with self.assertNumQueries(1):
+            again = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(again.status_code, 304)
+
+    def test_entries_are_cached(self):
+        url = reverse('posts:index_rss')
+        _, first = self.read(url)
+        with self.assertNumQueries(2):
+            _, second = self.read(url)
+        self.assertEqual(first, second)
+
+    def test_edit_refreshes_entry(self):
+        url = reverse('posts:index_rss')
+        self.read(url)
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        _, content = self.read(url)
+        self.assertIn('Исправленный пост', content.decode())
@@ -0,0 +1,128 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import jobs
+
+from ..models import Follow, Group, Post, TimelineEntry, User
+
+
+class FollowTimelineTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other_reader = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.old_post = Post.objects.create(text='Старый', author=cls.author)
+        jobs.run_pending()
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def feed_posts(self, client=None, cursor=None):
+        params = {'cursor': cursor} if cursor else {}
+        response = (client or self.reader_client).get(
+            reverse('posts:feed'), params
+        )
+        return response.context['page_obj']
+
+    def create_post(self, **fields):
+        post = Post.objects.create(author=self.author, **fields)
+        jobs.run_pending()
+        return post
+
+    def test_follow_backfills_and_new_posts_fan_out(self):
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        self.assertEqual(list(self.feed_posts()), [self.old_post])
+        post = self.create_post(text='Новый')
+        self.assertEqual(list(self.feed_posts()), [post, self.old_post])
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.other_reader
+        ).exists())
+
+    def test_unfollow_clears_timeline(self):
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertFalse(Follow.objects.filter(user=self.reader).exists())
+        self.assertEqual(list(self.feed_posts()), [])
+
+    def test_unfollow_group_with_author_follows(self):
+        other = User.objects.create_user(username='other_author')
+        Follow.objects.create(user=self.reader, author=other)
+        self.reader_client.get(
+            reverse('posts:group_follow', kwargs={'slug': 'group'})
+        )
+        in_group = self.create_post(text='В группе', group=self.group)
+        kept = Post.objects.create(
+            text='Другой автор', author=other, group=self.group
+        )
+        jobs.run_pending()
+        self.reader_client.get(
+            reverse('posts:group_unfollow', kwargs={'slug': 'group'})
+        )
+        self.assertEqual(list(self.feed_posts()), [kept])
+        self.assertFalse(TimelineEntry.objects.filter(
+            user=self.reader, post=in_group
+        ).exists())
+
+    def test_unfollow_author_with_group_follows(self):
+        Follow.objects.create(user=self.reader, group=self.group)
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        in_group = self.create_post(text='В группе', group=self.group)
+        self.create_post(text='Без группы')
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'author'})
+        )
+        self.assertEqual(list(self.feed_posts()), [in_group])
+
+    def test_group_follow(self):
+        self.reader_client.get(
+            reverse('posts:group_follow', kwargs={'slug': 'group'})
+        )
+        post = self.create_post(text='В группе', group=self.group)
+        self.create_post(text='Без группы')
+        self.assertEqual(list(self.feed_posts()), [post])
+
+    def test_user_cannot_follow_himself(self):
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'reader'})
+        )
+        self.assertFalse(Follow.objects.exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_is_read_on_demand(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.other_reader, author=self.author)
+        post = self.create_post(text='Для многих')
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(list(self.feed_posts()), [post, self.old_post])
+
+    @override_settings(TIMELINE_MAX_ENTRIES=3)
+    def test_timeline_is_bounded(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        for i in range(5):
+            self.create_post(text=f'Пост {i}')
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 3
+        )
+
+    def test_feed_pages_with_cursors(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        posts = [self.create_post(text=f'Пост {i}') for i in range(12)]
+        first_page = self.feed_posts()
+        second_page = self.feed_posts(cursor=first_page.next_cursor)
+        self.assertEqual(
+            list(first_page) + list(second_page), posts[::-1]
+        )
+        self.assertFalse(second_page.has_next())
+        back_page = self.feed_posts(cursor=second_page.previous_cursor)
+        self.assertEqual(list(back_page), list(first_page))
@@ -0,0 +1,128 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .. import counters
+from ..models import Group, Post, User
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def write(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w', encoding='utf-8') as stream:
+            stream.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def run_import(self, path, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            'import_posts', path, *args, stdout=stdout, stderr=stderr
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_jsonl_keeps_original_dates(self):
+        rows = [
+            {
+                'text': f'Архивный пост {number}',
+                'author': 'TestUser',
+                'group': 'group' if number % 2 else None,
+                'pub_date': f'2015-01-0{number + 1}T10:00:00+00:00',
+            }
+            for number in range(5)
+        ]
+        path = self.write(
+            '.jsonl', '\n'.join(json.dumps(row) for row in rows)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            stdout, _ = self.run_import(path, '--batch-size', '2')
+        inserts = [
+            query for query in queries
+            if query['sql'].startswith('INSERT INTO "posts_post"')
+        ]
+        self.assertEqual(len(inserts), 3)
+        self.assertIn('Загружено постов: 5', stdout)
+        self.assertEqual(
+            Post.objects.first().pub_date,
+            datetime(2015, 1, 5, 10, tzinfo=dt_timezone.utc),
+        )
+        self.assertEqual(self.group.posts.count(), 2)
+        self.assertEqual(counters.get_count(counters.POSTS), 5)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 2)
+
+    def test_updated_at_is_imported(self):
+        rows = [
+            {
+                'text': 'Исправленный пост',
+                'author': 'TestUser',
+                'pub_date': '2015-01-01T10:00:00+00:00',
+                'updated_at': '2016-03-01T12:00:00+00:00',
+            },
+            {
+                'text': 'Пост без правок',
+                'author': 'TestUser',
+                'pub_date': '2015-02-01T10:00:00+00:00',
+            },
+        ]
+        path = self.write(
+            '.jsonl', '\n'.join(json.dumps(row) for row in rows)
+        )
+        self.run_import(path)
+        self.assertEqual(
+            dict(Post.objects.values_list('text', 'updated_at')),
+            {
+                'Исправленный пост': datetime(
+                    2016, 3, 1, 12, tzinfo=dt_timezone.utc
+                ),
+                'Пост без правок': datetime(
+                    2015, 2, 1, 10, tzinfo=dt_timezone.utc
+                ),
+            },
+        )
+        post = Post.objects.get(text='Пост без правок')
+        post.save()
+        self.assertGreater(post.updated_at.year, 2015)
+
+    def test_csv_skips_bad_rows(self):
+        path = self.write(
+            '.csv',
+            'text,author,group,pub_date\n'
+            'Хороший пост,TestUser,,\n'
+            'Чужой пост,Unknown,,\n'
+            'Пост без группы,TestUser,missing,\n'
+            'Пост с датой,TestUser,group,вчера\n',
+        )
+        stdout, stderr = self.run_import(path)
+        self.assertEqual(
+            list(Post.objects.values_list('text', flat=True)),
+            ['Хороший пост'],
+        )
+        self.assertIn('пропущено записей: 3', stdout)
+        self.assertEqual(stderr.count('пропущена'), 3)
+
+    def test_imported_posts_are_searchable(self):
+        path = self.write(
+            '.jsonl', json.dumps({'text': 'уникальное', 'author': 'TestUser'})
+        )
+        self.run_import(path)
+        response = self.client.get('/search/', {'q': 'уникальное'})
+        self.assertEqual(len(response.context['page_obj']), 1)
+
+    def test_unknown_format(self):
+        path = self.write('.txt', '')
+        with self.assertRaises(CommandError):
+            self.run_import(path)
@@ -1,6 +1,12 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post, User
+from .. import counters
+from ..models import Counter, Group, Post, Profile, User
+from ..utils import CountingPaginator
 
 
 class PostModelTest(TestCase):
@@ -55,3 +61,97 @@ class PostModelTest(TestCase):
                     PostModelTest.post._meta.get_field(field).help_text,
                     expected_value
                 )
+
+
+class PostCounterTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(author=cls.user, text='Пост', group=cls.group)
+
+    def setUp(self):
+        call_command('rebuild_counters', stdout=StringIO())
+
+    def assertCounts(self, expected):
+        for key, value in expected.items():
+            with self.subTest(key=key):
+                self.assertEqual(counters.get_count(key), value)
+
+    def assertTotals(self, group, user, other):
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(
+            Profile.objects.get(user=self.user).posts_count, user
+        )
+        self.assertEqual(
+            Profile.objects.get(user=self.other).posts_count, other
+        )
+
+    def test_rebuild_counts_existing_posts(self):
+        self.assertCounts({
+            counters.POSTS: 1,
+            counters.group_key(self.group.id): 1,
+            counters.author_key(self.user.id): 1,
+            counters.author_key(self.other.id): 0,
+        })
+        Group.objects.update(posts_count=7)
+        Profile.objects.all().delete()
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertTotals(group=1, user=1, other=0)
+
+    def test_counters_follow_create_edit_delete(self):
+        post = Post.objects.create(author=self.user, text='Новый')
+        self.assertCounts({
+            counters.POSTS: 2,
+            counters.group_key(self.group.id): 1,
+            counters.author_key(self.user.id): 2,
+        })
+        self.assertTotals(group=1, user=2, other=0)
+        post.group = self.group
+        post.author = self.other
+        post.save()
+        self.assertCounts({
+            counters.POSTS: 2,
+            counters.group_key(self.group.id): 2,
+            counters.author_key(self.user.id): 1,
+            counters.author_key(self.other.id): 1,
+        })
+        self.assertTotals(group=2, user=1, other=1)
+        post.delete()
+        self.assertCounts({
+            counters.POSTS: 1,
+            counters.group_key(self.group.id): 1,
+            counters.author_key(self.other.id): 0,
+        })
+        self.assertTotals(group=1, user=1, other=0)
+
+    def test_deleting_author_deletes_profile(self):
+        self.user.delete()
+        self.assertFalse(Profile.objects.filter(user_id=self.user.id).exists())
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+
+    def test_paginator_reads_counter(self):
+        Counter.objects.filter(key=counters.POSTS).update(value=25)
+        paginator = CountingPaginator(Post.objects.all(), 10, counters.POSTS)
+        self.assertEqual(paginator.num_pages, 3)
+
+    def test_paginator_falls_back_to_cached_count(self):
+        Counter.objects.all().delete()
+        cache.clear()
+        paginator = CountingPaginator(Post.objects.all(), 10, counters.POSTS)
+        self.assertEqual(paginator.count, 1)
+        Post.objects.bulk_create([Post(author=self.user, text='Новый')])
+        paginator = CountingPaginator(Post.objects.all(), 10, counters.POSTS)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 1)
+
+    def test_missing_counter_is_created_on_write(self):
+        Counter.objects.all().delete()
+        Post.objects.create(author=self.other, text='Новый')
+        self.assertCounts({
+            counters.POSTS: 2,
+            counters.author_key(self.other.id): 1,
+        })
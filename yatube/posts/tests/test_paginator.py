@@ -0,0 +1,29 @@
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.test import SimpleTestCase
+
+from core import benchmark
+
+
+class PageWindowTest(SimpleTestCase):
+    """Шаблон пагинатора выводит окно страниц, а не весь page_range.
+    Время рендера проверяет manage.py benchmark --paginator."""
+
+    def test_window_size_is_flat(self):
+        results = benchmark.paginator_render(renders=1)
+        self.assertEqual(
+            len({result['links'] for result in results.values()}), 1,
+            'Число ссылок зависит от числа постов',
+        )
+
+    def test_window_contains_ends_and_neighbours(self):
+        paginator = Paginator(range(20_000), 10)
+        html = render_to_string(
+            'posts/includes/paginator.html', {'page_obj': paginator.page(1000)}
+        )
+        for number in (1, 998, 999, 1001, 1002, 2000):
+            with self.subTest(number=number):
+                self.assertIn(f'?page={number}"', html)
+        self.assertIn('<span class="page-link">1000</span>', html)
+        self.assertNotIn('?page=500"', html)
+        self.assertIn(str(Paginator.ELLIPSIS), html)
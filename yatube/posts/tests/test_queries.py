@@ -0,0 +1,104 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+from .utils import QueryBudgetMixin
+
+AUTH_QUERIES = 2
+
+
+class ViewQueryBudgetTest(QueryBudgetMixin, TestCase):
+    """Число запросов view-функций не зависит от размера страницы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def create_posts(self, count):
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.author, group=self.group)
+            for i in range(count)
+        )
+        call_command('rebuild_counters', stdout=StringIO())
+        return Post.objects.first()
+
+    def budgets(self, post):
+        """Бюджеты анонимного и авторизованного запроса: на страницах
+        группы и автора авторизованному нужна ещё проверка подписки."""
+        group_url = reverse('posts:group_list', kwargs={'slug': 'group'})
+        profile_url = reverse(
+            'posts:profile', kwargs={'username': 'TestUser'}
+        )
+        search_url = reverse('posts:search')
+        return {
+            reverse('posts:index'): (3, 3 + AUTH_QUERIES),
+            reverse('posts:index') + '?page=2': (3, 3 + AUTH_QUERIES),
+            group_url: (4, 5 + AUTH_QUERIES),
+            group_url + '?page=2': (4, 5 + AUTH_QUERIES),
+            profile_url: (4, 5 + AUTH_QUERIES),
+            profile_url + '?page=2': (4, 5 + AUTH_QUERIES),
+            reverse('posts:post_detail', kwargs={'post_id': post.id}): (
+                3, 3 + AUTH_QUERIES
+            ),
+            search_url: (1, 1 + AUTH_QUERIES),
+            search_url + '?q=Пост': (4, 4 + AUTH_QUERIES),
+            search_url + '?q=Пост&page=2': (4, 4 + AUTH_QUERIES),
+            search_url + '?q=Пост&group=group&author=TestUser': (
+                6, 6 + AUTH_QUERIES
+            ),
+        }
+
+    def test_read_views_budget(self):
+        for posts_count in (1, 25):
+            post = self.create_posts(posts_count)
+            for url, budgets in self.budgets(post).items():
+                guest_budget, authorized_budget = budgets
+                with self.subTest(url=url, posts_count=posts_count):
+                    with self.assertQueryBudget(guest_budget):
+                        self.client.get(url)
+                    with self.assertQueryBudget(authorized_budget):
+                        self.authorized_client.get(url)
+
+    def test_form_views_budget(self):
+        post = self.create_posts(1)
+        budgets = {
+            reverse('posts:post_create'): 1,
+            reverse('posts:post_edit', kwargs={'post_id': post.id}): 2,
+            reverse('posts:feed'): 2,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                with self.assertQueryBudget(budget + AUTH_QUERIES):
+                    self.authorized_client.get(url)
+
+    def test_follow_views_budget(self):
+        """Подписка, повторная подписка и отписка; число постов
+        автора и группы на бюджет не влияет."""
+        reader = User.objects.create_user(username='Reader')
+        self.authorized_client.force_login(reader)
+        for posts_count in (1, 25):
+            self.create_posts(posts_count)
+            for name, target in (
+                ('profile', {'username': 'TestUser'}),
+                ('group', {'slug': 'group'}),
+            ):
+                follow_url = reverse(f'posts:{name}_follow', kwargs=target)
+                unfollow_url = reverse(
+                    f'posts:{name}_unfollow', kwargs=target
+                )
+                for url, budget in (
+                    (follow_url, 10),
+                    (follow_url, 4),
+                    (unfollow_url, 5),
+                ):
+                    with self.subTest(url=url, posts_count=posts_count):
+                        with self.assertQueryBudget(budget + AUTH_QUERIES):
+                            self.authorized_client.get(url)
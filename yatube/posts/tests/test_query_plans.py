@@ -0,0 +1,61 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class FeedQueryPlanTest(TestCase):
+    """Ленты читают посты по составным индексам без сортировки
+    во временном B-дереве (USE TEMP B-TREE FOR ORDER BY)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestUser')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.author, group=cls.group)
+            for i in range(30)
+        )
+        call_command('rebuild_counters', stdout=StringIO())
+
+    def setUp(self):
+        cache.clear()
+
+    def feed_plans(self, url, params=None):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url, params)
+        plans = []
+        for query in context.captured_queries:
+            sql = query['sql']
+            if 'FROM "posts_post"' not in sql or 'ORDER BY' not in sql:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plans.append(' '.join(row[-1] for row in cursor.fetchall()))
+        self.assertTrue(plans, f'Нет запросов к постам на {url}')
+        return plans
+
+    def test_feeds_use_composite_indexes(self):
+        feeds = {
+            reverse('posts:index'): 'post_pub_date_idx',
+            reverse(
+                'posts:group_list', kwargs={'slug': 'group'}
+            ): 'post_group_pub_date_idx',
+            reverse(
+                'posts:profile', kwargs={'username': 'TestUser'}
+            ): 'post_author_pub_date_idx',
+        }
+        first_page = self.client.get(reverse('posts:index'))
+        cursor = first_page.context['page_obj'].next_cursor
+        for url, index in feeds.items():
+            for params in (None, {'page': 2}, {'cursor': cursor}):
+                with self.subTest(url=url, params=params):
+                    for plan in self.feed_plans(url, params):
+                        self.assertIn(index, plan)
+                        self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,69 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='TestUser')
+        cls.other = User.objects.create_user(username='Other')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.weak = Post.objects.create(
+            text='Про котов и немного про собак. ' + 'Слово. ' * 20,
+            author=cls.author,
+        )
+        cls.strong = Post.objects.create(
+            text='Коты, коты и ещё раз котов фото',
+            author=cls.other,
+            group=cls.group,
+        )
+        cls.unrelated = Post.objects.create(
+            text='Погода на завтра', author=cls.author
+        )
+
+    def found(self, **params):
+        response = self.client.get(reverse('posts:search'), params)
+        return list(response.context['page_obj'].object_list)
+
+    def test_results_are_ranked(self):
+        self.assertEqual(self.found(q='кот'), [self.strong, self.weak])
+
+    def test_results_are_filtered(self):
+        self.assertEqual(self.found(q='кот', group='group'), [self.strong])
+        self.assertEqual(self.found(q='кот', author='TestUser'), [self.weak])
+
+    def test_index_follows_edits_and_deletes(self):
+        self.unrelated.text = 'Кот смотрит на погоду'
+        self.unrelated.save()
+        self.assertIn(self.unrelated, self.found(q='кот'))
+        self.assertEqual(self.found(q='завтра'), [])
+        self.strong.delete()
+        self.assertEqual(self.found(q='фото'), [])
+
+    def test_fts_operators_are_not_interpreted(self):
+        self.assertEqual(self.found(q='кот OR погода"'), [])
+
+    def test_pagination_keeps_query(self):
+        Post.objects.bulk_create(
+            Post(text=f'Кот номер {i}', author=self.author) for i in range(15)
+        )
+        response = self.client.get(reverse('posts:search'), {'q': 'кот'})
+        self.assertContains(response, '?q=%D0%BA%D0%BE%D1%82&amp;page=2')
+        response = self.client.get(
+            reverse('posts:search'), {'q': 'кот', 'page': 2}
+        )
+        self.assertEqual(len(response.context['page_obj'].object_list), 7)
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кот'}
+        )
+        self.assertEqual(
+            set(response.context['cl'].result_list),
+            {self.weak, self.strong},
+        )
@@ -0,0 +1,74 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Count
+from django.test import TestCase, TransactionTestCase
+
+from .. import counters
+from ..management.commands.loadtest import percentile
+from ..models import Group, Post, User
+
+
+class SeedTest(TestCase):
+    def test_seed_creates_skewed_dataset(self):
+        call_command(
+            'seed', '--users', '50', '--groups', '5', '--posts', '2000',
+            '--batch-size', '300', '--seed', '1', stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(Group.objects.count(), 5)
+        self.assertEqual(counters.get_count(counters.POSTS), 2000)
+        per_author = sorted(
+            User.objects.annotate(total=Count('posts'))
+            .values_list('total', flat=True),
+            reverse=True,
+        )
+        # При показателе 1.1 и 50 авторах первый пишет больше четверти постов.
+        self.assertGreater(
+            per_author[0], 10 * per_author[len(per_author) // 2]
+        )
+        author = User.objects.first()
+        self.assertEqual(
+            author.profile.posts_count, author.posts.count()
+        )
+
+    def test_seed_can_be_repeated(self):
+        for _ in range(2):
+            call_command(
+                'seed', '--users', '3', '--groups', '2', '--posts', '10',
+                stdout=StringIO(),
+            )
+        self.assertEqual(User.objects.count(), 6)
+        self.assertEqual(Post.objects.count(), 20)
+
+
+class LoadTestCommandTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        call_command(
+            'seed', '--users', '5', '--groups', '2', '--posts', '30',
+            '--seed', '1', stdout=StringIO(),
+        )
+
+    def test_drives_every_page(self):
+        stdout = StringIO()
+        call_command(
+            'loadtest', '--requests', '40', '--concurrency', '1',
+            '--mix', 'index=1,group_posts=1,profile=1,post_detail=1,'
+            'post_create=1',
+            '--seed', '1', stdout=stdout,
+        )
+        output = stdout.getvalue()
+        for name in ('index', 'group_posts', 'profile', 'post_detail'):
+            self.assertRegex(output, rf'{name} .* 200: \d+')
+        self.assertRegex(output, r'post_create .* 302: \d+')
+        self.assertIn('40 запросов', output)
+        self.assertGreater(Post.objects.count(), 30)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile(values, 1), 100)
+        self.assertEqual(percentile([7], 0.9), 7)
@@ -1,3 +1,4 @@
+from django.core.paginator import Page, Paginator
 from django.test import Client, TestCase
 from django.urls import reverse
 from django.utils import timezone
@@ -208,6 +209,22 @@ class PostViewsTest(TestCase):
             with self.subTest(value=value):
                 self.assertEqual(getattr(post, value), expected)
 
+    def test_pages_show_denormalized_posts_count(self):
+        """Число постов автора берётся из профиля без COUNT(*)."""
+        PostViewsTest.author.profile.posts_count = 42
+        PostViewsTest.author.profile.save()
+        urls = [
+            reverse(
+                'posts:post_detail',
+                kwargs={'post_id': PostViewsTest.test_post.id}
+            ),
+            reverse('posts:profile', kwargs={'username': 'TestUser'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = PostViewsTest.guest_client.get(url)
+                self.assertContains(response, '42')
+
     def test_if_group_is_set_post_is_on_pages(self):
         """Проверяем, что если при создании поста указать
         группу, он появится на главной, странице группы
@@ -289,3 +306,81 @@ class TestPaginator(TestCase):
                 len(response_url[0].context['page_obj'].object_list),
                 f'Количество постов не равно 3 на второй странице {url}'
             )
+
+    def test_cursor_pagination(self):
+        """Курсорная пагинация проходит все посты без повторов
+        и возвращается назад по курсору prev."""
+        url = reverse('posts:index')
+        first_page = self.authorized_client.get(url).context['page_obj']
+        self.assertIsNotNone(first_page.next_cursor)
+        second_page = self.authorized_client.get(
+            url, {'cursor': first_page.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(len(second_page.object_list), 3)
+        self.assertFalse(second_page.has_next())
+        seen = list(first_page.object_list) + list(second_page.object_list)
+        self.assertEqual(
+            [post.id for post in seen],
+            list(
+                Post.objects.order_by('-pub_date', '-id')
+                .values_list('id', flat=True)
+            )
+        )
+        back_page = self.authorized_client.get(
+            url, {'cursor': second_page.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(
+            list(back_page.object_list), list(first_page.object_list)
+        )
+        self.assertFalse(back_page.has_previous())
+
+    def test_feeds_without_keyset_have_numbered_pages(self):
+        """Курсор - только у главной ленты; ленты группы и автора
+        нумерованные и игнорируют ?cursor=."""
+        cursor = self.authorized_client.get(
+            reverse('posts:index')
+        ).context['page_obj'].next_cursor
+        urls = [
+            reverse('posts:group_list', kwargs={'slug': 'test-slug-1'}),
+            reverse('posts:profile', kwargs={'username': 'TestUser'}),
+        ]
+        for url in urls:
+            for params in ({}, {'cursor': cursor}):
+                with self.subTest(url=url, params=params):
+                    page_obj = self.authorized_client.get(
+                        url, params
+                    ).context['page_obj']
+                    self.assertEqual(page_obj.number, 1)
+                    self.assertEqual(page_obj.paginator.num_pages, 2)
+                    self.assertEqual(page_obj.next_page_number(), 2)
+
+    def test_index_first_page_is_numbered(self):
+        """Без ?cursor= главная отдаёт обычную Page, «Следующая»
+        ведёт на курсорную страницу."""
+        response = self.authorized_client.get(reverse('posts:index'))
+        page_obj = response.context['page_obj']
+        self.assertIsInstance(page_obj, Page)
+        self.assertIsInstance(page_obj.paginator, Paginator)
+        self.assertEqual(page_obj.paginator.num_pages, 2)
+        self.assertContains(response, f'?cursor={page_obj.next_cursor}')
+
+    def test_cursor_page_has_no_numbers(self):
+        url = reverse('posts:index')
+        first_page = self.authorized_client.get(url).context['page_obj']
+        second_page = self.authorized_client.get(
+            url, {'cursor': first_page.next_cursor}
+        ).context['page_obj']
+        page_obj = self.authorized_client.get(
+            url, {'cursor': second_page.previous_cursor}
+        ).context['page_obj']
+        self.assertTrue(page_obj.paginator.keyset)
+        self.assertTrue(page_obj.has_other_pages())
+        self.assertEqual(len(page_obj), 10)
+        self.assertFalse(hasattr(page_obj, 'number'))
+        self.assertFalse(hasattr(page_obj.paginator, 'count'))
+
+    def test_broken_cursor_returns_first_page(self):
+        response = self.authorized_client.get(
+            reverse('posts:index'), {'cursor': 'not-a-cursor'}
+        )
+        self.assertEqual(len(response.context['page_obj'].object_list), 10)
@@ -0,0 +1,149 @@
+from django.conf import settings
+from django.db.models import Count, F, OuterRef, Q, Subquery, Window
+from django.db.models.functions import RowNumber
+
+from .models import Follow, Post, TimelineEntry
+from .utils import CursorPaginator, keyset
+
+
+def _followers_count(field):
+    return Subquery(
+        Follow.objects.filter(**{field: OuterRef(field)})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+
+
+def popular_follows(user):
+    """Авторы и группы из подписок user, у которых подписчиков больше
+    TIMELINE_FANOUT_LIMIT: их посты не раскладываются по лентам,
+    а подмешиваются при чтении."""
+
+    follows = (
+        Follow.objects.filter(user=user)
+        .annotate(
+            author_followers=_followers_count('author'),
+            group_followers=_followers_count('group'),
+        )
+        .values_list(
+            'author_id', 'group_id', 'author_followers', 'group_followers'
+        )
+    )
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    authors, groups = [], []
+    for author_id, group_id, author_followers, group_followers in follows:
+        if author_id is not None and author_followers > limit:
+            authors.append(author_id)
+        if group_id is not None and group_followers > limit:
+            groups.append(group_id)
+    return authors, groups
+
+
+def _push(user_ids, posts):
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in user_ids
+            for post in posts
+        ],
+        ignore_conflicts=True,
+    )
+    trim(user_ids)
+
+
+def trim(user_ids):
+    """Оставляет в лентах не больше TIMELINE_MAX_ENTRIES записей."""
+
+    ranked = TimelineEntry.objects.filter(user_id__in=user_ids).annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=F('user_id'),
+            order_by=[F('pub_date').desc(), F('post_id').desc()],
+        )
+    )
+    extra = list(
+        ranked.filter(
+            position__gt=settings.TIMELINE_MAX_ENTRIES
+        ).values_list('id', flat=True)
+    )
+    if extra:
+        TimelineEntry.objects.filter(id__in=extra).delete()
+
+
+def fan_out(post):
+    """Раскладывает новый пост по лентам подписчиков его автора и
+    группы, если подписчиков не больше TIMELINE_FANOUT_LIMIT."""
+
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    followers = set()
+    scopes = [Q(author_id=post.author_id)]
+    if post.group_id is not None:
+        scopes.append(Q(group_id=post.group_id))
+    for scope in scopes:
+        user_ids = Follow.objects.filter(scope).values_list(
+            'user_id', flat=True
+        )
+        user_ids = list(user_ids[:limit + 1])
+        if len(user_ids) <= limit:
+            followers.update(user_ids)
+    followers = sorted(followers)
+    batch_size = settings.TIMELINE_BATCH_SIZE
+    for start in range(0, len(followers), batch_size):
+        _push(followers[start:start + batch_size], [post])
+
+
+def backfill(user, posts):
+    """Добавляет в ленту user последние посты после подписки."""
+
+    _push([user.id], list(posts[:settings.TIMELINE_BACKFILL]))
+
+
+def unfollow(user, posts):
+    """Убирает из ленты user посты, на которые он больше не подписан."""
+
+    # В подписках на группу author - NULL, на автора - group: NULL
+    # в подзапросе NOT IN не даёт удалить ни одной записи.
+    followed = Follow.objects.filter(user=user)
+    authors = followed.filter(author__isnull=False).values('author')
+    groups = followed.filter(group__isnull=False).values('group')
+    TimelineEntry.objects.filter(user=user, post__in=posts).exclude(
+        Q(post__author__in=authors) | Q(post__group__in=groups)
+    ).delete()
+
+
+class TimelinePaginator(CursorPaginator):
+    """Курсорная пагинация ленты подписок.
+
+    Сливает записи из TimelineEntry (fan-out on write) с постами
+    популярных авторов и групп, которые читаются напрямую
+    (fan-out on read).
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(Post.objects.all(), per_page)
+        self.user = user
+
+    def fetch(self, position, limit):
+        entries = keyset(
+            TimelineEntry.objects.filter(user=self.user),
+            position,
+            id_field='post_id',
+        ).select_related('post__author', 'post__group')[:limit]
+        rows = {entry.post_id: entry.post for entry in entries}
+        authors, groups = popular_follows(self.user)
+        if authors or groups:
+            popular = keyset(
+                self.object_list.filter(
+                    Q(author_id__in=authors) | Q(group_id__in=groups)
+                ).select_related('author', 'group'),
+                position,
+            )[:limit]
+            rows.update((post.id, post) for post in popular)
+        newest_first = position is None or position[0] == 'next'
+        return sorted(
+            rows.values(),
+            key=lambda post: (post.pub_date, post.id),
+            reverse=newest_first,
+        )[:limit]
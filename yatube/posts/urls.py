@@ -1,15 +1,70 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import api, async_views, views
+
+# ленты и страница поста: асинхронные версии для ASGI
+pages = async_views if settings.POSTS_ASYNC_VIEWS else views
 
 
 app_name = 'posts'
 
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('', pages.index, name='index'),
+    path('rss/', views.index_feed, {'fmt': 'rss'}, name='index_rss'),
+    path('atom/', views.index_feed, {'fmt': 'atom'}, name='index_atom'),
+    path('group/<slug:slug>/', pages.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/rss/',
+        views.group_feed,
+        {'fmt': 'rss'},
+        name='group_rss'
+    ),
+    path(
+        'group/<slug:slug>/atom/',
+        views.group_feed,
+        {'fmt': 'atom'},
+        name='group_atom'
+    ),
+    path(
+        'group/<slug:slug>/follow/',
+        views.group_follow,
+        name='group_follow'
+    ),
+    path(
+        'group/<slug:slug>/unfollow/',
+        views.group_unfollow,
+        name='group_unfollow'
+    ),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
-    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
-    path('profile/<str:username>/', views.profile, name='profile'),
+    path('posts/<int:post_id>/', pages.post_detail, name='post_detail'),
+    path('profile/<str:username>/', pages.profile, name='profile'),
+    path(
+        'profile/<str:username>/rss/',
+        views.profile_feed,
+        {'fmt': 'rss'},
+        name='profile_rss'
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        views.profile_feed,
+        {'fmt': 'atom'},
+        name='profile_atom'
+    ),
+    path(
+        'profile/<str:username>/follow/',
+        views.profile_follow,
+        name='profile_follow'
+    ),
+    path(
+        'profile/<str:username>/unfollow/',
+        views.profile_unfollow,
+        name='profile_unfollow'
+    ),
+    path('feed/', views.feed, name='feed'),
+    path('api/posts/', api.posts, name='api_posts'),
+    path('api/groups/', api.groups, name='api_groups'),
+    path('api/authors/', api.authors, name='api_authors'),
     path('create/', views.post_create, name='post_create'),
+    path('search/', views.search, name='search'),
 ]
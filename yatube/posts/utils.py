@@ -1,8 +1,260 @@
+import base64
+import binascii
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
 
+from . import counters
 
-def paginate(request, obj_list, obj_count):
-    paginator = Paginator(obj_list, obj_count)
+
+def encode_cursor(direction, pub_date, pk):
+    """Упаковывает позицию (pub_date, id) в непрозрачную строку."""
+
+    raw = f'{direction}|{pub_date.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Распаковывает курсор; для испорченного курсора возвращает None."""
+
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(cursor + padding).decode()
+        direction, pub_date, pk = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in ('next', 'prev') or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+class CursorPage(Sequence):
+    """Страница курсорной пагинации: вместо номеров страниц
+    хранит курсоры соседних страниц.
+
+    Это не django.core.paginator.Page: номера страницы и общего
+    числа записей у неё нет, шаблон различает страницы по
+    paginator.keyset.
+    """
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Page (cursor)>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def keyset(queryset, position, date_field='pub_date', id_field='id'):
+    """Записи после позиции курсора в порядке выдачи.
+
+    Для next - от новых к старым после позиции, для prev - от старых
+    к новым перед ней, без позиции - с самых новых. Условие на дату
+    вынесено отдельно, чтобы по индексу (дата, id) шёл поиск диапазона.
+    """
+
+    if position is None:
+        return queryset.order_by(f'-{date_field}', f'-{id_field}')
+    direction, pub_date, pk = position
+    if direction == 'next':
+        lookup, order = 'lt', [f'-{date_field}', f'-{id_field}']
+    else:
+        lookup, order = 'gt', [date_field, id_field]
+    return queryset.filter(
+        Q(**{f'{date_field}__{lookup}': pub_date})
+        | Q(**{f'{id_field}__{lookup}': pk}),
+        **{f'{date_field}__{lookup}e': pub_date},
+    ).order_by(*order)
+
+
+class CursorPaginator:
+    """Keyset-пагинация по (pub_date, id) без COUNT(*) и OFFSET.
+
+    Записи идут от новых к старым; курсор next ведёт к более старым
+    записям, prev - к более новым. Номеров страниц нет, поэтому это
+    не django.core.paginator.Paginator.
+    """
+
+    keyset = True
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def fetch(self, position, limit):
+        """Не больше limit постов после позиции в порядке выдачи."""
+
+        return list(keyset(self.object_list, position)[:limit])
+
+    def position(self, row):
+        """Позиция записи (pub_date, id) для курсора."""
+
+        return row.pub_date, row.pk
+
+    async def afetch(self, position, limit):
+        return [
+            row async for row in keyset(self.object_list, position)[:limit]
+        ]
+
+    def get_cursor_page(self, cursor):
+        position = decode_cursor(cursor) if cursor else None
+        return self.cursor_page(
+            position, self.fetch(position, self.per_page + 1)
+        )
+
+    async def aget_cursor_page(self, cursor):
+        position = decode_cursor(cursor) if cursor else None
+        return self.cursor_page(
+            position, await self.afetch(position, self.per_page + 1)
+        )
+
+    def cursor_page(self, position, rows):
+        """Страница из не больше per_page + 1 записей после позиции:
+        лишняя запись показывает, есть ли следующая страница."""
+
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if position is None:
+            has_newer, has_older = False, has_more
+        elif position[0] == 'next':
+            has_newer, has_older = True, has_more
+        else:
+            has_newer, has_older = has_more, True
+            rows.reverse()
+        next_cursor = previous_cursor = None
+        if rows and has_older:
+            next_cursor = encode_cursor('next', *self.position(rows[-1]))
+        if rows and has_newer:
+            previous_cursor = encode_cursor(
+                'prev', *self.position(rows[0])
+            )
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+
+class CountingPaginator(Paginator):
+    """Paginator, который берёт число записей из счётчика.
+
+    Если счётчик не заведён, COUNT(*) выполняется не чаще раза
+    в POSTS_COUNT_CACHE_TTL секунд, а между запросами число
+    записей берётся из кеша и может немного отставать.
+    """
+
+    def __init__(self, object_list, per_page, counter_key):
+        super().__init__(object_list, per_page)
+        self.counter_key = counter_key
+
+    @cached_property
+    def count(self):
+        value = counters.get_count(self.counter_key)
+        if value is not None:
+            return value
+        return cache.get_or_set(
+            f'posts:count:{self.counter_key}',
+            self.object_list.count,
+            settings.POSTS_COUNT_CACHE_TTL,
+        )
+
+
+def use_cursor(request, keyset):
+    """Курсорная страница нужна view с keyset=True только для
+    ?cursor=...; первая страница и ?page=N нумерованные."""
+
+    return keyset and 'cursor' in request.GET
+
+
+def add_next_cursor(page_obj):
+    """Курсор следующей страницы для нумерованной страницы
+    keyset-view: ссылка «Следующая» ведёт в курсорный режим,
+    и дальше лента листается без OFFSET."""
+
+    page_obj.next_cursor = None
+    if page_obj.has_next():
+        last = page_obj[len(page_obj) - 1]
+        page_obj.next_cursor = encode_cursor('next', last.pub_date, last.pk)
+    return page_obj
+
+
+def paginate(request, obj_list, obj_count, counter_key=None, keyset=False):
+    """Возвращает страницу записей.
+
+    Страницы нумерованные (Paginator). View с keyset=True отдаёт
+    ссылки ?cursor=... курсорным CursorPaginator, а у её нумерованных
+    страниц есть next_cursor - вход в курсорный режим. Если
+    передан counter_key, число записей для номеров страниц берётся
+    из счётчика posts.counters вместо COUNT(*).
+    """
+
+    cursor = request.GET.get('cursor')
     page_number = request.GET.get('page')
+    if use_cursor(request, keyset):
+        return CursorPaginator(obj_list, obj_count).get_cursor_page(cursor)
+    if counter_key is None:
+        paginator = Paginator(obj_list, obj_count)
+    else:
+        paginator = CountingPaginator(obj_list, obj_count, counter_key)
+    page_obj = paginator.get_page(page_number)
+    if keyset:
+        add_next_cursor(page_obj)
+    return page_obj
+
+
+async def _acount(paginator, counter_key):
+    if counter_key is not None:
+        value = await counters.aget_count(counter_key)
+        if value is not None:
+            return value
+        key = f'posts:count:{counter_key}'
+        value = await cache.aget(key)
+        if value is None:
+            value = await paginator.object_list.acount()
+            await cache.aset(key, value, settings.POSTS_COUNT_CACHE_TTL)
+        return value
+    return await paginator.object_list.acount()
+
+
+async def apaginate(request, obj_list, obj_count, counter_key=None,
+                    keyset=False):
+    """paginate для асинхронных view: число записей и страница
+    читаются через асинхронный ORM, записи страницы выбираются
+    сразу, и шаблон не обращается к БД."""
+
+    cursor = request.GET.get('cursor')
+    page_number = request.GET.get('page')
+    if use_cursor(request, keyset):
+        return await CursorPaginator(
+            obj_list, obj_count
+        ).aget_cursor_page(cursor)
+    paginator = Paginator(obj_list, obj_count)
+    # Дальше Paginator берёт число записей из cached_property.
+    paginator.count = await _acount(paginator, counter_key)
     page_obj = paginator.get_page(page_number)
+    page_obj.object_list = [
+        obj async for obj in page_obj.object_list
+    ]
+    if keyset:
+        add_next_cursor(page_obj)
     return page_obj
@@ -1,71 +1,296 @@
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.vary import vary_on_cookie
 from django.conf import settings
 
-from .forms import PostForm
-from .models import Group, Post, User
+from . import counters, feeds, timeline
+from .cache import (
+    FEED, cache_page_for_anonymous, cache_tags, page_tags, post_tags
+)
+from .conditional import (
+    conditional_page, group_scope, index_scope, post_scope, profile_scope,
+    scope_object
+)
+from .forms import PostForm, SearchForm
+from .models import Follow, Group, Post, User
+from .search import search_posts
+from .timeline import TimelinePaginator
 from .utils import paginate
 
+# Бюджеты запросов в docstring-ах view-функций указаны без сессии
+# и пользователя: для авторизованного запроса к ним добавляются 2,
+# а на страницах группы и автора ещё 1 - проверка подписки.
+# Ответ 304 стоит только запросов для ETag (см. posts.conditional).
+# Бюджеты проверяет posts/tests/test_queries.py.
 
+
+@vary_on_cookie
+@cache_page_for_anonymous
+@conditional_page(index_scope)
 def index(request):
+    """Главная лента, самая длинная: первая страница и ?page=N
+    нумерованные, «Следующая» ведёт на курсорные страницы ?cursor=...
+    Запросов к БД: 3 (счётчик для ETag, число постов, посты),
+    с ?cursor= - 2."""
+
     post_list = Post.objects.select_related(
         'group',
         'author'
     )
-    page_obj = paginate(request, post_list, settings.POSTS_VIEWED)
+    page_obj = paginate(
+        request, post_list, settings.POSTS_VIEWED, counters.POSTS,
+        keyset=True,
+    )
+    cache_tags(request, FEED, *page_tags(page_obj))
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@vary_on_cookie
+@cache_page_for_anonymous
+@conditional_page(group_scope)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
+    """Лента группы. Запросов к БД: 4 (группа и счётчик для ETag,
+    число постов, посты)."""
+
+    group = scope_object(request) or get_object_or_404(Group, slug=slug)
     post_list = group.posts.select_related('author')
-    page_obj = paginate(request, post_list, settings.POSTS_VIEWED)
+    page_obj = paginate(
+        request,
+        post_list,
+        settings.POSTS_VIEWED,
+        counters.group_key(group.id),
+    )
+    cache_tags(request, f'group:{group.id}', *page_tags(page_obj))
     context = {
         'group': group,
         'page_obj': page_obj,
+        'following': request.user.is_authenticated and Follow.objects.filter(
+            user=request.user, group=group
+        ).exists(),
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@vary_on_cookie
+@cache_page_for_anonymous
+@conditional_page(profile_scope)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    page_obj = paginate(request, posts, settings.POSTS_VIEWED)
+    """Лента автора. Запросов к БД: 4 (автор с профилем и счётчик
+    для ETag, число постов, посты)."""
+
+    author = scope_object(request) or get_object_or_404(
+        User.objects.select_related('profile'),
+        username=username,
+    )
+    posts = author.posts.select_related('group')
+    page_obj = paginate(
+        request,
+        posts,
+        settings.POSTS_VIEWED,
+        counters.author_key(author.id),
+    )
+    cache_tags(request, f'author:{author.id}', *page_tags(page_obj))
     context = {
         'page_obj': page_obj,
         'author': author,
+        'following': request.user.is_authenticated and Follow.objects.filter(
+            user=request.user, author=author
+        ).exists(),
     }
     return render(request, 'posts/profile.html', context)
 
 
+@vary_on_cookie
+@cache_page_for_anonymous
+@conditional_page(post_scope)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    """Пост с автором, профилем и группой. Запросов к БД: 3 (пост
+    и счётчики для ETag, пост)."""
+
+    post = get_object_or_404(
+        Post.objects.select_related('author__profile', 'group'),
+        id=post_id,
+    )
+    cache_tags(request, *post_tags(post))
     context = {
         'post': post,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def search(request):
+    """Полнотекстовый поиск по постам с фильтром по группе и автору.
+    Запросов к БД: 4 (число найденных, id постов страницы, посты,
+    группы для формы), с фильтром - по 1 на группу и автора; без
+    запроса - 1 (группы для формы)."""
+
+    form = SearchForm(request.GET or None)
+    page_obj = None
+    if form.is_valid():
+        group = form.cleaned_data['group']
+        author = form.cleaned_data['author']
+        results = search_posts(
+            form.cleaned_data['q'],
+            group_id=group.id if group else None,
+            author_id=author.id if author else None,
+        )
+        paginator = Paginator(results, settings.POSTS_VIEWED)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    query = request.GET.copy()
+    query.pop('page', None)
+    context = {
+        'form': form,
+        'page_obj': page_obj,
+        'page_query': f'{query.urlencode()}&' if query else '',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@conditional_page(index_scope)
+def index_feed(request, fmt):
+    """RSS/Atom главной ленты. Запросов к БД: 2 (счётчик, посты)."""
+
+    return feeds.feed_response(
+        request,
+        fmt,
+        Post.objects.all(),
+        title='Последние посты Yatube',
+        link=reverse('posts:index'),
+    )
+
+
+@conditional_page(group_scope)
+def group_feed(request, slug, fmt):
+    """RSS/Atom группы. Запросов к БД: 3 (группа и счётчик для ETag,
+    посты)."""
+
+    group = scope_object(request) or get_object_or_404(Group, slug=slug)
+    return feeds.feed_response(
+        request,
+        fmt,
+        group.posts.all(),
+        title=f'Последние посты группы {group.title}',
+        link=reverse('posts:group_list', args=[slug]),
+    )
+
+
+@conditional_page(profile_scope)
+def profile_feed(request, username, fmt):
+    """RSS/Atom автора. Запросов к БД: 3 (автор и счётчик для ETag,
+    посты)."""
+
+    author = scope_object(request) or get_object_or_404(
+        User, username=username
+    )
+    return feeds.feed_response(
+        request,
+        fmt,
+        author.posts.all(),
+        title=f'Последние посты пользователя {author.username}',
+        link=reverse('posts:profile', args=[username]),
+    )
+
+
+@login_required
+def feed(request):
+    """Лента подписок. Запросов к БД: 2 (записи ленты с постами,
+    популярные подписки)."""
+
+    paginator = TimelinePaginator(request.user, settings.POSTS_VIEWED)
+    page_obj = paginator.get_cursor_page(request.GET.get('cursor'))
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/follow.html', context)
+
+
+def _follow(request, **target):
+    follow, created = Follow.objects.get_or_create(
+        user=request.user, **target
+    )
+    if created:
+        posts = Post.objects.filter(**target).order_by('-pub_date', '-id')
+        timeline.backfill(request.user, posts)
+
+
+def _unfollow(request, **target):
+    Follow.objects.filter(user=request.user, **target).delete()
+    timeline.unfollow(request.user, Post.objects.filter(**target))
+
+
+@login_required
+def profile_follow(request, username):
+    """Подписка на автора. Запросов к БД: 10 (автор, подписка,
+    вставка подписки с SAVEPOINT - 3, посты автора, записи ленты,
+    обрезка ленты, счётчик для ETag - 2), если подписка уже есть - 4."""
+
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        _follow(request, author=author)
+        counters.touch([counters.author_key(author.id)])
+    return redirect('posts:profile', username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    """Отписка от автора. Запросов к БД: 5 (автор, подписка, записи
+    ленты, счётчик для ETag - 2)."""
+
+    author = get_object_or_404(User, username=username)
+    _unfollow(request, author=author)
+    counters.touch([counters.author_key(author.id)])
+    return redirect('posts:profile', username)
+
+
+@login_required
+def group_follow(request, slug):
+    """Подписка на группу. Запросов к БД: 10, если подписка уже
+    есть - 4 (как у profile_follow)."""
+
+    group = get_object_or_404(Group, slug=slug)
+    _follow(request, group=group)
+    counters.touch([counters.group_key(group.id)])
+    return redirect('posts:group_list', slug)
+
+
+@login_required
+def group_unfollow(request, slug):
+    """Отписка от группы. Запросов к БД: 5 (как у profile_unfollow)."""
+
+    group = get_object_or_404(Group, slug=slug)
+    _unfollow(request, group=group)
+    counters.touch([counters.group_key(group.id)])
+    return redirect('posts:group_list', slug)
+
+
 @login_required
 def post_create(request):
+    """Форма поста. Запросов к БД при GET: 1 (группы для выбора)."""
+
     form = PostForm(request.POST or None)
     context = {
         'form': form,
     }
     if form.is_valid():
         form.instance.author = request.user
-        form.save()
+        with transaction.atomic():
+            form.save()
         return redirect('posts:profile', request.user.username)
     return render(request, 'posts/create_post.html', context)
 
 
 @login_required
 def post_edit(request, post_id):
+    """Форма редактирования. Запросов к БД при GET: 2 (пост, группы)."""
+
     edited_post = get_object_or_404(Post, id=post_id)
-    if not request.user == edited_post.author:
+    if request.user.id != edited_post.author_id:
         return redirect('posts:post_detail', post_id)
     form = PostForm(request.POST or None, instance=edited_post)
     context = {
@@ -74,5 +299,6 @@ def post_edit(request, post_id):
     }
     if not form.is_valid():
         return render(request, 'posts/create_post.html', context)
-    form.save()
+    with transaction.atomic():
+        form.save()
     return redirect('posts:post_detail', post_id)
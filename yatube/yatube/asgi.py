@@ -0,0 +1,22 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Async versions of the feed pages are enabled by POSTS_ASYNC_VIEWS
+(YATUBE_ASYNC_VIEWS=1).
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
+"""
+
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+django.setup(set_prefix=False)
+
+from core.handlers import ASGIHandler  # noqa: E402
+
+application = ASGIHandler()
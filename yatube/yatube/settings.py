@@ -5,13 +5,143 @@ POSTS_VIEWED = 10
 
 POST_CHARS_VIEWED = 15
 
+# сколько секунд кешировать COUNT(*), если для ленты нет счётчика
+POSTS_COUNT_CACHE_TTL = 60
+
+# кеш готовых страниц лент и постов для анонимных пользователей
+POSTS_PAGE_CACHE = False
+
+POSTS_PAGE_CACHE_TIMEOUT = 60 * 60
+
+# лента подписок: сколько постов хранить на пользователя, с какого
+# числа подписчиков не раскладывать посты по лентам при записи,
+# сколько лент заполнять за один запрос к БД и сколько постов
+# добавлять в ленту при новой подписке
+TIMELINE_MAX_ENTRIES = 500
+
+TIMELINE_FANOUT_LIMIT = 1000
+
+TIMELINE_BATCH_SIZE = 500
+
+TIMELINE_BACKFILL = 20
+
+# ленты RSS/Atom: число записей, размер пачки чтения из БД и кеша,
+# время хранения готовой записи в кеше
+POSTS_FEED_ENTRIES = 50
+
+POSTS_FEED_CHUNK_SIZE = 25
+
+POSTS_FEED_ENTRY_TIMEOUT = 60 * 60 * 24
+
+# асинхронные index, group_posts, profile и post_detail
+# (posts.async_views) вместо синхронных; имеет смысл под ASGI-сервером
+# (yatube.asgi), под WSGI каждая такая view запускает свой цикл событий
+POSTS_ASYNC_VIEWS = os.environ.get('YATUBE_ASYNC_VIEWS') == '1'
+
+# JSON API: размер страницы и максимум id в одном запросе ?ids=
+POSTS_API_PAGE_SIZE = 20
+
+POSTS_API_MAX_IDS = 100
+
+# выгрузка постов: записей в одной пачке чтения из БД
+POSTS_EXPORT_CHUNK_SIZE = 2000
+
+# фоновые задачи (core.jobs, manage.py run_worker): потоков воркера,
+# задач в одной пачке обработчика, пауза опроса пустой очереди и
+# первая пауза перед повтором в секундах (дальше удваивается), число
+# попыток и через сколько секунд задача упавшего воркера снова
+# попадает в очередь
+JOBS_THREADS = 4
+
+JOBS_BATCH_SIZE = 100
+
+JOBS_POLL_INTERVAL = 1
+
+JOBS_RETRY_DELAY = 10
+
+JOBS_MAX_ATTEMPTS = 5
+
+JOBS_LOCK_TIMEOUT = 60 * 10
+
+# профилирование запросов (core.middleware.ProfilingMiddleware):
+# включено ли оно (с False middleware и обёртки шаблонов и кешей
+# не подключаются), доля запросов под cProfile и порог в мс, начиная
+# с которого дамп cProfile сохраняется в PROFILING_DIR; заголовок
+# Server-Timing (PROFILING_SERVER_TIMING) - ниже, после DEBUG
+PROFILING_ENABLED = True
+
+PROFILING_SAMPLE_RATE = 0
+
+PROFILING_SLOW_MS = 500
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# журнал SQL (core.querylog): запросы дольше QUERYLOG_SLOW_MS мс и
+# SQL, повторённый в одном HTTP-запросе QUERYLOG_REPEATED раз и больше,
+# пишутся в QUERYLOG_FILE в формате JSONL; сводка - manage.py query_report
+QUERYLOG_ENABLED = True
+
+QUERYLOG_SLOW_MS = 100
+
+QUERYLOG_REPEATED = 5
+
+# значения параметров медленных запросов в журнале; по умолчанию
+# пишутся только их типы - в параметрах бывают ключи сессий и хеши
+# паролей
+QUERYLOG_PARAMS = False
+
+QUERYLOG_FILE = os.path.join(BASE_DIR, 'logs', 'queries.jsonl')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'jsonl': {
+            '()': 'core.querylog.JsonLinesFormatter',
+        },
+    },
+    'handlers': {
+        'querylog': {
+            'class': 'core.querylog.JsonLinesHandler',
+            'filename': QUERYLOG_FILE,
+            'formatter': 'jsonl',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'core.querylog': {
+            'handlers': ['querylog'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# бенчмарки (manage.py benchmark): размеры наборов данных в постах,
+# файл базовых результатов и допустимый рост метрик: число запросов -
+# абсолютный, время и память - относительный; время между запусками
+# на одной машине шумит в полтора раза, поэтому его порог выше
+BENCHMARK_SIZES = [100, 1000, 10000]
+
+BENCHMARK_BASELINE = os.path.join(BASE_DIR, 'benchmarks', 'baseline.json')
+
+BENCHMARK_THRESHOLDS = {
+    'queries': 0,
+    'time_ms': 1.0,
+    'peak_kb': 0.25,
+}
+
 SECRET_KEY = 'lcgy06%6)qtf8n5vzfetazxhubev@=%lgxi7^)=5&6jegv!r$k'
 
 
 DEBUG = True
 
+# Server-Timing раскрывает время SQL и шаблонов любому клиенту,
+# поэтому без DEBUG заголовок выключен
+PROFILING_SERVER_TIMING = DEBUG
+
 ALLOWED_HOSTS = [
     'localhost',
     '127.0.0.1',
@@ -33,11 +163,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -65,11 +197,92 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+ASGI_APPLICATION = 'yatube.asgi.application'
+
+
+# профиль SQLite для конкурентной нагрузки, применяется к каждому новому
+# соединению (core.backends.sqlite3): WAL - читатели не блокируют
+# писателя и наоборот; synchronous=NORMAL в WAL не теряет целостность,
+# только последние транзакции при отключении питания; busy_timeout -
+# сколько миллисекунд ждать чужую блокировку вместо ошибки
+# "database is locked"; cache_size < 0 - размер кеша страниц в КиБ.
+# Пустой словарь возвращает стандартные настройки SQLite.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# пул соединений процесса (core.backends.pool): не больше max_size
+# открытых соединений на БД, ожидание свободного - до timeout секунд,
+# соединение старше max_lifetime секунд переоткрывается. Метрики пула -
+# на странице core:profiling. None - без пула, тогда соединение живёт
+# в потоке CONN_MAX_AGE секунд с проверкой перед каждым запросом
+DATABASE_POOL = {
+    'max_size': 16,
+    'timeout': 10,
+    'max_lifetime': 60 * 60,
+}
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 0 if DATABASE_POOL else 60 * 10,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'pragmas': SQLITE_PRAGMAS,
+            # транзакции берут блокировку на запись сразу при BEGIN
+            'transaction_mode': 'IMMEDIATE',
+            'pool': DATABASE_POOL,
+        },
+    }
+}
+
+# реплика только для чтения - второй файл SQLite из YATUBE_REPLICA_DB,
+# копия основной БД (manage.py sync_replica). Ленты, профили, посты и
+# страницы about читают с реплик, запись, вход и админка работают с
+# основной БД (core.routers). Тесты запускаются без реплики: TestCase
+# запрещает запросы к алиасам, которых нет в databases
+if os.environ.get('YATUBE_REPLICA_DB'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['YATUBE_REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+DATABASE_REPLICA_VIEWS = [
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'about:author',
+    'about:tech',
+]
+
+# после записи браузер столько секунд читает только с основной БД,
+# чтобы автор сразу видел свой пост при отстающей реплике. Кеш
+# страниц (POSTS_PAGE_CACHE) может заполниться с отстающей реплики
+# и отдавать устаревшую страницу до POSTS_PAGE_CACHE_TIMEOUT
+DATABASE_STICKY_COOKIE = 'primary'
+
+DATABASE_STICKY_SECONDS = 10
+
+
+# locmem хранит кеш в памяти процесса; если воркеров несколько,
+# для точной инвалидации страниц нужен общий кеш, например
+# 'django.core.cache.backends.filebased.FileBasedCache' с LOCATION
+# os.path.join(BASE_DIR, 'cache').
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
@@ -111,6 +324,18 @@ LOGIN_REDIRECT_URL = 'posts:index'
 
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# письма ставятся в очередь (core.mail) и отправляются воркером
+# (manage.py run_worker) через EMAIL_DELIVERY_BACKEND. Для настоящего
+# сервера - 'django.core.mail.backends.smtp.EmailBackend' с EMAIL_HOST
+# и EMAIL_PORT; локально его заменяет manage.py smtp_sink
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+
+EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+# не больше EMAIL_RATE_LIMIT писем одному адресату за EMAIL_RATE_PERIOD
+# секунд, лишние откладываются до следующего окна; счётчики в CACHES
+EMAIL_RATE_LIMIT = 5
+
+EMAIL_RATE_PERIOD = 60 * 60